@@ -0,0 +1,22 @@
+"""
+In-process stand-ins for the Firestore, Cloud Storage and Pub/Sub clients the functions use, so that
+their read, write and delete strategies can be benchmarked without a project or network. Each stand-in
+simulates every round trip it would make, counting its calls and bytes, and can be given a latency and
+failures per operation with a CallProfile.
+"""
+from .call_profile import CallProfile, LocalService
+from .function_clients import use_in_create_dataset, use_in_delete_datasets, use_in_publish_schema
+from .local_firestore import LocalFirestoreClient
+from .local_pubsub import LocalPublisherClient
+from .local_storage import LocalStorageClient
+
+__all__ = [
+    "CallProfile",
+    "LocalFirestoreClient",
+    "LocalPublisherClient",
+    "LocalService",
+    "LocalStorageClient",
+    "use_in_create_dataset",
+    "use_in_delete_datasets",
+    "use_in_publish_schema",
+]
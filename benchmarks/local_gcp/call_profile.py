@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+from google.api_core import exceptions
+
+
+@dataclass
+class CallProfile:
+    """
+    How a stand-in responds to calls of an operation, such as a Firestore commit or a blob download.
+
+    latency_seconds: time every call takes, slept outside of any lock so that concurrent calls overlap.
+    jitter_seconds: up to this much more time is added to each call at random.
+    failure_rate: the chance of each call failing, from 0 to 1.
+    failing_calls: the call numbers of the operation that fail, counting from 1, such as {3} for only the third.
+    error: creates the exception a failing call raises from its message.
+    """
+
+    latency_seconds: float = 0.0
+    jitter_seconds: float = 0.0
+    failure_rate: float = 0.0
+    failing_calls: set[int] = field(default_factory=set)
+    error: Callable[[str], Exception] = exceptions.ServiceUnavailable
+
+
+class LocalService:
+    """
+    Base of the in-process stand-ins for Google Cloud services. Every call a stand-in makes to its
+    service is simulated here: it is counted with the bytes it sends or receives, delayed by the
+    latency of its operation and failed as configured, so that runs can be compared by their
+    round trips as well as their timings. Randomness is seeded, so a run can be repeated exactly.
+    """
+
+    def __init__(
+        self,
+        profiles: dict[str, CallProfile] | None = None,
+        default_profile: CallProfile | None = None,
+        seed: int = 0,
+    ):
+        self.profiles = dict(profiles or {})
+        self.default_profile = default_profile or CallProfile()
+        self.call_counts: Counter[str] = Counter()
+        self.byte_counts: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+
+    def set_profile(self, operation: str, profile: CallProfile) -> None:
+        """
+        Sets how calls of an operation respond, replacing the default profile for it.
+
+        Parameters:
+        operation (str): name of the operation, such as "commit".
+        profile (CallProfile): the latency and failures of the operation.
+        """
+        self.profiles[operation] = profile
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """
+        Gets the number of calls made and bytes sent or received for each operation so far.
+        """
+        with self._stats_lock:
+            return {
+                operation: {"calls": calls, "bytes": self.byte_counts[operation]}
+                for operation, calls in sorted(self.call_counts.items())
+            }
+
+    def reset_stats(self) -> None:
+        """
+        Clears the call and byte counts, so that failing_calls count from the next call again.
+        """
+        with self._stats_lock:
+            self.call_counts.clear()
+            self.byte_counts.clear()
+
+    def simulate_call(self, operation: str, size_bytes: int = 0) -> None:
+        """
+        Simulates a call to the service, counting it, waiting for its latency and then raising
+        the error of its profile if it fails.
+
+        Parameters:
+        operation (str): name of the operation called.
+        size_bytes (int): bytes sent or received by the call.
+        """
+        profile = self.profiles.get(operation, self.default_profile)
+
+        with self._stats_lock:
+            self.call_counts[operation] += 1
+            self.byte_counts[operation] += size_bytes
+            call_number = self.call_counts[operation]
+            latency_seconds = profile.latency_seconds + self._random.uniform(0, profile.jitter_seconds)
+            is_failure = call_number in profile.failing_calls or self._random.random() < profile.failure_rate
+
+        if latency_seconds > 0:
+            time.sleep(latency_seconds)
+
+        if is_failure:
+            raise profile.error(f"Injected failure of {operation} call {call_number}.")
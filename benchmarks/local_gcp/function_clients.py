@@ -0,0 +1,53 @@
+"""
+Plugs the stand-ins into each function in place of the Google Cloud clients it would create on first use.
+The src directory of the function must be on sys.path, and as every function has its own config and main
+modules, only one function can be used in a process.
+"""
+from .local_firestore import LocalFirestoreClient
+from .local_pubsub import LocalPublisherClient
+from .local_storage import LocalStorageClient
+
+
+def use_in_create_dataset(
+    firestore_client: LocalFirestoreClient | None = None,
+    storage_client: LocalStorageClient | None = None,
+    publisher_client: LocalPublisherClient | None = None,
+) -> None:
+    """
+    Registers the stand-ins given with create-dataset's client registry, clearing the bucket and verified
+    topics cached from any earlier clients. The dataset bucket is never fetched while CONF is "unit", so it
+    must be set to something else before config is imported.
+    """
+    from repository.bucket_loader import bucket_loader
+    from repository.client_registry import client_registry
+    from services.publisher_service import publisher_service
+
+    for client_name, client in (
+        ("firestore", firestore_client),
+        ("storage", storage_client),
+        ("publisher", publisher_client),
+    ):
+        if client is not None:
+            client_registry.register_client(client_name, client)
+
+    bucket_loader.dataset_bucket = None
+    publisher_service.verified_topic_paths.clear()
+
+
+def use_in_delete_datasets(firestore_client: LocalFirestoreClient) -> None:
+    """
+    Sets the Firestore client shared by every DatasetDeleter.
+    """
+    from dataset_deleter import DatasetDeleter
+
+    DatasetDeleter._client = firestore_client
+
+
+def use_in_publish_schema(publisher_client: LocalPublisherClient) -> None:
+    """
+    Sets the publisher that publish-schema sends its error messages with. The schema is still posted to the
+    SDS API and its secrets read from Secret Manager, so those need to be reachable or patched separately.
+    """
+    from services.pub_sub_service import PUB_SUB_SERVICE
+
+    PUB_SUB_SERVICE._publisher = publisher_client
@@ -0,0 +1,640 @@
+import functools
+import itertools
+import json
+import operator
+import string
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from google.api_core import exceptions
+
+from .call_profile import CallProfile, LocalService
+
+MAX_BATCH_WRITES = 500
+MAX_BATCH_SIZE_BYTES = 10 * 1024 * 1024
+DOCUMENT_NAME = "__name__"
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_FILTER_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+    "not-in": lambda value, values: value not in values,
+    "array-contains": lambda value, element: isinstance(value, list) and element in value,
+    "array-contains-any": lambda value, elements: isinstance(value, list) and any(e in value for e in elements),
+}
+_MISSING = object()
+
+
+def get_write_size_bytes(path: str, data: dict | None) -> int:
+    """
+    Estimates the bytes a write sends to Firestore as the length of the document path and its
+    data serialised as compact JSON. This is not Firestore's own storage size, but it grows with
+    the same things, so it can be compared between runs.
+
+    Parameters:
+    path (str): path of the document written.
+    data (dict | None): fields written, if any.
+    """
+    if not data:
+        return len(path)
+
+    return len(path) + len(json.dumps(data, default=str, separators=(",", ":")))
+
+
+class LocalFirestoreClient(LocalService):
+    """
+    In-process stand-in for the Firestore client, holding documents in memory. It covers the surface
+    the functions use: collection and document references, queries with filters, ordering, limits,
+    field selection and cursors, count aggregations, write batches and transactions.
+
+    Calls are simulated per round trip under these operations: "get" for a document read, "query" for
+    a query or list of collections, "count" for an aggregation, "commit" for a batch, transaction or
+    single document write, and "begin_transaction" and "rollback". A commit with more writes or bytes
+    than the limits given fails with InvalidArgument before it is sent, as it would on Firestore.
+    """
+
+    def __init__(
+        self,
+        project: str = "local",
+        database: str = "(default)",
+        profiles: dict[str, CallProfile] | None = None,
+        default_profile: CallProfile | None = None,
+        seed: int = 0,
+        max_batch_writes: int = MAX_BATCH_WRITES,
+        max_batch_size_bytes: int = MAX_BATCH_SIZE_BYTES,
+    ):
+        super().__init__(profiles, default_profile, seed)
+        self.project = project
+        self.database = database
+        self.max_batch_writes = max_batch_writes
+        self.max_batch_size_bytes = max_batch_size_bytes
+        self._lock = threading.RLock()
+        self._collections: dict[str, _StoredCollection] = {}
+        self._collection_names: dict[str, set[str]] = {}
+        self._transaction_ids = itertools.count(1)
+
+    def collection(self, *path: str) -> "LocalCollectionReference":
+        return LocalCollectionReference(self, "/".join(path))
+
+    def document(self, *path: str) -> "LocalDocumentReference":
+        collection_path, document_id = "/".join(path).rsplit("/", 1)
+        return LocalDocumentReference(self, collection_path, document_id)
+
+    def collections(self) -> list["LocalCollectionReference"]:
+        return self._list_collections("")
+
+    def batch(self) -> "LocalWriteBatch":
+        return LocalWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> "LocalTransaction":
+        return LocalTransaction(self, max_attempts, read_only)
+
+    def get_document_count(self, collection_path: str) -> int:
+        """
+        Gets the number of documents in a collection directly, without simulating a call.
+
+        Parameters:
+        collection_path (str): path of the collection, such as "datasets/<dataset_id>/units".
+        """
+        with self._lock:
+            stored_collection = self._collections.get(collection_path)
+            return len(stored_collection.documents) if stored_collection else 0
+
+    def _get_document(self, collection_path: str, document_id: str) -> dict | None:
+        with self._lock:
+            stored_collection = self._collections.get(collection_path)
+            return stored_collection.documents.get(document_id) if stored_collection else None
+
+    def _list_collections(self, parent_path: str) -> list["LocalCollectionReference"]:
+        """
+        Lists the collections under a document, or the top level collections, that hold any documents.
+        """
+        with self._lock:
+            collection_paths = [
+                f"{parent_path}/{name}" if parent_path else name
+                for name in sorted(self._collection_names.get(parent_path, ()))
+            ]
+            collection_paths = [path for path in collection_paths if self._collections[path].documents]
+
+        self.simulate_call("query", sum(len(path) for path in collection_paths))
+
+        return [LocalCollectionReference(self, path) for path in collection_paths]
+
+    def _commit_writes(
+        self, writes: list["_Write"], read_documents: dict[tuple[str, str], dict | None] | None = None
+    ) -> list["LocalWriteResult"]:
+        """
+        Commits writes atomically as one round trip, after checking them against the batch limits.
+        Every write is checked before any is applied, so a failed commit changes nothing. The writes
+        of a transaction are aborted if any document it read has been written since.
+        """
+        size_bytes = sum(write.size_bytes for write in writes)
+
+        if len(writes) > self.max_batch_writes:
+            raise exceptions.InvalidArgument(f"maximum {self.max_batch_writes} writes allowed per request")
+        if size_bytes > self.max_batch_size_bytes:
+            raise exceptions.InvalidArgument(
+                f"Request payload size {size_bytes} exceeds the limit of {self.max_batch_size_bytes} bytes"
+            )
+
+        self.simulate_call("commit", size_bytes)
+
+        with self._lock:
+            for (collection_path, document_id), data in (read_documents or {}).items():
+                # Every write stores a new dict, so a document is unchanged only if it is the same object
+                if self._get_document(collection_path, document_id) is not data:
+                    raise exceptions.Aborted("Transaction aborted as a document it read has been written since.")
+
+            for write in writes:
+                if write.kind not in ("update", "create"):
+                    continue
+
+                exists = self._get_document(write.reference._collection_path, write.reference.id) is not None
+
+                if write.kind == "update" and not exists:
+                    raise exceptions.NotFound(f"No document to update: {write.reference.path}")
+                if write.kind == "create" and exists:
+                    raise exceptions.AlreadyExists(f"Document already exists: {write.reference.path}")
+
+            for write in writes:
+                self._apply_write(write)
+
+        update_time = datetime.now(timezone.utc)
+        return [LocalWriteResult(update_time) for _ in writes]
+
+    def _apply_write(self, write: "_Write") -> None:
+        collection_path = write.reference._collection_path
+        stored_collection = self._collections.get(collection_path)
+
+        if stored_collection is None:
+            if write.kind == "delete":
+                return
+            stored_collection = self._collections[collection_path] = _StoredCollection()
+            parent_path, _, name = collection_path.rpartition("/")
+            self._collection_names.setdefault(parent_path, set()).add(name)
+
+        if write.kind == "delete":
+            stored_collection.delete(write.reference.id)
+        elif write.kind == "update":
+            stored_collection.put(write.reference.id, {**stored_collection.documents[write.reference.id], **write.data})
+        elif write.kind == "merge":
+            existing = stored_collection.documents.get(write.reference.id, {})
+            stored_collection.put(write.reference.id, _merge_fields(existing, write.data))
+        else:
+            stored_collection.put(write.reference.id, dict(write.data))
+
+    def _create_document_id(self) -> str:
+        with self._stats_lock:
+            return "".join(self._random.choices(string.ascii_letters + string.digits, k=20))
+
+
+class _StoredCollection:
+    """
+    Documents of a collection with their ids kept in sorted order, so that queries in document name
+    order, such as keys-only pages, find their cursor by bisection rather than scanning. Deleted ids
+    stay in the sorted list until a query passes them, so that deletes do not shift the whole list.
+    """
+
+    def __init__(self):
+        self.documents: dict[str, dict] = {}
+        self.sorted_ids: list[str] = []
+        self.deleted_ids: set[str] = set()
+        self.is_sorted = True
+
+    def put(self, document_id: str, data: dict) -> None:
+        if document_id not in self.documents:
+            if document_id in self.deleted_ids:
+                self.deleted_ids.discard(document_id)
+            else:
+                if self.sorted_ids and document_id < self.sorted_ids[-1]:
+                    self.is_sorted = False
+                self.sorted_ids.append(document_id)
+
+        self.documents[document_id] = data
+
+    def delete(self, document_id: str) -> None:
+        if self.documents.pop(document_id, None) is not None:
+            self.deleted_ids.add(document_id)
+
+    def iter_in_name_order(self, after_id: str | None) -> Iterator[tuple[str, dict]]:
+        """
+        Yields the documents after a document id in name order, removing deleted ids as they are passed.
+        """
+        if not self.is_sorted:
+            self.sorted_ids.sort()
+            self.is_sorted = True
+
+        sorted_ids = self.sorted_ids
+        index = bisect_right(sorted_ids, after_id) if after_id is not None else 0
+
+        while index < len(sorted_ids):
+            data = self.documents.get(sorted_ids[index])
+
+            if data is None:
+                end = index
+                while end < len(sorted_ids) and sorted_ids[end] not in self.documents:
+                    self.deleted_ids.discard(sorted_ids[end])
+                    end += 1
+                del sorted_ids[index:end]
+                continue
+
+            yield sorted_ids[index], data
+            index += 1
+
+
+@dataclass
+class _Write:
+    kind: str
+    reference: "LocalDocumentReference"
+    data: dict | None
+    size_bytes: int
+
+
+@dataclass
+class LocalWriteResult:
+    update_time: datetime
+
+
+@dataclass
+class LocalAggregationResult:
+    alias: str
+    value: int
+
+
+class LocalDocumentSnapshot:
+    def __init__(
+        self,
+        reference: "LocalDocumentReference",
+        data: dict | None,
+        field_paths: list[str] | None = None,
+    ):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+        self._field_paths = field_paths
+
+    def to_dict(self) -> dict | None:
+        if self._data is None:
+            return None
+        if self._field_paths is None:
+            return dict(self._data)
+
+        selected = {}
+        for field_path in self._field_paths:
+            value = _get_field(self._data, field_path)
+            if value is not _MISSING:
+                selected[field_path] = value
+
+        return selected
+
+    def get(self, field_path: str) -> Any:
+        value = _get_field(self.to_dict() or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+
+        return value
+
+
+class LocalDocumentReference:
+    def __init__(self, client: LocalFirestoreClient, collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+        self.path = f"{collection_path}/{document_id}"
+
+    @property
+    def parent(self) -> "LocalCollectionReference":
+        return LocalCollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id: str) -> "LocalCollectionReference":
+        return LocalCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def collections(self, **_) -> list["LocalCollectionReference"]:
+        return self._client._list_collections(self.path)
+
+    def get(self, field_paths: list[str] | None = None, transaction=None, **_) -> LocalDocumentSnapshot:
+        data = self._client._get_document(self._collection_path, self.id)
+        self._client.simulate_call("get", get_write_size_bytes(self.path, data))
+
+        if transaction is not None:
+            transaction._read_documents[(self._collection_path, self.id)] = data
+
+        return LocalDocumentSnapshot(self, data, field_paths)
+
+    def set(self, document_data: dict, merge: bool = False, **_) -> LocalWriteResult:
+        return self._client._commit_writes([_create_write("merge" if merge else "set", self, document_data)])[0]
+
+    def create(self, document_data: dict, **_) -> LocalWriteResult:
+        return self._client._commit_writes([_create_write("create", self, document_data)])[0]
+
+    def update(self, field_updates: dict, **_) -> LocalWriteResult:
+        return self._client._commit_writes([_create_write("update", self, field_updates)])[0]
+
+    def delete(self, **_) -> datetime:
+        self._client._commit_writes([_create_write("delete", self, None)])
+        return datetime.now(timezone.utc)
+
+
+class LocalQuery:
+    def __init__(
+        self,
+        client: LocalFirestoreClient,
+        collection_path: str,
+        filters: tuple = (),
+        orders: tuple = (),
+        limit_count: int | None = None,
+        cursor: tuple | None = None,
+        field_paths: list[str] | None = None,
+    ):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit_count = limit_count
+        self._cursor = cursor
+        self._field_paths = field_paths
+
+    def where(
+        self, field_path: str | None = None, op_string: str | None = None, value: Any = None, *, filter=None
+    ) -> "LocalQuery":
+        """
+        Filters the query on a field, given either as arguments or as a FieldFilter.
+        """
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+
+        return self._copy(filters=self._filters + ((field_path, _FILTER_OPERATORS[op_string], value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "LocalQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "LocalQuery":
+        return self._copy(limit_count=count)
+
+    def select(self, field_paths: list[str]) -> "LocalQuery":
+        return self._copy(field_paths=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot) -> "LocalQuery":
+        """
+        Starts the query after a snapshot, or after a dict of the values of its order_by fields.
+        """
+        if isinstance(document_fields_or_snapshot, LocalDocumentSnapshot):
+            cursor = (document_fields_or_snapshot.id, document_fields_or_snapshot._data or {})
+        else:
+            cursor = (document_fields_or_snapshot.get(DOCUMENT_NAME), document_fields_or_snapshot)
+
+        return self._copy(cursor=cursor)
+
+    def count(self, alias: str | None = None) -> "LocalAggregationQuery":
+        return LocalAggregationQuery(self, alias or "count")
+
+    def stream(self, transaction=None, **_) -> Iterator[LocalDocumentSnapshot]:
+        matches = self._run_query()
+
+        if transaction is not None:
+            for document_id, data in matches:
+                transaction._read_documents[(self._collection_path, document_id)] = data
+
+        snapshots = [
+            LocalDocumentSnapshot(
+                LocalDocumentReference(self._client, self._collection_path, document_id), data, self._field_paths
+            )
+            for document_id, data in matches
+        ]
+        self._client.simulate_call(
+            "query",
+            sum(get_write_size_bytes(snapshot.reference.path, snapshot.to_dict()) for snapshot in snapshots),
+        )
+
+        return iter(snapshots)
+
+    def get(self, transaction=None, **_) -> list[LocalDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+    def _run_query(self) -> list[tuple[str, dict]]:
+        """
+        Finds the documents matching the query. Queries in document name order read the collection's
+        sorted ids from the cursor, and stop once the limit is reached.
+        """
+        limit_count = self._limit_count
+        matches = []
+
+        with self._client._lock:
+            stored_collection = self._client._collections.get(self._collection_path)
+            if stored_collection is None:
+                return matches
+
+            if all(field_path == DOCUMENT_NAME and direction == ASCENDING for field_path, direction in self._orders):
+                after_id = self._cursor[0] if self._cursor else None
+
+                for document_id, data in stored_collection.iter_in_name_order(after_id):
+                    if limit_count is not None and len(matches) >= limit_count:
+                        break
+                    if self._is_match(data):
+                        matches.append((document_id, data))
+
+                return matches
+
+            for document_id, data in stored_collection.documents.items():
+                if self._is_match(data) and all(
+                    field_path == DOCUMENT_NAME or _get_field(data, field_path) is not _MISSING
+                    for field_path, _ in self._orders
+                ):
+                    matches.append((document_id, data))
+
+        matches.sort(key=lambda match: self._get_order_key(*match))
+
+        if self._cursor:
+            cursor_key = self._get_order_key(*self._cursor)
+            matches = [match for match in matches if self._get_order_key(*match) > cursor_key]
+
+        return matches if limit_count is None else matches[:limit_count]
+
+    def _is_match(self, data: dict) -> bool:
+        for field_path, compare, value in self._filters:
+            field_value = _get_field(data, field_path)
+            if field_value is _MISSING or not compare(field_value, value):
+                return False
+
+        return True
+
+    def _get_order_key(self, document_id: str, data: dict) -> tuple:
+        last_direction = self._orders[-1][1] if self._orders else ASCENDING
+        key = [
+            _order_value(document_id if field_path == DOCUMENT_NAME else _get_field(data, field_path), direction)
+            for field_path, direction in self._orders
+        ]
+        key.append(_order_value(document_id, last_direction))
+
+        return tuple(key)
+
+    def _copy(self, **changes) -> "LocalQuery":
+        attributes = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit_count": self._limit_count,
+            "cursor": self._cursor,
+            "field_paths": self._field_paths,
+        }
+        attributes.update(changes)
+
+        return LocalQuery(self._client, self._collection_path, **attributes)
+
+
+class LocalCollectionReference(LocalQuery):
+    def __init__(self, client: LocalFirestoreClient, path: str):
+        super().__init__(client, path)
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> LocalDocumentReference | None:
+        if "/" not in self.path:
+            return None
+
+        collection_path, document_id, _ = self.path.rsplit("/", 2)
+        return LocalDocumentReference(self._client, collection_path, document_id)
+
+    def document(self, document_id: str | None = None) -> LocalDocumentReference:
+        return LocalDocumentReference(self._client, self.path, document_id or self._client._create_document_id())
+
+
+class LocalAggregationQuery:
+    def __init__(self, query: LocalQuery, alias: str):
+        self._query = query
+        self._alias = alias
+
+    def get(self, transaction=None, **_) -> list[list[LocalAggregationResult]]:
+        # Counted on the server, so only the result is sent back whatever the limit of the query
+        count = len(self._query._run_query())
+        self._query._client.simulate_call("count", len(self._alias) + 8)
+
+        return [[LocalAggregationResult(self._alias, count)]]
+
+
+class LocalWriteBatch:
+    def __init__(self, client: LocalFirestoreClient):
+        self._client = client
+        self._writes: list[_Write] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, reference: LocalDocumentReference, document_data: dict, merge: bool = False) -> None:
+        self._writes.append(_create_write("merge" if merge else "set", reference, document_data))
+
+    def create(self, reference: LocalDocumentReference, document_data: dict) -> None:
+        self._writes.append(_create_write("create", reference, document_data))
+
+    def update(self, reference: LocalDocumentReference, field_updates: dict) -> None:
+        self._writes.append(_create_write("update", reference, field_updates))
+
+    def delete(self, reference: LocalDocumentReference, **_) -> None:
+        self._writes.append(_create_write("delete", reference, None))
+
+    def commit(self, **_) -> list[LocalWriteResult]:
+        writes, self._writes = self._writes, []
+        return self._client._commit_writes(writes)
+
+
+class LocalTransaction(LocalWriteBatch):
+    """
+    Stand-in for a Firestore transaction that works with the real firestore.transactional decorator,
+    which begins, commits, retries and rolls back the transaction through its underscored members.
+    Writes are buffered and committed atomically, and the commit is aborted if a document the transaction
+    read has been written since, so that the decorator retries it with fresh reads. Contention is resolved
+    optimistically rather than by Firestore's locks, but a read-modify-write is never lost either way.
+    """
+
+    def __init__(self, client: LocalFirestoreClient, max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_documents: dict[tuple[str, str], dict | None] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._read_documents = {}
+        self._id = None
+
+    def _begin(self, retry_id: bytes | None = None) -> None:
+        self._client.simulate_call("begin_transaction")
+        self._id = str(next(self._client._transaction_ids)).encode()
+
+    def commit(self, **_) -> list[LocalWriteResult]:
+        writes, self._writes = self._writes, []
+        return self._client._commit_writes(writes, self._read_documents)
+
+    def _commit(self) -> list[LocalWriteResult]:
+        try:
+            return self.commit()
+        finally:
+            self._id = None
+
+    def _rollback(self) -> None:
+        try:
+            self._client.simulate_call("rollback")
+        finally:
+            self._clean_up()
+
+
+def _create_write(kind: str, reference: LocalDocumentReference, data: dict | None) -> _Write:
+    return _Write(kind, reference, data, get_write_size_bytes(reference.path, data))
+
+
+def _merge_fields(existing: dict, updates: dict) -> dict:
+    """
+    Merges fields into a document, merging nested maps as Firestore does for a set with merge.
+    """
+    merged = dict(existing)
+
+    for field, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(field), dict):
+            merged[field] = _merge_fields(merged[field], value)
+        else:
+            merged[field] = value
+
+    return merged
+
+
+def _get_field(data: dict, field_path: str) -> Any:
+    value = data
+    for field in field_path.split("."):
+        if not isinstance(value, dict) or field not in value:
+            return _MISSING
+        value = value[field]
+
+    return value
+
+
+def _order_value(value: Any, direction: str) -> Any:
+    return _Descending(value) if direction == DESCENDING else value
+
+
+@functools.total_ordering
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other: "_Descending") -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
@@ -0,0 +1,144 @@
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from google.api_core import exceptions
+
+from .call_profile import CallProfile, LocalService
+
+DEFAULT_MAX_MESSAGES = 100
+DEFAULT_MAX_BYTES = 1000 * 1000
+DEFAULT_MAX_LATENCY = 0.01
+
+
+@dataclass
+class LocalTopic:
+    name: str
+
+
+@dataclass
+class _PendingBatch:
+    messages: list[tuple[Future, bytes]] = field(default_factory=list)
+    size_bytes: int = 0
+
+
+class LocalPublisherClient(LocalService):
+    """
+    In-process stand-in for the Pub/Sub publisher client. Messages are batched per topic as the real
+    client batches them, using the max_messages, max_bytes and max_latency of the batch settings given,
+    and each batch is sent as one simulated "publish" call on a worker thread, resolving the futures of
+    its messages once it is done. Topics are checked and created with "get_topic" and "create_topic" calls.
+    Delivered messages are kept by topic in published_messages.
+    """
+
+    def __init__(
+        self,
+        batch_settings=None,
+        profiles: dict[str, CallProfile] | None = None,
+        default_profile: CallProfile | None = None,
+        seed: int = 0,
+        topics: list[str] | None = None,
+        max_concurrent_batches: int = 10,
+    ):
+        super().__init__(profiles, default_profile, seed)
+        self.max_messages = getattr(batch_settings, "max_messages", DEFAULT_MAX_MESSAGES)
+        self.max_bytes = getattr(batch_settings, "max_bytes", DEFAULT_MAX_BYTES)
+        self.max_latency = getattr(batch_settings, "max_latency", DEFAULT_MAX_LATENCY)
+        self.topics = set(topics or [])
+        self.published_messages: dict[str, list[bytes]] = {}
+        self._lock = threading.Lock()
+        self._pending_batches: dict[str, _PendingBatch] = {}
+        self._message_ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="local-publisher")
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def get_topic(self, request: dict | None = None, *, topic: str | None = None, **_) -> LocalTopic:
+        topic_path = request["topic"] if request else topic
+        self.simulate_call("get_topic")
+
+        if topic_path not in self.topics:
+            raise exceptions.NotFound(f"Topic not found: {topic_path}")
+
+        return LocalTopic(topic_path)
+
+    def create_topic(self, request: dict | None = None, *, name: str | None = None, **_) -> LocalTopic:
+        topic_path = request["name"] if request else name
+        self.simulate_call("create_topic")
+
+        with self._lock:
+            if topic_path in self.topics:
+                raise exceptions.AlreadyExists(f"Topic already exists: {topic_path}")
+            self.topics.add(topic_path)
+
+        return LocalTopic(topic_path)
+
+    def publish(self, topic: str, data: bytes, **_) -> Future:
+        """
+        Adds a message to the pending batch of its topic, sending the batch once it is full or once
+        max_latency has passed since its first message.
+        """
+        publish_future = Future()
+
+        with self._lock:
+            pending_batch = self._pending_batches.get(topic)
+            if pending_batch is None:
+                pending_batch = self._pending_batches[topic] = _PendingBatch()
+                timer = threading.Timer(self.max_latency, self._send_pending_batch, args=(topic, pending_batch))
+                timer.daemon = True
+                timer.start()
+
+            pending_batch.messages.append((publish_future, data))
+            pending_batch.size_bytes += len(data)
+
+            is_full = len(pending_batch.messages) >= self.max_messages or pending_batch.size_bytes >= self.max_bytes
+
+        if is_full:
+            self._send_pending_batch(topic, pending_batch)
+
+        return publish_future
+
+    def stop(self) -> None:
+        """
+        Sends every pending batch and waits for them to be delivered.
+        """
+        with self._lock:
+            pending_batches = list(self._pending_batches.items())
+
+        for topic, pending_batch in pending_batches:
+            self._send_pending_batch(topic, pending_batch)
+
+        self._executor.shutdown(wait=True)
+
+    def _send_pending_batch(self, topic: str, pending_batch: _PendingBatch) -> None:
+        """
+        Sends a batch if it is still pending, as it may already have been sent by the other of its timer
+        and the publish that filled it.
+        """
+        with self._lock:
+            if self._pending_batches.get(topic) is not pending_batch:
+                return
+            del self._pending_batches[topic]
+
+        self._executor.submit(self._send_batch, topic, pending_batch)
+
+    def _send_batch(self, topic: str, pending_batch: _PendingBatch) -> None:
+        try:
+            self.simulate_call("publish", pending_batch.size_bytes)
+
+            if topic not in self.topics:
+                raise exceptions.NotFound(f"Topic not found: {topic}")
+        except Exception as exc:
+            for publish_future, _ in pending_batch.messages:
+                publish_future.set_exception(exc)
+            return
+
+        with self._lock:
+            self.published_messages.setdefault(topic, []).extend(data for _, data in pending_batch.messages)
+            message_ids = [str(next(self._message_ids)) for _ in pending_batch.messages]
+
+        for (publish_future, _), message_id in zip(pending_batch.messages, message_ids):
+            publish_future.set_result(message_id)
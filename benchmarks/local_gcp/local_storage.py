@@ -0,0 +1,249 @@
+import gzip
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator
+
+from google.api_core import exceptions
+from google.cloud.storage.fileio import BlobReader
+
+from .call_profile import CallProfile, LocalService
+
+LIST_PAGE_SIZE = 1000
+
+
+@dataclass
+class _StoredObject:
+    data: bytes
+    generation: int
+    updated: datetime
+    content_type: str | None
+    content_encoding: str | None
+
+
+class LocalStorageClient(LocalService):
+    """
+    In-process stand-in for the Cloud Storage client, holding buckets and their files in memory. It covers
+    the surface the functions use: getting buckets, listing, reading, downloading byte ranges of and deleting
+    blobs, along with uploads so that files can be put in place before a run.
+
+    Calls are simulated per round trip under these operations: "get_bucket", "get_blob" for the metadata of
+    a blob, "list_blobs" for each page listed, "download" for each request of a whole file or range of one,
+    "upload" and "delete". Files stored with a gzip content encoding are decompressed when downloaded,
+    unless a raw download is asked for, as Cloud Storage does.
+    """
+
+    def __init__(
+        self,
+        project: str = "local",
+        profiles: dict[str, CallProfile] | None = None,
+        default_profile: CallProfile | None = None,
+        seed: int = 0,
+        list_page_size: int = LIST_PAGE_SIZE,
+    ):
+        super().__init__(profiles, default_profile, seed)
+        self.project = project
+        self.list_page_size = list_page_size
+        self._lock = threading.Lock()
+        self._buckets: dict[str, dict[str, _StoredObject]] = {}
+        self._generations = itertools.count(1)
+
+    def create_bucket(self, bucket_name: str) -> "LocalBucket":
+        with self._lock:
+            if bucket_name in self._buckets:
+                raise exceptions.Conflict(f"Bucket {bucket_name} already exists.")
+            self._buckets[bucket_name] = {}
+
+        return LocalBucket(self, bucket_name)
+
+    def bucket(self, bucket_name: str) -> "LocalBucket":
+        return LocalBucket(self, bucket_name)
+
+    def get_bucket(self, bucket_or_name, **_) -> "LocalBucket":
+        bucket_name = getattr(bucket_or_name, "name", bucket_or_name)
+        self.simulate_call("get_bucket")
+
+        with self._lock:
+            if bucket_name not in self._buckets:
+                raise exceptions.NotFound(f"Bucket {bucket_name} not found.")
+
+        return LocalBucket(self, bucket_name)
+
+    def _get_objects(self, bucket_name: str) -> dict[str, _StoredObject]:
+        objects = self._buckets.get(bucket_name)
+        if objects is None:
+            raise exceptions.NotFound(f"Bucket {bucket_name} not found.")
+
+        return objects
+
+    def _get_object(self, bucket_name: str, blob_name: str) -> _StoredObject:
+        with self._lock:
+            stored_object = self._get_objects(bucket_name).get(blob_name)
+
+        if stored_object is None:
+            raise exceptions.NotFound(f"No such object: {bucket_name}/{blob_name}")
+
+        return stored_object
+
+
+class LocalBucket:
+    def __init__(self, client: LocalStorageClient, name: str):
+        self.client = client
+        self.name = name
+
+    def blob(self, blob_name: str, chunk_size: int | None = None) -> "LocalBlob":
+        return LocalBlob(blob_name, self, chunk_size)
+
+    def get_blob(self, blob_name: str, **_) -> "LocalBlob | None":
+        self.client.simulate_call("get_blob")
+
+        with self.client._lock:
+            stored_object = self.client._get_objects(self.name).get(blob_name)
+
+        return None if stored_object is None else LocalBlob(blob_name, self, stored_object=stored_object)
+
+    def list_blobs(self, prefix: str | None = None, max_results: int | None = None, **_) -> Iterator["LocalBlob"]:
+        """
+        Lists the blobs in name order, simulating a call for each page as it is reached.
+        """
+        with self.client._lock:
+            listed = sorted(
+                (blob_name, stored_object)
+                for blob_name, stored_object in self.client._get_objects(self.name).items()
+                if prefix is None or blob_name.startswith(prefix)
+            )[:max_results]
+
+        for page_start in range(0, max(len(listed), 1), self.client.list_page_size):
+            page = listed[page_start:page_start + self.client.list_page_size]
+            self.client.simulate_call("list_blobs", sum(len(blob_name) for blob_name, _ in page))
+
+            for blob_name, stored_object in page:
+                yield LocalBlob(blob_name, self, stored_object=stored_object)
+
+
+class LocalBlob:
+    """
+    Stand-in for a blob. As with a real blob, one made with bucket.blob has no metadata until it is
+    reloaded or uploaded, while one from get_blob or list_blobs has the metadata of when it was fetched.
+    Reads through open use the real BlobReader, so they download a chunk at a time as they would from
+    Cloud Storage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        bucket: LocalBucket,
+        chunk_size: int | None = None,
+        stored_object: _StoredObject | None = None,
+    ):
+        self.name = name
+        self.bucket = bucket
+        self.chunk_size = chunk_size
+        self.content_type = None
+        self.content_encoding = None
+        self.size = None
+        self.generation = None
+        self.updated = None
+
+        if stored_object is not None:
+            self._set_metadata(stored_object)
+
+    def reload(self, **_) -> None:
+        self.bucket.client.simulate_call("get_blob")
+        self._set_metadata(self.bucket.client._get_object(self.bucket.name, self.name))
+
+    def exists(self, **_) -> bool:
+        self.bucket.client.simulate_call("get_blob")
+
+        try:
+            self.bucket.client._get_object(self.bucket.name, self.name)
+        except exceptions.NotFound:
+            return False
+
+        return True
+
+    def download_as_bytes(
+        self,
+        start: int | None = None,
+        end: int | None = None,
+        raw_download: bool = False,
+        if_generation_match: int | None = None,
+        **_,
+    ) -> bytes:
+        """
+        Downloads the file, or the range of it from start up to and including end.
+        """
+        stored_object = self.bucket.client._get_object(self.bucket.name, self.name)
+
+        if if_generation_match is not None and stored_object.generation != if_generation_match:
+            self.bucket.client.simulate_call("download")
+            raise exceptions.PreconditionFailed(f"Generation of {self.name} does not match {if_generation_match}.")
+
+        data = stored_object.data
+        if stored_object.content_encoding == "gzip" and not raw_download:
+            # Decompressive transcoding serves the whole file, whatever range is asked for
+            data = gzip.decompress(data)
+        elif start is not None or end is not None:
+            if start is not None and 0 < len(data) <= start:
+                self.bucket.client.simulate_call("download")
+                raise exceptions.RequestRangeNotSatisfiable(f"Range starting at {start} is beyond {self.name}.")
+            data = data[start or 0:None if end is None else end + 1]
+
+        self.bucket.client.simulate_call("download", len(data))
+
+        return data
+
+    def download_as_string(self, **kwargs) -> bytes:
+        return self.download_as_bytes(**kwargs)
+
+    def download_as_text(self, encoding: str = "utf-8", **kwargs) -> str:
+        return self.download_as_bytes(**kwargs).decode(encoding)
+
+    def download_to_file(self, file_obj: BinaryIO, **kwargs) -> None:
+        file_obj.write(self.download_as_bytes(**kwargs))
+
+    def open(self, mode: str = "rb", chunk_size: int | None = None, **kwargs) -> BlobReader:
+        if mode != "rb":
+            raise NotImplementedError("Only binary reads are supported by the local stand-in.")
+
+        return BlobReader(self, chunk_size=chunk_size, **kwargs)
+
+    def upload_from_string(self, data: bytes | str, content_type: str | None = None, **_) -> None:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        self.bucket.client.simulate_call("upload", len(data))
+
+        with self.bucket.client._lock:
+            stored_object = _StoredObject(
+                data=data,
+                generation=next(self.bucket.client._generations),
+                updated=datetime.now(timezone.utc),
+                content_type=content_type or self.content_type,
+                content_encoding=self.content_encoding,
+            )
+            self.bucket.client._get_objects(self.bucket.name)[self.name] = stored_object
+
+        self._set_metadata(stored_object)
+
+    def upload_from_file(self, file_obj: BinaryIO, content_type: str | None = None, **kwargs) -> None:
+        self.upload_from_string(file_obj.read(), content_type=content_type, **kwargs)
+
+    def upload_from_filename(self, filename: str, content_type: str | None = None, **kwargs) -> None:
+        with open(filename, "rb") as file_obj:
+            self.upload_from_file(file_obj, content_type=content_type, **kwargs)
+
+    def delete(self, **_) -> None:
+        self.bucket.client.simulate_call("delete")
+
+        with self.bucket.client._lock:
+            if self.bucket.client._get_objects(self.bucket.name).pop(self.name, None) is None:
+                raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+
+    def _set_metadata(self, stored_object: _StoredObject) -> None:
+        self.size = len(stored_object.data)
+        self.generation = stored_object.generation
+        self.updated = stored_object.updated
+        self.content_type = stored_object.content_type
+        self.content_encoding = stored_object.content_encoding
@@ -0,0 +1,246 @@
+"""
+Measures the cold start of each Cloud Function in this repository, so that it can be tracked over time.
+
+For every function, in fresh interpreters run from its src directory:
+
+1. Import time: `python -X importtime -c "import main"` is run, reporting the cumulative import
+   time of main and the modules that took the longest to import themselves.
+2. Time to first response: main is loaded through functions_framework's create_app and a single
+   request is sent with its test client, reporting the time from interpreter start up to response.
+
+The import time needs no credentials. The first response goes to whichever backends the environment
+points at, either a GCP project or the Firestore, Pub/Sub and Cloud Storage emulators. Its status is
+recorded with the time, so a request that fails still measures the start up before it. The locust
+logger is sent a file that is not the results file, so it responds without any network calls.
+
+Run from the repository root:
+
+    python benchmarks/startup_benchmark.py [function ...] [--runs N] [--output results.jsonl]
+
+With --output, one JSON record per run of the benchmark is appended to the file, with the git commit
+it was run against, so that results can be compared between commits.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLOWEST_IMPORT_COUNT = 10
+
+
+@dataclass
+class FunctionUnderTest:
+    directory: str
+    target: str
+    signature_type: str
+    request: dict
+
+
+FUNCTIONS = {
+    "create-dataset": FunctionUnderTest(
+        directory="create-dataset",
+        target="create_dataset",
+        signature_type="http",
+        request={"method": "POST", "path": "/"},
+    ),
+    "delete-datasets": FunctionUnderTest(
+        directory="delete-datasets",
+        target="delete_dataset",
+        signature_type="http",
+        request={"method": "POST", "path": "/"},
+    ),
+    "publish-schema": FunctionUnderTest(
+        directory="publish-schema",
+        target="publish_schema",
+        signature_type="cloudevent",
+        request={
+            "type": "google.cloud.pubsub.topic.v1.messagePublished",
+            "data": {
+                "message": {
+                    "data": os.environ.get(
+                        "BENCHMARK_SCHEMA_PATH", "c2NoZW1hcy9iZW5jaG1hcmsvdjEuanNvbg=="
+                    )
+                }
+            },
+        },
+    ),
+    "locust-logger": FunctionUnderTest(
+        directory="locust-logger",
+        target="log_locust_results",
+        signature_type="cloudevent",
+        request={
+            "type": "google.cloud.storage.object.v1.finalized",
+            "data": {"name": "benchmark/not_the_results_file.csv"},
+        },
+    ),
+}
+
+# Run in a fresh interpreter from the function's src directory. The start time is taken
+# by the parent just before the process is started and passed in, so that interpreter
+# start up is included in the time to first response.
+FIRST_RESPONSE_SCRIPT = """
+import json, sys, time
+started_at = float(sys.argv[1])
+function = json.loads(sys.argv[2])
+import functions_framework
+app = functions_framework.create_app(
+    target=function["target"], source="main.py", signature_type=function["signature_type"]
+)
+client = app.test_client()
+request = function["request"]
+if function["signature_type"] == "http":
+    response = client.open(request["path"], method=request["method"])
+else:
+    response = client.post(
+        "/",
+        json=request["data"],
+        headers={
+            "ce-id": "startup-benchmark",
+            "ce-source": "startup-benchmark",
+            "ce-specversion": "1.0",
+            "ce-type": request["type"],
+        },
+    )
+print(json.dumps({"seconds": time.time() - started_at, "status": response.status_code}))
+"""
+
+
+def measure_import_time(function: FunctionUnderTest) -> dict:
+    """
+    Imports main with -X importtime and returns its cumulative import time along with
+    the modules that took longest to import themselves.
+
+    Parameters:
+    function (FunctionUnderTest): the function whose main is imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=_get_source_directory(function),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing main failed: {result.stderr.strip().splitlines()[-1]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+
+    main_cumulative_us = next(cumulative_us for module, _, cumulative_us in imports if module == "main")
+    slowest_imports = sorted(imports, key=lambda entry: entry[1], reverse=True)[:SLOWEST_IMPORT_COUNT]
+
+    return {
+        "import_seconds": main_cumulative_us / 1_000_000,
+        "slowest_imports": [
+            {"module": module, "self_seconds": self_us / 1_000_000} for module, self_us, _ in slowest_imports
+        ],
+    }
+
+
+def measure_first_response(function: FunctionUnderTest) -> dict:
+    """
+    Starts a fresh interpreter, loads the function through functions_framework and sends it
+    a single request, returning the time taken to respond and the response status.
+
+    Parameters:
+    function (FunctionUnderTest): the function the request is sent to
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            FIRST_RESPONSE_SCRIPT,
+            str(time.time()),
+            json.dumps(function.__dict__),
+        ],
+        cwd=_get_source_directory(function),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Sending the first request failed: {result.stderr.strip().splitlines()[-1]}")
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_function(function: FunctionUnderTest, runs: int) -> dict:
+    """
+    Measures the import time and time to first response of a function over a number of runs,
+    reporting the median of each.
+
+    Parameters:
+    function (FunctionUnderTest): the function to benchmark
+    runs (int): the number of cold starts measured
+    """
+    try:
+        import_times = [measure_import_time(function) for _ in range(runs)]
+        first_responses = [measure_first_response(function) for _ in range(runs)]
+    except RuntimeError as exc:
+        return {"error": str(exc)}
+
+    return {
+        "import_seconds": statistics.median(entry["import_seconds"] for entry in import_times),
+        "slowest_imports": import_times[-1]["slowest_imports"],
+        "first_response_seconds": statistics.median(entry["seconds"] for entry in first_responses),
+        "first_response_status": first_responses[-1]["status"],
+    }
+
+
+def _get_source_directory(function: FunctionUnderTest) -> str:
+    return os.path.join(REPOSITORY_ROOT, function.directory, "src")
+
+
+def _get_git_commit() -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_ROOT, capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the cold start of each Cloud Function.")
+    parser.add_argument("functions", nargs="*", help=f"any of {', '.join(FUNCTIONS)}, all by default")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts measured per function")
+    parser.add_argument("--output", help="file a JSON record of the results is appended to")
+    args = parser.parse_args()
+
+    unknown_functions = set(args.functions) - set(FUNCTIONS)
+    if unknown_functions:
+        parser.error(f"unknown functions: {', '.join(sorted(unknown_functions))}")
+
+    results = {name: benchmark_function(FUNCTIONS[name], args.runs) for name in args.functions or FUNCTIONS}
+
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name}: {result['error']}")
+            continue
+
+        print(
+            f"{name}: import {result['import_seconds']:.3f}s, first response "
+            f"{result['first_response_seconds']:.3f}s (status {result['first_response_status']})"
+        )
+        for entry in result["slowest_imports"]:
+            print(f"    {entry['self_seconds']:.3f}s {entry['module']}")
+
+    if args.output:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _get_git_commit(),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "results": results,
+        }
+        with open(args.output, "a") as output_file:
+            output_file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures what creating Google Cloud clients lazily and reusing them saves create-dataset.
+
+Two things are measured against the project in the environment, so GCP credentials and the
+usual PROJECT_ID, FIRESTORE_DB_NAME, DATASET_BUCKET_NAME and PUBLISH_DATASET_TOPIC_ID
+settings are needed:
+
+1. Cold start: the time taken to import main in a fresh interpreter, which previously
+   included connecting to the dataset bucket and creating the Pub/Sub publisher.
+2. Per request: the set up a request performs before any dataset is processed, both with
+   the client registry cleared before every request, as when each request created its own
+   clients, and with the clients kept in the registry, as on a warm instance.
+
+Run from the create-dataset directory with `make benchmark`.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from config.config import config
+from repository.bucket_loader import bucket_loader
+from repository.client_registry import client_registry
+from services.dataset_bucket_service import DatasetBucketService
+from services.dataset_processor_service import DatasetProcessorService
+from services.publisher_service import publisher_service
+
+IMPORT_RUNS = int(os.environ.get("BENCHMARK_IMPORT_RUNS", "5"))
+REQUEST_RUNS = int(os.environ.get("BENCHMARK_REQUEST_RUNS", "10"))
+
+
+def measure_cold_import_seconds() -> float:
+    """
+    Imports main in a fresh interpreter and returns the time taken.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def perform_request_set_up() -> None:
+    """
+    Performs the set up create_dataset does for each request, touching each client once.
+    """
+    DatasetBucketService().try_fetch_oldest_filenames_from_bucket(1)
+    DatasetProcessorService().get_dataset_metadata_collection("benchmark", "benchmark")
+    publisher_service._verify_topic_exists(
+        publisher_service.publisher.topic_path(config.PROJECT_ID, config.PUBLISH_DATASET_TOPIC_ID)
+    )
+
+
+def measure_request_seconds(reuse_clients: bool) -> list[float]:
+    """
+    Times the set up of a number of requests, clearing the shared clients before each unless they are reused.
+
+    Parameters:
+    reuse_clients (bool): whether clients are kept across requests, as on a warm instance.
+    """
+    timings = []
+
+    for _ in range(REQUEST_RUNS):
+        if not reuse_clients:
+            client_registry._clients.clear()
+            bucket_loader.dataset_bucket = None
+            publisher_service.verified_topic_paths.clear()
+
+        start = time.perf_counter()
+        perform_request_set_up()
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main() -> None:
+    import_timings = [measure_cold_import_seconds() for _ in range(IMPORT_RUNS)]
+    print(f"Cold import of main: median {statistics.median(import_timings) * 1000:.1f} ms over {IMPORT_RUNS} runs")
+
+    fresh_timings = measure_request_seconds(reuse_clients=False)
+    # The first reused request creates the clients, so only the requests after it are warm
+    warm_timings = measure_request_seconds(reuse_clients=True)[1:]
+
+    fresh_median = statistics.median(fresh_timings)
+    warm_median = statistics.median(warm_timings)
+    print(f"Request set up with new clients: median {fresh_median * 1000:.1f} ms over {len(fresh_timings)} requests")
+    print(f"Request set up with reused clients: median {warm_median * 1000:.1f} ms over {len(warm_timings)} requests")
+    print(f"Saved per warm request: {(fresh_median - warm_median) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Generates synthetic create-dataset files, so that the ingest path can be benchmarked at any size.
+
+The same arguments always generate the same file: every unit's identifier comes from the identifier
+pattern and its index, and the size of its unit data is drawn from the payload size distribution
+by a random generator seeded with the seed given. Units are written as they are generated, so a
+file of any size is generated in constant memory.
+
+Payload sizes are given as one of:
+
+- fixed:<bytes>, every unit has the same size of unit data.
+- uniform:<min bytes>-<max bytes>, sizes are spread evenly between the two.
+- lognormal:<median bytes>,<sigma>, most units are close to the median with a long tail of larger units.
+
+Run from the create-dataset directory:
+
+    python benchmarks/dataset_generator.py <unit count> <output file> [--payload lognormal:512,0.5] [--seed N]
+
+A file ending in .ndjson is written as line-delimited JSON, and any other file as a JSON object.
+"""
+import argparse
+import json
+import math
+import random
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+DEFAULT_IDENTIFIER_PATTERN = "{index:011d}"
+DEFAULT_PAYLOAD = "lognormal:512,0.5"
+DEFAULT_SEED = 1
+# Each local unit is padded to this size, so that larger payloads are spread across many small fields
+LOCAL_UNIT_SIZE_BYTES = 128
+
+
+@dataclass
+class PayloadSizeDistribution:
+    kind: str
+    parameters: tuple[float, ...]
+
+    @classmethod
+    def from_string(cls, payload: str) -> "PayloadSizeDistribution":
+        """
+        Parses a distribution such as fixed:512, uniform:256-2048 or lognormal:512,0.5.
+
+        Parameters:
+        payload (str): the distribution and its parameters.
+        """
+        kind, _, parameters = payload.partition(":")
+        separator = "-" if kind == "uniform" else ","
+        expected_count = {"fixed": 1, "uniform": 2, "lognormal": 2}.get(kind)
+
+        try:
+            parsed_parameters = tuple(float(parameter) for parameter in parameters.split(separator))
+        except ValueError as exc:
+            raise ValueError(f"Invalid payload size distribution: {payload}") from exc
+
+        if expected_count is None or len(parsed_parameters) != expected_count:
+            raise ValueError(f"Invalid payload size distribution: {payload}")
+
+        return cls(kind, parsed_parameters)
+
+    def draw(self, generator: random.Random) -> int:
+        """
+        Draws the size in bytes of a unit's data.
+
+        Parameters:
+        generator (random.Random): the seeded random generator the size is drawn with.
+        """
+        if self.kind == "fixed":
+            size_bytes = self.parameters[0]
+        elif self.kind == "uniform":
+            size_bytes = generator.uniform(*self.parameters)
+        else:
+            median_bytes, sigma = self.parameters
+            size_bytes = generator.lognormvariate(math.log(median_bytes), sigma)
+
+        return max(int(size_bytes), 0)
+
+
+def generate_units(
+    unit_count: int,
+    payload_sizes: PayloadSizeDistribution,
+    identifier_pattern: str = DEFAULT_IDENTIFIER_PATTERN,
+    seed: int = DEFAULT_SEED,
+) -> Iterator[dict]:
+    """
+    Yields each synthetic unit with its identifier and unit data, in identifier order.
+
+    Parameters:
+    unit_count (int): the number of units generated.
+    payload_sizes (PayloadSizeDistribution): the distribution the size of each unit's data is drawn from.
+    identifier_pattern (str): format string the identifier is made from, given the index of the unit.
+    seed (int): seed of the random generator, so that the same units are generated every time.
+    """
+    generator = random.Random(seed)
+
+    for index in range(unit_count):
+        identifier = identifier_pattern.format(index=index)
+        size_bytes = payload_sizes.draw(generator)
+
+        unit_data = {
+            "ruref": identifier,
+            "runame": f"Synthetic unit {index}",
+            "local_units": [],
+        }
+        remaining_bytes = size_bytes - len(json.dumps(unit_data))
+
+        while remaining_bytes > 0:
+            padding_length = min(remaining_bytes, LOCAL_UNIT_SIZE_BYTES)
+            local_unit = {"luref": f"{len(unit_data['local_units']):04d}", "name": ""}
+            local_unit["name"] = "x" * max(padding_length - len(json.dumps(local_unit)) - 2, 0)
+            unit_data["local_units"].append(local_unit)
+            remaining_bytes -= padding_length
+
+        yield {"identifier": identifier, "unit_data": unit_data}
+
+
+def write_dataset_file(
+    file_obj: BinaryIO,
+    unit_count: int,
+    payload_sizes: PayloadSizeDistribution,
+    identifier_pattern: str = DEFAULT_IDENTIFIER_PATTERN,
+    seed: int = DEFAULT_SEED,
+    line_delimited: bool = False,
+) -> None:
+    """
+    Writes a synthetic create-dataset file, a unit at a time.
+
+    Parameters:
+    file_obj (BinaryIO): the file written to.
+    unit_count (int): the number of units in the dataset.
+    payload_sizes (PayloadSizeDistribution): the distribution the size of each unit's data is drawn from.
+    identifier_pattern (str): format string the identifier is made from, given the index of the unit.
+    seed (int): seed of the random generator, so that the same file is generated every time.
+    line_delimited (bool): whether the file is written as line-delimited JSON rather than a JSON object.
+    """
+    metadata = {
+        "survey_id": "benchmark",
+        "period_id": f"units-{unit_count}",
+        "form_types": ["0001"],
+        "title": f"Synthetic dataset of {unit_count} units",
+    }
+    units = generate_units(unit_count, payload_sizes, identifier_pattern, seed)
+
+    if line_delimited:
+        file_obj.write(json.dumps(metadata).encode("utf-8") + b"\n")
+        for unit in units:
+            file_obj.write(json.dumps(unit).encode("utf-8") + b"\n")
+        return
+
+    file_obj.write(json.dumps(metadata)[:-1].encode("utf-8") + b', "data": [')
+    for index, unit in enumerate(units):
+        file_obj.write((", " if index else "").encode("utf-8") + json.dumps(unit).encode("utf-8"))
+    file_obj.write(b"]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic create-dataset file.")
+    parser.add_argument("unit_count", type=int, help="number of units in the dataset")
+    parser.add_argument("output", help="file the dataset is written to, as line-delimited JSON if it ends in .ndjson")
+    parser.add_argument("--payload", default=DEFAULT_PAYLOAD, help="distribution of the size of each unit's data")
+    parser.add_argument("--identifier-pattern", default=DEFAULT_IDENTIFIER_PATTERN, help="format of each identifier")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="seed of the random generator")
+    args = parser.parse_args()
+
+    with open(args.output, "wb") as output_file:
+        write_dataset_file(
+            output_file,
+            args.unit_count,
+            PayloadSizeDistribution.from_string(args.payload),
+            args.identifier_pattern,
+            args.seed,
+            line_delimited=args.output.endswith(".ndjson"),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Measures create-dataset's ingest path end to end against the in-process stand-ins in benchmarks/local_gcp,
+so that throughput can be tracked without a project and batching and parallelism settings compared.
+
+For each dataset size, a synthetic create-dataset file is generated with dataset_generator.py, then in a
+fresh interpreter it is put in the stand-in dataset bucket and processed by one call of main.create_dataset.
+Each run records:
+
+1. The wall time of the call and the units written per second.
+2. The peak RSS of the interpreter, which includes the stand-in bucket and Firestore holding the dataset.
+3. The Firestore round trips made and the bytes serialised to Firestore, with the calls made to Cloud Storage
+   and Pub/Sub.
+4. The time spent in each stage, as logged by create-dataset.
+
+The function reads its settings from the environment as it does when deployed, so settings are compared by
+running the benchmark with them set, such as FIRESTORE_WRITE_CONCURRENCY=20 or STREAM_DATASET_FILE=True.
+The settings in effect are recorded with the results. The stand-ins respond instantly unless given latencies.
+
+Run from the create-dataset directory with `make ingest-benchmark`, or:
+
+    python benchmarks/ingest_benchmark.py [--sizes 1000,10000] [--firestore-latency 0.02] [--output results.jsonl]
+
+The 1,000,000 unit dataset needs several GB of memory, as every unit is held by the stand-in Firestore.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from dataset_generator import DEFAULT_PAYLOAD, DEFAULT_SEED, PayloadSizeDistribution, write_dataset_file
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(BENCHMARK_DIRECTORY), "src")
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIRECTORY))
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+
+
+def measure_ingest(dataset_path: str, firestore_latency: float, storage_latency: float, pubsub_latency: float) -> dict:
+    """
+    Processes a dataset file with main.create_dataset against the stand-ins, returning what was measured.
+    Run in a fresh interpreter for each dataset, so that the peak RSS is that of the one dataset.
+
+    Parameters:
+    dataset_path (str): the generated create-dataset file.
+    firestore_latency (float): latency of every Firestore call in seconds.
+    storage_latency (float): latency of every Cloud Storage call in seconds.
+    pubsub_latency (float): latency of every Pub/Sub call in seconds.
+    """
+    sys.path[:0] = [SOURCE_DIRECTORY, os.path.join(REPOSITORY_ROOT, "benchmarks")]
+
+    import resource
+
+    from config.config import config
+    from google.cloud.pubsub_v1 import types
+    from local_gcp import (
+        CallProfile,
+        LocalFirestoreClient,
+        LocalPublisherClient,
+        LocalStorageClient,
+        use_in_create_dataset,
+    )
+
+    firestore_client = LocalFirestoreClient(
+        project=config.PROJECT_ID, default_profile=CallProfile(latency_seconds=firestore_latency)
+    )
+    storage_client = LocalStorageClient(
+        project=config.PROJECT_ID, default_profile=CallProfile(latency_seconds=storage_latency)
+    )
+    publisher_client = LocalPublisherClient(
+        batch_settings=types.BatchSettings(
+            max_messages=config.PUBLISH_BATCH_MAX_MESSAGES,
+            max_bytes=config.PUBLISH_BATCH_MAX_BYTES,
+            max_latency=config.PUBLISH_BATCH_MAX_LATENCY,
+        ),
+        default_profile=CallProfile(latency_seconds=pubsub_latency),
+        topics=[LocalPublisherClient.topic_path(config.PROJECT_ID, config.PUBLISH_DATASET_TOPIC_ID)],
+    )
+
+    with open(dataset_path, "rb") as dataset_file:
+        storage_client.create_bucket(config.DATASET_BUCKET_NAME).blob(
+            os.path.basename(dataset_path)
+        ).upload_from_file(dataset_file)
+    storage_client.reset_stats()
+
+    use_in_create_dataset(firestore_client, storage_client, publisher_client)
+
+    import main
+    from services.stage_timing_service import stage_timing_service
+
+    start = time.perf_counter()
+    _, status, _ = main.create_dataset(None)
+    wall_seconds = time.perf_counter() - start
+
+    units_written = sum(
+        firestore_client.get_document_count(f"{dataset.reference.path}/units")
+        for dataset in firestore_client.collection("datasets").stream()
+    )
+    firestore_stats = firestore_client.get_stats()
+    peak_rss_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        # Reported in kilobytes on Linux, and in bytes on macOS
+        peak_rss_bytes *= 1024
+
+    return {
+        "status": status,
+        "wall_seconds": wall_seconds,
+        "units_written": units_written,
+        "units_per_second": units_written / wall_seconds,
+        "peak_rss_bytes": peak_rss_bytes,
+        "firestore_round_trips": sum(stats["calls"] for stats in firestore_stats.values()),
+        "firestore_bytes_serialised": firestore_stats.get("commit", {}).get("bytes", 0),
+        "firestore": firestore_stats,
+        "storage": storage_client.get_stats(),
+        "pubsub": publisher_client.get_stats(),
+        "stages": stage_timing_service._get_stage_summaries(),
+    }
+
+
+def run_ingest(dataset_path: str, args: argparse.Namespace) -> dict:
+    """
+    Measures the ingest of a dataset file in a fresh interpreter. The dataset bucket is only fetched
+    when CONF is not unit, so it is set to benchmark, and logging is kept to warnings unless LOG_LEVEL is set.
+
+    Parameters:
+    dataset_path (str): the generated create-dataset file.
+    args (argparse.Namespace): the benchmark arguments, with the latencies of each service.
+    """
+    environment = {**os.environ, "CONF": "benchmark"}
+    environment.setdefault("LOG_LEVEL", "WARNING")
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--measure",
+            dataset_path,
+            "--firestore-latency",
+            str(args.firestore_latency),
+            "--storage-latency",
+            str(args.storage_latency),
+            "--pubsub-latency",
+            str(args.pubsub_latency),
+        ],
+        cwd=SOURCE_DIRECTORY,
+        env=environment,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Ingest failed: {result.stderr.strip().splitlines()[-1]}")
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_size(unit_count: int, dataset_directory: str, args: argparse.Namespace) -> dict:
+    """
+    Generates a dataset of a number of units and measures its ingest over a number of runs,
+    reporting the median wall time and the measurements of the median run.
+
+    Parameters:
+    unit_count (int): the number of units in the dataset.
+    dataset_directory (str): the directory the dataset file is generated in.
+    args (argparse.Namespace): the benchmark arguments.
+    """
+    dataset_path = os.path.join(dataset_directory, f"benchmark-{unit_count}.{args.format}")
+
+    with open(dataset_path, "wb") as dataset_file:
+        write_dataset_file(
+            dataset_file,
+            unit_count,
+            PayloadSizeDistribution.from_string(args.payload),
+            seed=args.seed,
+            line_delimited=args.format == "ndjson",
+        )
+    file_bytes = os.path.getsize(dataset_path)
+
+    try:
+        runs = sorted((run_ingest(dataset_path, args) for _ in range(args.runs)), key=lambda run: run["wall_seconds"])
+    except RuntimeError as exc:
+        return {"error": str(exc)}
+    finally:
+        os.remove(dataset_path)
+
+    return {
+        "file_bytes": file_bytes,
+        "wall_seconds_runs": [run["wall_seconds"] for run in runs],
+        **runs[len(runs) // 2],
+        "wall_seconds": statistics.median(run["wall_seconds"] for run in runs),
+    }
+
+
+def _get_settings() -> dict:
+    """
+    Gets the function's settings, as read from the environment the benchmark was run in.
+    """
+    sys.path.insert(0, SOURCE_DIRECTORY)
+    from config.config import config
+
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def _get_git_commit() -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_ROOT, capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure create-dataset's ingest path against local stand-ins.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated unit counts of the datasets")
+    parser.add_argument("--runs", type=int, default=1, help="runs measured per dataset size")
+    parser.add_argument("--payload", default=DEFAULT_PAYLOAD, help="distribution of the size of each unit's data")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="seed the datasets are generated with")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json", help="format of the dataset file")
+    parser.add_argument("--firestore-latency", type=float, default=0.0, help="seconds each Firestore call takes")
+    parser.add_argument("--storage-latency", type=float, default=0.0, help="seconds each Cloud Storage call takes")
+    parser.add_argument("--pubsub-latency", type=float, default=0.0, help="seconds each Pub/Sub call takes")
+    parser.add_argument("--output", help="file a JSON record of the results is appended to")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(
+            json.dumps(
+                measure_ingest(args.measure, args.firestore_latency, args.storage_latency, args.pubsub_latency)
+            )
+        )
+        return
+
+    unit_counts = [int(size) for size in args.sizes.split(",")]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as dataset_directory:
+        for unit_count in unit_counts:
+            result = results[str(unit_count)] = benchmark_size(unit_count, dataset_directory, args)
+
+            if "error" in result:
+                print(f"{unit_count} units: {result['error']}")
+                continue
+
+            print(
+                f"{unit_count} units: {result['wall_seconds']:.2f}s, {result['units_per_second']:.0f} units/s, "
+                f"peak RSS {result['peak_rss_bytes'] / 1024 / 1024:.0f} MiB, "
+                f"{result['firestore_round_trips']} Firestore round trips, "
+                f"{result['firestore_bytes_serialised'] / 1024 / 1024:.1f} MiB serialised"
+            )
+
+    if args.output:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _get_git_commit(),
+            "python": sys.version.split()[0],
+            "arguments": {
+                name: value for name, value in vars(args).items() if name not in ("output", "measure")
+            },
+            "settings": _get_settings(),
+            "results": results,
+        }
+        with open(args.output, "a") as output_file:
+            output_file.write(json.dumps(record, default=str) + "\n")
+
+
+if __name__ == "__main__":
+    main()
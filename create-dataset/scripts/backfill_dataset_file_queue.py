@@ -0,0 +1,26 @@
+"""
+Adds the files already in the dataset bucket to the pending file queue, so that they are processed once
+USE_DATASET_FILE_QUEUE is switched on. Files uploaded after register_dataset_file is deployed are queued by it,
+so this is run once, straight after switching over. Entries are keyed by filename, so running it again is safe.
+
+Run from the create-dataset directory with `make backfill-file-queue`, with PROJECT_ID, FIRESTORE_DB_NAME and
+DATASET_BUCKET_NAME set for the project.
+"""
+from config.config import config
+from config.logging_config import logging
+from services.dataset_bucket_service import DatasetBucketService
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    if config.USE_DATASET_FILE_QUEUE is not True:
+        raise RuntimeError("USE_DATASET_FILE_QUEUE must be set to true to backfill the pending file queue.")
+
+    backfilled_count = DatasetBucketService().try_backfill_pending_files()
+
+    logger.info(f"Added {backfilled_count} files in bucket {config.DATASET_BUCKET_NAME} to the pending file queue.")
+
+
+if __name__ == "__main__":
+    main()
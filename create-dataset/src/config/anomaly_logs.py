@@ -0,0 +1,6 @@
+
+
+class AnomalyLogs:
+    ANOMALY_LOG_STAGE_DURATION = "Create-dataset stage duration exceeded threshold."
+
+anomaly_logs = AnomalyLogs()
@@ -1,4 +1,5 @@
-from config.config_helpers import get_value_from_env
+from config.config_helpers import get_enum_value_from_env, get_value_from_env
+from models.unit_count_mode import UnitCountMode
 
 
 class Config:
@@ -7,11 +8,28 @@ class Config:
     TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
     RESPONSE_TIME_ALERT_THRESHOLD = int(get_value_from_env("RESPONSE_TIME_ALERT_THRESHOLD", "1000"))
     DATABASE = get_value_from_env("FIRESTORE_DB_NAME", "ons-sds-sandbox-01-sds")
+    FIRESTORE_WRITE_CONCURRENCY = int(get_value_from_env("FIRESTORE_WRITE_CONCURRENCY", "10"))
+    UNIT_COUNT_MODE = get_enum_value_from_env("UNIT_COUNT_MODE", UnitCountMode, UnitCountMode.AGGREGATION)
     RETAIN_DATASET_FIRESTORE = get_value_from_env("RETAIN_DATASET_FIRESTORE", False)
     DATASET_BUCKET_NAME = get_value_from_env("DATASET_BUCKET_NAME", "ons-sds-sandbox-01-europe-west2-dataset")
     AUTODELETE_DATASET_BUCKET_FILE = get_value_from_env("AUTODELETE_DATASET_BUCKET_FILE", True)
+    USE_DATASET_FILE_QUEUE = get_value_from_env("USE_DATASET_FILE_QUEUE", False)
+    RESUMABLE_DATASET_INGEST = get_value_from_env("RESUMABLE_DATASET_INGEST", False)
+    DATASET_COMPLETION_MARGIN = int(get_value_from_env("DATASET_COMPLETION_MARGIN", "300"))
+    DRAIN_DATASET_FILES = get_value_from_env("DRAIN_DATASET_FILES", False)
+    DATASET_DRAIN_CONCURRENCY = int(get_value_from_env("DATASET_DRAIN_CONCURRENCY", "4"))
+    STREAM_DATASET_FILE = get_value_from_env("STREAM_DATASET_FILE", False)
+    DATASET_STREAM_CHUNK_SIZE = int(get_value_from_env("DATASET_STREAM_CHUNK_SIZE", "1048576"))
+    PARALLEL_BUCKET_DOWNLOAD = get_value_from_env("PARALLEL_BUCKET_DOWNLOAD", False)
+    BUCKET_DOWNLOAD_RANGE_SIZE = int(get_value_from_env("BUCKET_DOWNLOAD_RANGE_SIZE", "16777216"))
+    BUCKET_DOWNLOAD_CONCURRENCY = int(get_value_from_env("BUCKET_DOWNLOAD_CONCURRENCY", "8"))
+    DATASET_PARQUET_BATCH_SIZE = int(get_value_from_env("DATASET_PARQUET_BATCH_SIZE", "1000"))
     PUBLISH_DATASET_TOPIC_ID = get_value_from_env("PUBLISH_DATASET_TOPIC_ID", "ons-sds-publish-dataset")
     PUBLISH_DATASET_ERROR_TOPIC_ID = get_value_from_env("PUBLISH_DATASET_ERROR_TOPIC_ID", "ons-sds-publish-dataset-error")
+    PUBLISH_TOPIC_CACHE_TTL = int(get_value_from_env("PUBLISH_TOPIC_CACHE_TTL", "300"))
+    PUBLISH_BATCH_MAX_MESSAGES = int(get_value_from_env("PUBLISH_BATCH_MAX_MESSAGES", "100"))
+    PUBLISH_BATCH_MAX_BYTES = int(get_value_from_env("PUBLISH_BATCH_MAX_BYTES", "1000000"))
+    PUBLISH_BATCH_MAX_LATENCY = float(get_value_from_env("PUBLISH_BATCH_MAX_LATENCY", "0.01"))
     LOG_EXECUTION_ID = get_value_from_env("LOG_EXECUTION_ID", "False")
     LOG_LEVEL = get_value_from_env("LOG_LEVEL", "INFO")
     CONF = get_value_from_env("CONF", "sandbox")
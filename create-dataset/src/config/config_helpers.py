@@ -1,4 +1,8 @@
 import os
+from enum import Enum
+from typing import TypeVar
+
+EnumValue = TypeVar("EnumValue", bound=Enum)
 
 
 def can_cast_to_bool(value: str) -> bool:
@@ -51,4 +55,28 @@ def get_value_from_env(env_value: str, default_value: str | None = None) -> str
     if default_value is not None:
         return default_value
 
-    raise Exception(f"The environment variable {env_value} must be set to proceed")
\ No newline at end of file
+    raise Exception(f"The environment variable {env_value} must be set to proceed")
+
+def get_enum_value_from_env(env_value: str, enum_type: type[EnumValue], default_value: str) -> EnumValue:
+    """
+    Method to read an enviroment variable that must be one of the values of an enum.
+    An expection is raised if the value is not one of the enum's values, so that a mistyped
+    setting is caught when the config is loaded rather than silently treated as another value.
+
+    Parameters:
+        env_value: value to check environment for
+        enum_type: enum the value must be one of
+        default_value: value used if the environment variable is not set
+
+    Returns:
+        EnumValue: the enum member corresponding to the environment value
+    """
+    value = os.environ.get(env_value, default_value)
+
+    try:
+        return enum_type(value)
+    except ValueError as exc:
+        allowed_values = ", ".join(member.value for member in enum_type)
+        raise ValueError(
+            f"The environment variable {env_value} must be one of {allowed_values}, not {value!r}"
+        ) from exc
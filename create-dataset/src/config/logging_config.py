@@ -1,5 +1,9 @@
 import logging
 import os
+import sys
+
+# Logger for records written as a single JSON line, which Cloud Logging parses into a structured payload
+STRUCTURED_LOGGER_NAME = "structured"
 
 
 def get_log_level():
@@ -15,3 +19,11 @@ logging.basicConfig(
     level=get_log_level(),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
+
+structured_handler = logging.StreamHandler(sys.stdout)
+structured_handler.setFormatter(logging.Formatter("%(message)s"))
+
+structured_logger = logging.getLogger(STRUCTURED_LOGGER_NAME)
+structured_logger.addHandler(structured_handler)
+structured_logger.setLevel(logging.INFO)
+structured_logger.propagate = False
@@ -1,9 +1,15 @@
 import json
+from datetime import datetime
 
 import functions_framework
+from cloudevents.http import CloudEvent
+from config.config import config
 from config.logging_config import logging
+from repository.dataset_file_queue_repository import DatasetFileQueueRepository
 from services.dataset_bucket_service import DatasetBucketService
-from services.dataset_processor_service import DatasetProcessorService
+from services.dataset_ingest_service import DatasetIngestService
+from services.publisher_service import publisher_service
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
@@ -16,23 +22,103 @@ def create_dataset(request):
     in the README.md file for details as to how this function
     is set up.
     * The dataset_id is an auto generated GUID and the filename is saved as a new field in the metadata.
+    * The time spent in each stage is logged as one JSON record once the request is done.
     """
-    logger.info("Fetching new create-dataset...")
-    filename = DatasetBucketService().try_fetch_oldest_filename_from_bucket()
+    stage_timing_service.start_invocation()
 
-    if not filename:
-        logger.info("No create-dataset files found in bucket. Process is skipped")
-        return json.dumps({"success": True}), 200, {"ContentType": "application/json"}
+    try:
+        try:
+            response = _create_dataset()
+        except Exception:
+            _try_flush_published_messages()
+            raise
 
-    logger.info("Uploading new create-dataset...")
+        _try_flush_published_messages()
 
-    raw_dataset = DatasetBucketService().get_and_validate_dataset(filename)
+        return response
+    finally:
+        stage_timing_service.log_stage_timings()
 
-    logger.info("Dataset obtained from bucket successfully.")
-    logger.debug(f"Dataset: {raw_dataset}")
 
-    DatasetProcessorService().process_raw_dataset(filename, raw_dataset)
+def _try_flush_published_messages() -> None:
+    """
+    Confirms the delivery of the messages published during the request, as they are published in batches.
+    A failure to deliver them is logged rather than raised, so that it neither replaces the error a failed
+    request is raising, nor turns a dataset that has already been written into a failed request that the
+    scheduler retries.
+    """
+    try:
+        publisher_service.flush_published_messages()
+    except Exception as exc:
+        logger.error(f"Failed to deliver published messages: {exc}")
+
+
+def _create_dataset() -> tuple[str, int, dict]:
+    """
+    Processes the oldest create-dataset file in the bucket, or drains the bucket if DRAIN_DATASET_FILES is enabled.
+    """
+    if config.DRAIN_DATASET_FILES is True:
+        logger.info("Draining create-dataset files...")
+
+        processed_count, failed_count = DatasetIngestService().drain_dataset_files()
+
+        logger.info(f"Drained {processed_count} create-dataset files, {failed_count} failed.")
+
+        if failed_count > 0:
+            raise RuntimeError(f"Failed to process {failed_count} create-dataset file(s) while draining.")
+
+        return json.dumps({"success": True, "processed": processed_count}), 200, {"ContentType": "application/json"}
+
+    dataset_ingest_service = DatasetIngestService()
+
+    # A file missing from the bucket is skipped, so that the next oldest file is processed instead
+    raw_dataset = None
+    while raw_dataset is None:
+        logger.info("Fetching new create-dataset...")
+        filename = DatasetBucketService().try_fetch_oldest_filename_from_bucket()
+
+        if not filename:
+            logger.info("No create-dataset files found in bucket. Process is skipped")
+            return json.dumps({"success": True}), 200, {"ContentType": "application/json"}
+
+        logger.info("Uploading new create-dataset...")
+
+        raw_dataset = dataset_ingest_service.load_dataset_file(filename)
+
+    if not dataset_ingest_service.process_dataset_file(filename, raw_dataset):
+        logger.info("Dataset upload stopped at the deadline and will be resumed from its checkpoint.")
+        return json.dumps({"success": True, "resumable": True}), 200, {"ContentType": "application/json"}
 
     logger.info("Dataset uploaded successfully.")
 
-    return json.dumps({"success": True}), 200, {"ContentType": "application/json"}
\ No newline at end of file
+    return json.dumps({"success": True}), 200, {"ContentType": "application/json"}
+
+
+@functions_framework.cloud_event
+def register_dataset_file(cloud_event: CloudEvent) -> None:
+    """
+    Triggered by a file being finalised in the create-dataset storage bucket. Adds the file to the
+    queue of pending files that create_dataset takes the oldest file from when USE_DATASET_FILE_QUEUE
+    is enabled, so it never needs to list the bucket. The queue is written directly, as the bucket itself
+    is never needed to register a file.
+
+    Parameters:
+    cloud_event (CloudEvent): the storage object finalized event.
+    """
+    if config.USE_DATASET_FILE_QUEUE is not True:
+        logger.info("Create-dataset file queue is not enabled. Process is skipped")
+        return
+
+    filename = cloud_event.data["name"]
+    updated = datetime.fromisoformat(cloud_event.data["updated"])
+
+    logger.info("Registering new create-dataset file...")
+    logger.debug(f"Filename: {filename}, updated: {updated}")
+
+    try:
+        DatasetFileQueueRepository().add_pending_file(filename, updated)
+    except Exception as exc:
+        logger.debug(f"Failed to add file {filename} to the pending file queue with error: {exc}")
+        raise RuntimeError("Failed to add file to the pending create-dataset file queue.") from exc
+
+    logger.info("Create-dataset file registered successfully.")
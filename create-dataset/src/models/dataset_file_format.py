@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class DatasetFileLayout(StrEnum):
+    JSON = ".json"
+    NDJSON = ".ndjson"
+    PARQUET = ".parquet"
+
+
+class DatasetFileCompression(StrEnum):
+    NONE = ""
+    GZIP = ".gz"
+    ZSTD = ".zst"
+
+
+@dataclass(frozen=True)
+class DatasetFileFormat:
+    layout: DatasetFileLayout
+    compression: DatasetFileCompression
+
+    @property
+    def is_line_delimited(self) -> bool:
+        return self.layout == DatasetFileLayout.NDJSON
+
+    @property
+    def is_columnar(self) -> bool:
+        return self.layout == DatasetFileLayout.PARQUET
+
+    @classmethod
+    def from_filename(cls, filename: str) -> "DatasetFileFormat | None":
+        """
+        Determines the format of a create-dataset file from its extension, one of .json or .ndjson optionally
+        followed by .gz or .zst, or .parquet, which is compressed internally. Returns None if the extension
+        is not supported.
+
+        Parameters:
+        filename (str): name of the create-dataset file.
+        """
+        lowered_filename = filename.lower()
+
+        if lowered_filename.endswith(DatasetFileLayout.PARQUET):
+            return cls(DatasetFileLayout.PARQUET, DatasetFileCompression.NONE)
+
+        for compression in (DatasetFileCompression.GZIP, DatasetFileCompression.ZSTD, DatasetFileCompression.NONE):
+            if not lowered_filename.endswith(compression):
+                continue
+
+            uncompressed_filename = lowered_filename.removesuffix(compression)
+            for layout in (DatasetFileLayout.NDJSON, DatasetFileLayout.JSON):
+                if uncompressed_filename.endswith(layout):
+                    return cls(layout, compression)
+
+        return None
@@ -62,4 +62,17 @@ class DatasetPublishResponse:
 @dataclass
 class DatasetError:
     error: str
-    message: str
\ No newline at end of file
+    message: str
+
+@dataclass
+class BatchPlan:
+    batch_sizes_bytes: list[int]
+    batch_write_counts: list[int]
+
+@dataclass
+class DatasetCheckpoint:
+    filename: str
+    dataset_id: str
+    sds_dataset_version: int
+    unit_offset: int
+    dataset_metadata: DatasetMetadataWithoutId
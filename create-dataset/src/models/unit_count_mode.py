@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+
+class UnitCountMode(StrEnum):
+    AGGREGATION = "aggregation"
+    KEYS_ONLY = "keys_only"
+    WRITE_TALLY = "write_tally"
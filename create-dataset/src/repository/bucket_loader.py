@@ -1,10 +1,12 @@
 from config.config import config
 from google.cloud import exceptions, storage
+from repository.client_registry import client_registry
 
 
 class BucketLoader:
     def __init__(self):
-        self.dataset_bucket = self._initialise_bucket(config.DATASET_BUCKET_NAME)
+        # The bucket is fetched on first use rather than at import, then reused across warm invocations
+        self.dataset_bucket = None
 
     def get_schema_bucket(self) -> storage.Bucket:
         """
@@ -14,8 +16,11 @@ class BucketLoader:
 
     def get_dataset_bucket(self) -> storage.Bucket:
         """
-        Get the dataset bucket from Google cloud
+        Get the dataset bucket from Google cloud, connecting to it on first use
         """
+        if self.dataset_bucket is None:
+            self.dataset_bucket = self._initialise_bucket(config.DATASET_BUCKET_NAME)
+
         return self.dataset_bucket
 
     def _initialise_bucket(self, bucket_name) -> storage.Bucket:
@@ -30,9 +35,8 @@ class BucketLoader:
         if config.CONF == "unit":
             return None
 
-        __storage_client = storage.Client(project=config.PROJECT_ID)
         try:
-            bucket = __storage_client.get_bucket(
+            bucket = client_registry.get_storage_client().get_bucket(
                 bucket_name,
             )
         except exceptions.NotFound as exc:
@@ -1,4 +1,10 @@
+import io
 import json
+from typing import BinaryIO
+
+from config.config import config
+from services.ranged_download_spool_service import RangedDownloadSpoolService
+from services.stage_timing_service import stage_timing_service
 
 
 class BucketRepository:
@@ -11,7 +17,73 @@ class BucketRepository:
 
         Returns: object: the file loaded as json.
         """
-        return json.loads(self.bucket.blob(filename).download_as_string())
+        with self.open_downloaded_bucket_file(filename) as file_obj:
+            return json.load(file_obj)
+
+    def open_downloaded_bucket_file(self, filename: str, raw_download: bool = False) -> BinaryIO:
+        """
+        Downloads a file from a google cloud bucket with a specific filename, returning it as a file object
+        to be passed to a parser. If PARALLEL_BUCKET_DOWNLOAD is enabled, the file is downloaded as concurrent
+        byte ranges into a memory-mapped spool, which is returned rather than read so that the raw bytes are
+        kept out of the Python heap.
+
+        Parameters:
+        filename (str): name of file being downloaded.
+        raw_download (bool): whether the file is downloaded as stored, without decompressive transcoding.
+
+        Returns: BinaryIO: a readable and seekable binary file object of the contents of the file.
+        """
+        if config.PARALLEL_BUCKET_DOWNLOAD is True:
+            return self.open_bucket_file(filename, config.DATASET_STREAM_CHUNK_SIZE, raw_download)
+
+        with stage_timing_service.time_stage("download") as span:
+            data = self.bucket.blob(filename).download_as_bytes(raw_download=raw_download)
+            span.add(size_bytes=len(data))
+
+        return io.BytesIO(data)
+
+    def open_bucket_file(self, filename: str, chunk_size: int, raw_download: bool = False) -> BinaryIO:
+        """
+        Opens a file from a google cloud bucket with a specific filename for reading in chunks. If
+        PARALLEL_BUCKET_DOWNLOAD is enabled, the file is instead downloaded as concurrent byte ranges
+        into a memory-mapped spool, each read waiting only for the ranges it covers. A file stored with
+        gzip content encoding is still read over a single stream unless read as stored, as byte ranges
+        cannot be requested while it is decompressed by the bucket.
+
+        Parameters:
+        filename (str): name of file being opened.
+        chunk_size (int): number of bytes fetched from the bucket per request.
+        raw_download (bool): whether the file is read as stored, without decompressive transcoding.
+
+        Returns: BinaryIO: a readable binary file object, with its reads timed as the download stage.
+        """
+        return stage_timing_service.time_file_reads(
+            "download", self._open_bucket_file_for_download(filename, chunk_size, raw_download)
+        )
+
+    def _open_bucket_file_for_download(self, filename: str, chunk_size: int, raw_download: bool) -> BinaryIO:
+        """
+        Opens a file from a google cloud bucket as concurrent byte ranges if PARALLEL_BUCKET_DOWNLOAD is
+        enabled and the file can be downloaded in ranges, otherwise over a single stream.
+
+        Parameters:
+        filename (str): name of file being opened.
+        chunk_size (int): number of bytes fetched from the bucket per request.
+        raw_download (bool): whether the file is read as stored, without decompressive transcoding.
+        """
+        with stage_timing_service.time_stage("download"):
+            if config.PARALLEL_BUCKET_DOWNLOAD is True:
+                blob = self.bucket.get_blob(filename)
+
+                if blob is not None and (raw_download or blob.content_encoding != "gzip"):
+                    return RangedDownloadSpoolService(
+                        blob,
+                        config.BUCKET_DOWNLOAD_RANGE_SIZE,
+                        config.BUCKET_DOWNLOAD_CONCURRENCY,
+                        raw_download,
+                    )
+
+            return self.bucket.blob(filename).open("rb", chunk_size=chunk_size, raw_download=raw_download)
 
     def delete_bucket_file(self, filename: str) -> None:
         """
@@ -0,0 +1,93 @@
+import threading
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+from config.config import config
+from firebase_admin import firestore
+from google.cloud import storage
+
+if TYPE_CHECKING:
+    from google.cloud.pubsub_v1 import PublisherClient
+
+Client = TypeVar("Client")
+
+
+class ClientRegistry:
+    """
+    Google Cloud clients shared by every repository and service, each created on first
+    use rather than at import or per request, so that warm instances reuse their
+    connections across invocations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def get_firestore_client(self) -> firestore.Client:
+        """
+        Get the Firestore client for the configured project and database
+        """
+        return self._get_or_create_client(
+            "firestore",
+            lambda: firestore.Client(project=config.PROJECT_ID, database=config.DATABASE),
+        )
+
+    def get_storage_client(self) -> storage.Client:
+        """
+        Get the Cloud Storage client for the configured project
+        """
+        return self._get_or_create_client(
+            "storage",
+            lambda: storage.Client(project=config.PROJECT_ID),
+        )
+
+    def get_publisher_client(self) -> "PublisherClient":
+        """
+        Get the Pub/Sub publisher client, batching messages according to the PUBLISH_BATCH settings.
+        Pub/Sub is imported here as messages are only published once a dataset has been processed.
+        """
+        from google.cloud.pubsub_v1 import PublisherClient, types
+
+        return self._get_or_create_client(
+            "publisher",
+            lambda: PublisherClient(
+                batch_settings=types.BatchSettings(
+                    max_messages=config.PUBLISH_BATCH_MAX_MESSAGES,
+                    max_bytes=config.PUBLISH_BATCH_MAX_BYTES,
+                    max_latency=config.PUBLISH_BATCH_MAX_LATENCY,
+                )
+            ),
+        )
+
+    def register_client(self, client_name: str, client: object) -> None:
+        """
+        Registers a client in place of the one that would be created on first use, such as an
+        in-process stand-in so that the function can be benchmarked without a project.
+
+        Parameters:
+        client_name (str): The name the client is registered under, one of firestore, storage or publisher
+        client (object): The client used from now on
+        """
+        with self._lock:
+            self._clients[client_name] = client
+
+    def _get_or_create_client(self, client_name: str, create_client: Callable[[], Client]) -> Client:
+        """
+        Get a client by name, creating it if this is its first use. Creation is locked so that
+        concurrent first uses from worker threads share a single client.
+
+        Parameters:
+        client_name (str): The name the client is registered under
+        create_client (Callable[[], Client]): Creates the client
+        """
+        client = self._clients.get(client_name)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if client_name not in self._clients:
+                self._clients[client_name] = create_client()
+
+            return self._clients[client_name]
+
+
+client_registry = ClientRegistry()
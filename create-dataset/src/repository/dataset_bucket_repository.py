@@ -1,7 +1,18 @@
+import heapq
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+from config.config import config
 from config.logging_config import logging
+from models.dataset_file_format import DatasetFileCompression, DatasetFileFormat
 from models.dataset_models import RawDataset
 from repository.bucket_loader import bucket_loader
 from repository.bucket_repository import BucketRepository
+from services.decompression_stream_service import DecompressionStreamService
+from services.json_stream_service import JsonStreamService
+from services.ndjson_stream_service import NdjsonStreamService
+from services.parquet_stream_service import ParquetStreamService
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +28,228 @@ class DatasetBucketRepository(BucketRepository):
         Parameters:
         filename (str): name of file being queried.
 
+        A compressed file is downloaded as stored and decompressed here, and the units of a line-delimited
+        file are collected under 'data' alongside its header. The units of a Parquet file are instead read
+        lazily from the downloaded file, a record batch at a time. The downloaded file is passed to the reader
+        of its format rather than read into memory first, so that only the decoded dataset is held.
+
         Returns:
         object: raw create-dataset from the bucket file as json.
         """
-        return self.get_bucket_file_as_json(filename)
+        file_format = DatasetFileFormat.from_filename(filename)
+
+        if file_format.is_columnar:
+            return self._read_columnar_dataset_file(self.open_downloaded_bucket_file(filename))
+
+        is_compressed = file_format.compression != DatasetFileCompression.NONE
+        file_obj = self._open_decompressed_file(
+            self.open_downloaded_bucket_file(filename, raw_download=is_compressed), file_format
+        )
+
+        with file_obj:
+            if not file_format.is_line_delimited:
+                return self._read_dataset_object(file_obj)
+
+            reader = NdjsonStreamService(file_obj, config.DATASET_STREAM_CHUNK_SIZE)
+            raw_dataset = reader.read_header()
+            raw_dataset["data"] = list(reader.iter_lines())
+
+            return raw_dataset
+
+    def _read_dataset_object(self, file_obj: BinaryIO) -> RawDataset:
+        """
+        Reads a create-dataset object from a file a chunk at a time, collecting its unit data under 'data',
+        so that the file is not held in memory as bytes and text alongside the decoded dataset.
+
+        Parameters:
+        file_obj (BinaryIO): the file holding the create-dataset object.
+        """
+        reader = JsonStreamService(file_obj, config.DATASET_STREAM_CHUNK_SIZE)
+        raw_dataset, has_data = reader.read_object_until("data")
+
+        if has_data:
+            raw_dataset["data"] = list(reader.iter_array_items())
+            raw_dataset.update(reader.read_remaining_object())
+
+        reader.read_end()
+
+        return raw_dataset
+
+    def stream_dataset_file_as_json(self, filename: str, header_keys: list[str]) -> RawDataset:
+        """
+        Streams a file from the google bucket with a specific name, reading the dataset metadata up front
+        and returning the unit data as a lazy iterator rather than a list.
+
+        If any of the header keys only appear after the 'data' array, the array is read past and the
+        file is opened again so that the header keys are available before the first unit is yielded.
+        Any other keys following the 'data' array are added to the returned dataset once the unit data
+        iterator has been exhausted.
+
+        Parameters:
+        filename (str): name of file being streamed.
+        header_keys (list[str]): keys that must be read before the unit data is streamed.
+
+        A compressed file is read as stored and decompressed as it is read. A line-delimited file has its
+        metadata on the header line, so its unit data is always streamed from the line after. A Parquet
+        file has its metadata in its footer, and its unit data is streamed a record batch at a time.
+
+        Returns:
+        RawDataset: raw create-dataset metadata, with 'data' as an iterator of unit data if present.
+        """
+        file_format = DatasetFileFormat.from_filename(filename)
+
+        if file_format.is_columnar:
+            return self._read_columnar_dataset_file(
+                self.open_bucket_file(filename, config.DATASET_STREAM_CHUNK_SIZE)
+            )
+
+        if file_format.is_line_delimited:
+            return self._stream_line_delimited_dataset_file(filename, file_format)
+
+        reader = self._open_dataset_stream(filename, file_format)
+        raw_dataset, has_data = reader.read_object_until("data")
+
+        if not has_data:
+            reader.file_obj.close()
+            return raw_dataset
+
+        if any(header_key not in raw_dataset for header_key in header_keys):
+            logger.info("Dataset metadata follows unit data, reading past unit data...")
+            reader.skip_array()
+            raw_dataset.update(reader.read_remaining_object())
+            reader.file_obj.close()
+
+            reader = self._open_dataset_stream(filename, file_format)
+            reader.read_object_until("data")
+
+        raw_dataset["data"] = self._stream_dataset_unit_data(reader, raw_dataset)
+
+        return raw_dataset
+
+    def _stream_line_delimited_dataset_file(self, filename: str, file_format: DatasetFileFormat) -> RawDataset:
+        """
+        Streams a line-delimited file from the google bucket, reading the dataset metadata from its
+        header line and returning the units on the following lines as a lazy iterator.
+
+        Parameters:
+        filename (str): name of file being streamed.
+        file_format (DatasetFileFormat): format of the file.
+        """
+        file_obj = self._open_dataset_file(filename, file_format)
+
+        try:
+            reader = NdjsonStreamService(file_obj, config.DATASET_STREAM_CHUNK_SIZE)
+            raw_dataset = reader.read_header()
+        except Exception:
+            file_obj.close()
+            raise
+
+        raw_dataset["data"] = self._stream_line_delimited_unit_data(reader)
+
+        return raw_dataset
+
+    def _stream_line_delimited_unit_data(self, reader: NdjsonStreamService) -> Iterator[object]:
+        """
+        Yields the unit data items from the reader, closing the file once they have been read.
+
+        Parameters:
+        reader (NdjsonStreamService): reader positioned after the header line.
+        """
+        try:
+            yield from reader.iter_lines()
+        finally:
+            reader.file_obj.close()
+
+    def _read_columnar_dataset_file(self, file_obj: BinaryIO) -> RawDataset:
+        """
+        Reads a Parquet file, returning the dataset metadata from its file-level metadata and its units
+        as a lazy iterator over its record batches.
+
+        Parameters:
+        file_obj (BinaryIO): the file, which must be seekable as its metadata is read from the end.
+        """
+        try:
+            reader = ParquetStreamService(file_obj, config.DATASET_PARQUET_BATCH_SIZE)
+            raw_dataset = reader.read_metadata()
+        except Exception:
+            file_obj.close()
+            raise
+
+        raw_dataset["data"] = self._stream_columnar_unit_data(reader)
+
+        return raw_dataset
+
+    def _stream_columnar_unit_data(self, reader: ParquetStreamService) -> Iterator[object]:
+        """
+        Yields the unit data items from the reader, closing the file once they have been read.
+
+        Parameters:
+        reader (ParquetStreamService): reader of the Parquet file.
+        """
+        try:
+            yield from reader.iter_units()
+        finally:
+            reader.file_obj.close()
+
+    def _open_dataset_stream(self, filename: str, file_format: DatasetFileFormat) -> JsonStreamService:
+        """
+        Opens a file from the google bucket as an incremental json reader.
+
+        Parameters:
+        filename (str): name of file being opened.
+        file_format (DatasetFileFormat): format of the file.
+        """
+        return JsonStreamService(
+            self._open_dataset_file(filename, file_format),
+            config.DATASET_STREAM_CHUNK_SIZE,
+        )
+
+    def _open_dataset_file(self, filename: str, file_format: DatasetFileFormat) -> BinaryIO:
+        """
+        Opens a file from the google bucket for reading in chunks, decompressing it as it is read if it is
+        compressed. A compressed file is read as stored, so only its compressed bytes are downloaded.
+
+        Parameters:
+        filename (str): name of file being opened.
+        file_format (DatasetFileFormat): format of the file.
+        """
+        is_compressed = file_format.compression != DatasetFileCompression.NONE
+        file_obj = self.open_bucket_file(filename, config.DATASET_STREAM_CHUNK_SIZE, raw_download=is_compressed)
+
+        return self._open_decompressed_file(file_obj, file_format)
+
+    def _open_decompressed_file(self, file_obj: BinaryIO, file_format: DatasetFileFormat) -> BinaryIO:
+        """
+        Wraps a file in a reader decompressing it as it is read, unless it is not compressed. Reads of the
+        decompressed file are timed as the decompress stage.
+
+        Parameters:
+        file_obj (BinaryIO): the file as stored in the bucket.
+        file_format (DatasetFileFormat): format of the file.
+        """
+        if file_format.compression == DatasetFileCompression.NONE:
+            return file_obj
+
+        return stage_timing_service.time_file_reads(
+            "decompress",
+            DecompressionStreamService(file_obj, file_format.compression, config.DATASET_STREAM_CHUNK_SIZE),
+        )
+
+    def _stream_dataset_unit_data(self, reader: JsonStreamService, raw_dataset: RawDataset) -> Iterator[object]:
+        """
+        Yields the unit data items from the reader, then adds any trailing keys to the raw dataset.
+
+        Parameters:
+        reader (JsonStreamService): reader positioned at the 'data' array.
+        raw_dataset (RawDataset): raw create-dataset metadata read so far.
+        """
+        try:
+            yield from reader.iter_array_items()
+
+            for key, value in reader.read_remaining_object().items():
+                raw_dataset.setdefault(key, value)
+        finally:
+            reader.file_obj.close()
 
     def fetch_oldest_filename_from_bucket(self) -> str | None:
         """
@@ -29,15 +258,32 @@ class DatasetBucketRepository(BucketRepository):
         Returns:
         str: filename with the oldest 'last modified' date from the bucket.
         """
-        blobs = self.bucket.list_blobs()
-        oldest_blob = None
-        oldest_date = None
+        oldest_filenames = self.fetch_oldest_filenames_from_bucket(1)
 
-        for blob in blobs:
-            last_modified = blob.updated
+        return oldest_filenames[0] if oldest_filenames else None
 
-            if oldest_date is None or last_modified < oldest_date:
-                oldest_date = last_modified
-                oldest_blob = blob
+    def fetch_oldest_filenames_from_bucket(self, limit: int) -> list[str]:
+        """
+        Fetches the filenames with the oldest 'last modified' dates from the bucket, oldest first.
+        Only the name and last modified date of each blob are requested from the listing.
+
+        Parameters:
+        limit (int): maximum number of filenames to fetch.
+
+        Returns:
+        list[str]: filenames with the oldest 'last modified' dates from the bucket.
+        """
+        blobs = self.bucket.list_blobs(fields="items(name,updated),nextPageToken")
 
-        return oldest_blob.name if oldest_blob else None
+        return [blob.name for blob in heapq.nsmallest(limit, blobs, key=lambda blob: blob.updated)]
+
+    def list_bucket_files(self) -> Iterator[tuple[str, datetime]]:
+        """
+        Lists every file in the bucket with its 'last modified' date, requesting only the name and
+        last modified date of each blob.
+
+        Returns:
+        Iterator[tuple[str, datetime]]: each filename with its 'last modified' date.
+        """
+        for blob in self.bucket.list_blobs(fields="items(name,updated),nextPageToken"):
+            yield blob.name, blob.updated
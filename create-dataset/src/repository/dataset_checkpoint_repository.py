@@ -0,0 +1,61 @@
+from urllib.parse import quote
+
+from config.logging_config import logging
+from firebase_admin import firestore
+from models.dataset_models import DatasetCheckpoint
+from repository.client_registry import client_registry
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetCheckpointRepository:
+    """
+    Progress of create-dataset files whose ingest stopped before the PROCESS_TIMEOUT
+    deadline, kept in Firestore so that the next invocation can resume writing the
+    dataset rather than starting again.
+    """
+
+    def __init__(self):
+        # Get the shared Firestore client
+        self.client = client_registry.get_firestore_client()
+        # Initialize Firestore collections
+        self.dataset_checkpoint_collection = self.client.collection("dataset_checkpoints")
+
+    def get_checkpoint(self, filename: str) -> DatasetCheckpoint | None:
+        """
+        Gets the checkpoint of a create-dataset file.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+
+        Returns:
+        DatasetCheckpoint | None: the checkpoint of the file, or None if its ingest has not started.
+        """
+        return self._get_checkpoint_document(filename).get().to_dict()
+
+    def save_checkpoint(self, checkpoint: DatasetCheckpoint) -> None:
+        """
+        Saves the checkpoint of a create-dataset file, replacing any previous checkpoint of the file.
+
+        Parameters:
+        checkpoint (DatasetCheckpoint): the checkpoint being saved.
+        """
+        self._get_checkpoint_document(checkpoint["filename"]).set(checkpoint)
+
+    def delete_checkpoint(self, filename: str) -> None:
+        """
+        Deletes the checkpoint of a create-dataset file.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+        """
+        self._get_checkpoint_document(filename).delete()
+
+    def _get_checkpoint_document(self, filename: str) -> firestore.DocumentReference:
+        """
+        Gets the checkpoint document for a filename, escaped as filenames may contain '/'.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+        """
+        return self.dataset_checkpoint_collection.document(quote(filename, safe=""))
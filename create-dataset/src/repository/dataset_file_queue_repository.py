@@ -0,0 +1,82 @@
+from datetime import datetime
+from urllib.parse import quote
+
+from config.logging_config import logging
+from firebase_admin import firestore
+from repository.client_registry import client_registry
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetFileQueueRepository:
+    """
+    Index of the create-dataset files waiting in the dataset bucket, kept in
+    Firestore so that the oldest file can be found with a single ordered
+    query rather than by listing the whole bucket.
+    """
+
+    def __init__(self):
+        # Get the shared Firestore client
+        self.client = client_registry.get_firestore_client()
+        # Initialize Firestore collections
+        self.dataset_file_queue_collection = self.client.collection("dataset_file_queue")
+
+    def add_pending_file(self, filename: str, updated: datetime) -> None:
+        """
+        Adds a file to the queue of pending files, replacing any existing entry for the same filename.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+        updated (datetime): the time the file was last modified in the bucket.
+        """
+        self._get_pending_file_document(filename).set(
+            {"filename": filename, "updated": updated}
+        )
+
+    def fetch_oldest_pending_filename(self) -> str | None:
+        """
+        Fetches the filename with the oldest 'last modified' date from the queue of pending files.
+
+        Returns:
+        str | None: the oldest pending filename, or None if the queue is empty.
+        """
+        oldest_filenames = self.fetch_oldest_pending_filenames(1)
+
+        return oldest_filenames[0] if oldest_filenames else None
+
+    def fetch_oldest_pending_filenames(self, limit: int) -> list[str]:
+        """
+        Fetches the filenames with the oldest 'last modified' dates from the queue of pending files, oldest first.
+
+        Parameters:
+        limit (int): maximum number of filenames to fetch.
+
+        Returns:
+        list[str]: the oldest pending filenames.
+        """
+        pending_files = (
+            self.dataset_file_queue_collection
+            .order_by("updated")
+            .limit(limit)
+            .stream()
+        )
+
+        return [pending_file.to_dict()["filename"] for pending_file in pending_files]
+
+    def remove_pending_file(self, filename: str) -> None:
+        """
+        Removes a file from the queue of pending files.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+        """
+        self._get_pending_file_document(filename).delete()
+
+    def _get_pending_file_document(self, filename: str) -> firestore.DocumentReference:
+        """
+        Gets the queue document for a filename, escaped as filenames may contain '/'.
+
+        Parameters:
+        filename (str): name of the file in the bucket.
+        """
+        return self.dataset_file_queue_collection.document(quote(filename, safe=""))
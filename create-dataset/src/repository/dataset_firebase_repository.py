@@ -1,23 +1,36 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator
+from urllib.parse import quote
+
 from config.config import config
 from firebase_admin import firestore
 from config.logging_config import logging
-from models.dataset_models import DatasetMetadata, DatasetMetadataWithoutId, UnitDataset
+from models.dataset_models import BatchPlan, DatasetMetadata, DatasetMetadataWithoutId, UnitDataset
+from repository.client_registry import client_registry
+from services.batch_planner_service import BatchPlannerService
 from services.byte_conversion_service import ByteConversionService
+from services.document_version_service import DocumentVersionService
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
 
 class DatasetFirebaseRepository:
     MAX_BATCH_SIZE_BYTES = 9 * 1024 * 1024
+    MAX_BATCH_WRITES = 500
+    KEYS_ONLY_PAGE_SIZE = 5000
 
     def __init__(self):
-        # Initialize Firestore client
-        self.client = firestore.Client(project=config.PROJECT_ID, database=config.DATABASE)
+        # Get the shared Firestore client
+        self.client = client_registry.get_firestore_client()
         # Initialize Firestore collections
         self.dataset_collection = self.client.collection("datasets")
+        self.dataset_version_collection = self.client.collection("dataset_versions")
+        self.batch_planner = BatchPlannerService(self.MAX_BATCH_SIZE_BYTES, self.MAX_BATCH_WRITES)
 
     def get_latest_dataset_with_survey_id_and_period_id(
-        self, survey_id: str, period_id: str
+        self, survey_id: str, period_id: str, transaction: firestore.Transaction | None = None
     ) -> DatasetMetadataWithoutId | None:
         """
         Gets the latest dataset metadata from firestore with a specific survey_id and period_id.
@@ -25,6 +38,7 @@ class DatasetFirebaseRepository:
         Parameters:
         survey_id (str): survey_id of the specified dataset.
         period_id (str): period_id of the specified dataset.
+        transaction (firestore.Transaction | None): transaction the query is read in, if any.
         """
         latest_dataset = (
             self.dataset_collection
@@ -32,7 +46,7 @@ class DatasetFirebaseRepository:
             .where("period_id", "==", period_id)
             .order_by("sds_dataset_version", direction=firestore.Query.DESCENDING)
             .limit(1)
-            .stream()
+            .stream(transaction=transaction)
         )
 
         dataset_metadata: DatasetMetadataWithoutId = None
@@ -41,62 +55,327 @@ class DatasetFirebaseRepository:
 
         return dataset_metadata
 
+    def allocate_next_dataset_version(self, survey_id: str, period_id: str) -> int:
+        """
+        Allocates the next sds_dataset_version for a survey_id and period_id by incrementing their version
+        counter in a transaction, so that concurrent runs are never handed the same version.
+        A missing counter is seeded from the latest dataset in firestore within the same transaction.
+
+        Parameters:
+        survey_id (str): survey_id of the new dataset.
+        period_id (str): period_id of the new dataset.
+
+        Returns:
+        int: The allocated version
+        """
+        return firestore.transactional(self._allocate_next_dataset_version_in_transaction)(
+            self.client.transaction(), survey_id, period_id
+        )
+
+    def _allocate_next_dataset_version_in_transaction(
+        self, transaction: firestore.Transaction, survey_id: str, period_id: str
+    ) -> int:
+        """
+        Reads the version counter of a survey_id and period_id and writes back the next version, retried
+        by firestore if the counter is changed by another transaction first.
+
+        Parameters:
+        transaction (firestore.Transaction): The transaction the counter is read and written in
+        survey_id (str): survey_id of the new dataset.
+        period_id (str): period_id of the new dataset.
+        """
+        version_counter_document = self._get_dataset_version_counter_document(survey_id, period_id)
+        version_counter = version_counter_document.get(transaction=transaction).to_dict()
+
+        if version_counter is None:
+            latest_dataset = self.get_latest_dataset_with_survey_id_and_period_id(
+                survey_id, period_id, transaction
+            )
+            published_version = latest_dataset["sds_dataset_version"] if latest_dataset else 0
+            version_counter = {"sds_dataset_version": published_version, "published_sds_dataset_version": published_version}
+
+        next_version = DocumentVersionService.calculate_survey_version(version_counter, "sds_dataset_version")
+
+        transaction.set(
+            version_counter_document,
+            {
+                "survey_id": survey_id,
+                "period_id": period_id,
+                "sds_dataset_version": next_version,
+                "published_sds_dataset_version": version_counter["published_sds_dataset_version"],
+            },
+        )
+
+        return next_version
+
+    def record_published_dataset_version(self, survey_id: str, period_id: str, version: int) -> int:
+        """
+        Records a dataset version as published on the version counter of its survey_id and period_id in a
+        transaction, unless a later version has already been published.
+
+        Parameters:
+        survey_id (str): survey_id of the published dataset.
+        period_id (str): period_id of the published dataset.
+        version (int): sds_dataset_version of the published dataset.
+
+        Returns:
+        int: The latest version published before this one, 0 if there is none
+        """
+        return firestore.transactional(self._record_published_dataset_version_in_transaction)(
+            self.client.transaction(), survey_id, period_id, version
+        )
+
+    def _record_published_dataset_version_in_transaction(
+        self, transaction: firestore.Transaction, survey_id: str, period_id: str, version: int
+    ) -> int:
+        """
+        Reads the latest published version from the version counter of a survey_id and period_id, writing back
+        the published version if it is later.
+
+        Parameters:
+        transaction (firestore.Transaction): The transaction the counter is read and written in
+        survey_id (str): survey_id of the published dataset.
+        period_id (str): period_id of the published dataset.
+        version (int): sds_dataset_version of the published dataset.
+        """
+        version_counter_document = self._get_dataset_version_counter_document(survey_id, period_id)
+        version_counter = version_counter_document.get(transaction=transaction).to_dict()
+
+        if version_counter is None:
+            raise RuntimeError("Dataset version counter not found for published dataset.")
+
+        previous_published_version = version_counter["published_sds_dataset_version"]
+
+        if version > previous_published_version:
+            transaction.update(version_counter_document, {"published_sds_dataset_version": version})
+
+        return previous_published_version
+
+    def _get_dataset_version_counter_document(
+        self, survey_id: str, period_id: str
+    ) -> firestore.DocumentReference:
+        """
+        Gets the version counter document of a survey_id and period_id, with each id escaped so that
+        the pair always maps to a valid and distinct document id.
+
+        Parameters:
+        survey_id (str): survey_id of the dataset.
+        period_id (str): period_id of the dataset.
+        """
+        return self.dataset_version_collection.document(
+            f"{quote(survey_id, safe='')}:{quote(period_id, safe='')}"
+        )
+
     def perform_batched_dataset_write(
         self,
         dataset_id: str,
         dataset_metadata_without_id: DatasetMetadataWithoutId,
-        unit_data_collection_with_metadata: list[UnitDataset],
-        extracted_unit_data_identifiers: list[str],
-    ) -> None:
+        unit_data_with_identifiers: Iterable[tuple[str, UnitDataset]],
+    ) -> int:
         """
-        Write dataset metadata and unit data to firestore in batches.
+        Write unit data to firestore in batches as it is consumed from an iterable, followed by the dataset
+        metadata. The metadata is written last so that it is read only after the iterable is exhausted,
+        allowing its total reporting units to be counted as the unit data is written.
 
         Parameters:
         dataset_id (str): The unique id of the dataset
         dataset_metadata_without_id (DatasetMetadataWithoutId): The metadata of the dataset without its id
-        unit_data_collection_with_metadata (list[UnitDataset]): The collection of unit data associated with the new dataset
-        extracted_unit_data_identifiers (list[str]): List of identifiers ordered to match the identifier for each set of
-        unit data in the collection.
+        unit_data_with_identifiers (Iterable[tuple[str, UnitDataset]]): Pairs of identifier and unit data
 
+        Returns:
+        int: The number of unit writes acknowledged by firestore
         """
-        new_dataset_document = self.dataset_collection.document(dataset_id)
-        unit_data_collection_snapshot = new_dataset_document.collection("units")
+        acknowledged_write_count, _ = self.perform_batched_unit_data_write(
+            dataset_id, unit_data_with_identifiers
+        )
 
-        try:
-            batch = self.client.batch()
-            batch.set(new_dataset_document, dataset_metadata_without_id, merge=True)
-            batch.commit()
+        self.write_dataset_metadata(dataset_id, dataset_metadata_without_id)
 
-            batch = self.client.batch()
-            batch_size_bytes = 0
+        return acknowledged_write_count
 
-            for (unit_data, unit_identifier) in zip(unit_data_collection_with_metadata, extracted_unit_data_identifiers):
+    def perform_batched_unit_data_write(
+        self,
+        dataset_id: str,
+        unit_data_with_identifiers: Iterable[tuple[str, UnitDataset]],
+        deadline: float | None = None,
+    ) -> tuple[int, bool]:
+        """
+        Write unit data to firestore in batches as it is consumed from an iterable, stopping once the deadline
+        has passed if one is given. The dataset is deleted if the write fails.
+
+        Parameters:
+        dataset_id (str): The unique id of the dataset
+        unit_data_with_identifiers (Iterable[tuple[str, UnitDataset]]): Pairs of identifier and unit data
+        deadline (float | None): The time, in seconds since the epoch, after which no more batches are started
 
-                unit_data_size_bytes = ByteConversionService.get_serialized_size(unit_data)
+        Returns:
+        tuple[int, bool]: The number of unit writes acknowledged by firestore, and whether the iterable was exhausted
+        """
+        try:
+            return self._write_unit_data_in_batches(
+                self._size_unit_writes(
+                    self.dataset_collection.document(dataset_id).collection("units"),
+                    unit_data_with_identifiers,
+                ),
+                deadline,
+            )
 
-                if batch_size_bytes + unit_data_size_bytes >= self.MAX_BATCH_SIZE_BYTES:
-                    batch.commit()
-                    batch = self.client.batch()
-                    batch_size_bytes = 0
+        except Exception as exc:
+            self._clean_up_failed_dataset_write(dataset_id, exc)
 
-                new_unit = unit_data_collection_snapshot.document(unit_identifier)
-                batch.set(new_unit, unit_data, merge=True)
-                batch_size_bytes += unit_data_size_bytes
+    def write_dataset_metadata(
+        self, dataset_id: str, dataset_metadata_without_id: DatasetMetadataWithoutId
+    ) -> None:
+        """
+        Write the dataset metadata to firestore, completing the dataset. The dataset is deleted if the write fails.
 
-            if batch_size_bytes > 0:
+        Parameters:
+        dataset_id (str): The unique id of the dataset
+        dataset_metadata_without_id (DatasetMetadataWithoutId): The metadata of the dataset without its id
+        """
+        try:
+            with stage_timing_service.time_stage("firestore_write"):
+                batch = self.client.batch()
+                batch.set(self.dataset_collection.document(dataset_id), dataset_metadata_without_id, merge=True)
                 batch.commit()
 
         except Exception as exc:
-            # If an error occurs during the batch write, the dataset and all its sub collections are deleted
-            logger.error(f"Error performing batched dataset write: {exc}")
-            logger.info("Performing clean up of dataset and sub collections")
-            logger.debug(f"Deleting dataset with id: {dataset_id}")
+            self._clean_up_failed_dataset_write(dataset_id, exc)
 
-            self.delete_dataset_with_dataset_id(dataset_id)
+    def _size_unit_writes(
+        self,
+        unit_data_collection_snapshot: firestore.CollectionReference,
+        unit_data_with_identifiers: Iterable[tuple[str, UnitDataset]],
+    ) -> Iterator[tuple[tuple[firestore.DocumentReference, UnitDataset], int]]:
+        """
+        Lazily pairs each unit with its document reference and its size in bytes under Firestore's storage size rules.
 
-            logger.info("Dataset clean up is completed")
+        Parameters:
+        unit_data_collection_snapshot (firestore.CollectionReference): The units sub collection of the dataset
+        unit_data_with_identifiers (Iterable[tuple[str, UnitDataset]]): Pairs of identifier and unit data
+        """
+        for (unit_identifier, unit_data) in unit_data_with_identifiers:
+            new_unit = unit_data_collection_snapshot.document(unit_identifier)
 
-            raise RuntimeError("Error performing batched dataset write.") from exc
+            yield (new_unit, unit_data), ByteConversionService.get_firestore_document_size(
+                new_unit.path, unit_data
+            )
+
+    def _write_unit_data_in_batches(
+        self,
+        sized_unit_writes: Iterable[tuple[tuple[firestore.DocumentReference, UnitDataset], int]],
+        deadline: float | None = None,
+    ) -> tuple[int, bool]:
+        """
+        Write unit data to the units sub collection in batches within Firestore's commit limits, keeping up to
+        FIRESTORE_WRITE_CONCURRENCY batch commits in flight at once. If any commit fails, the
+        commits still in flight are waited on before the error is raised so that clean up does
+        not race with them. If a deadline is given, no more batches are started once it has passed.
+        Units are grouped into batches as they are consumed, since unit data is never held in memory as a
+        whole, so the batch plan is logged once the write is done rather than up front.
+        The write is timed as the firestore_write stage, apart from producing the unit data it consumes.
+
+        Parameters:
+        sized_unit_writes (Iterable[tuple[tuple[firestore.DocumentReference, UnitDataset], int]]): Each unit document
+        reference and unit data, with its size in bytes
+        deadline (float | None): The time, in seconds since the epoch, after which no more batches are started
+
+        Returns:
+        tuple[int, bool]: The number of unit writes acknowledged by firestore, and whether every unit was written
+        """
+        start_time = time.perf_counter()
+        acknowledged_write_count = 0
+        is_complete = True
+        batch_plan = BatchPlan(batch_sizes_bytes=[], batch_write_counts=[])
+        commits_in_flight: set[Future] = set()
+
+        with (
+            stage_timing_service.time_stage("firestore_write") as span,
+            ThreadPoolExecutor(max_workers=config.FIRESTORE_WRITE_CONCURRENCY) as executor,
+        ):
+            for unit_writes, batch_size_bytes in self.batch_planner.iter_batches(sized_unit_writes):
+                batch_plan.batch_sizes_bytes.append(batch_size_bytes)
+                batch_plan.batch_write_counts.append(len(unit_writes))
+
+                batch = self.client.batch()
+
+                for (new_unit, unit_data) in unit_writes:
+                    batch.set(new_unit, unit_data, merge=True)
+
+                commits_in_flight, acknowledged_writes = self._submit_batch_commit(
+                    executor, commits_in_flight, batch
+                )
+                acknowledged_write_count += acknowledged_writes
+
+                # Any unit the planner has already read for the next batch is left unwritten, so progress is
+                # measured by acknowledged writes rather than units read
+                if deadline is not None and time.time() >= deadline:
+                    is_complete = False
+                    logger.info("Deadline reached, no more unit data batches will be started.")
+                    break
+
+            for commit in commits_in_flight:
+                acknowledged_write_count += len(commit.result())
+
+            span.add(items=acknowledged_write_count, size_bytes=sum(batch_plan.batch_sizes_bytes))
+
+        elapsed_seconds = time.perf_counter() - start_time
+        logger.info(
+            f"Wrote {acknowledged_write_count} units in {len(batch_plan.batch_write_counts)} batches in "
+            f"{elapsed_seconds:.2f}s ({acknowledged_write_count / elapsed_seconds if elapsed_seconds else 0:.0f} "
+            f"units/sec), largest batch {max(batch_plan.batch_sizes_bytes, default=0)} bytes."
+        )
+        logger.debug(f"Batch sizes in bytes: {batch_plan.batch_sizes_bytes}")
+
+        return acknowledged_write_count, is_complete
+
+    def _submit_batch_commit(
+        self,
+        executor: ThreadPoolExecutor,
+        commits_in_flight: set[Future],
+        batch: firestore.WriteBatch,
+    ) -> tuple[set[Future], int]:
+        """
+        Submits a batch commit to the executor, first waiting for a commit to complete if the maximum
+        number of commits are already in flight. Raises the error of any completed commit that failed.
+
+        Parameters:
+        executor (ThreadPoolExecutor): The executor committing the batches
+        commits_in_flight (set[Future]): The batch commits that have not yet been checked
+        batch (firestore.WriteBatch): The batch to be committed
+
+        Returns:
+        tuple[set[Future], int]: The batch commits in flight, including the one submitted, and the number
+        of writes acknowledged by the commits that completed
+        """
+        acknowledged_writes = 0
+
+        if len(commits_in_flight) >= config.FIRESTORE_WRITE_CONCURRENCY:
+            completed_commits, commits_in_flight = wait(commits_in_flight, return_when=FIRST_COMPLETED)
+
+            for commit in completed_commits:
+                acknowledged_writes += len(commit.result())
+
+        return commits_in_flight | {executor.submit(batch.commit)}, acknowledged_writes
+
+    def _clean_up_failed_dataset_write(self, dataset_id: str, exc: Exception) -> None:
+        """
+        Deletes the dataset and all its sub collections after a failed write, then raises a runtime error.
+
+        Parameters:
+        dataset_id (str): The unique id of the dataset
+        exc (Exception): The error raised during the write
+        """
+        # If an error occurs during the batch write, the dataset and all its sub collections are deleted
+        logger.error(f"Error performing batched dataset write: {exc}")
+        logger.info("Performing clean up of dataset and sub collections")
+        logger.debug(f"Deleting dataset with id: {dataset_id}")
+
+        self.delete_dataset_with_dataset_id(dataset_id)
+
+        logger.info("Dataset clean up is completed")
+
+        raise RuntimeError("Error performing batched dataset write.") from exc
 
     def delete_dataset_with_dataset_id(self, dataset_id: str) -> None:
         """
@@ -122,56 +401,89 @@ class DatasetFirebaseRepository:
         sub_collection_ref: firestore.CollectionReference,
     ) -> None:
         """
-        Deletes a sub collection in batches.
+        Deletes a sub collection in batches. Document keys are read a keys-only page at a time, with the
+        next page fetched while the deletes of the current page are committed, keeping up to
+        FIRESTORE_WRITE_CONCURRENCY batch commits in flight at once. Each page is grouped into batches by the
+        batch planner, with each delete sized by its document name.
 
         Parameters:
         sub_collection_ref (firestore.CollectionReference): The reference to the sub collection
         """
         try:
-            cursor = None
-            limit = 10
+            start_time = time.perf_counter()
+            deleted_count = 0
+            commits_in_flight: set[Future] = set()
 
-            batch = self.client.batch()
-            batch_size_bytes = 0
+            with (
+                ThreadPoolExecutor(max_workers=1) as page_executor,
+                ThreadPoolExecutor(max_workers=config.FIRESTORE_WRITE_CONCURRENCY) as commit_executor,
+            ):
+                next_page = page_executor.submit(self._get_document_key_page, sub_collection_ref)
 
-            while True:
-
-                if cursor:
-                    docs = list(sub_collection_ref
-                                .limit(limit)
-                                .order_by("__name__")
-                                .start_after(cursor)
-                                .stream())
-
-                else:
-                    docs = list(sub_collection_ref
-                                .limit(limit)
-                                .order_by("__name__")
-                                .stream())
-
-                if not docs:
-                    break
+                while next_page is not None:
+                    docs = next_page.result()
 
-                for doc in docs:
-                    doc_size_bytes = ByteConversionService.get_serialized_size(doc.to_dict())
+                    # A short page is the last, otherwise the next page is prefetched while this one is deleted
+                    next_page = None
+                    if len(docs) == self.KEYS_ONLY_PAGE_SIZE:
+                        next_page = page_executor.submit(self._get_document_key_page, sub_collection_ref, docs[-1])
 
-                    if batch_size_bytes + doc_size_bytes >= self.MAX_BATCH_SIZE_BYTES:
-                        batch.commit()
+                    for doc_references, _ in self.batch_planner.iter_batches(self._size_delete_writes(docs)):
                         batch = self.client.batch()
-                        batch_size_bytes = 0
 
-                    batch.delete(doc.reference)
-                    batch_size_bytes += doc_size_bytes
+                        for doc_reference in doc_references:
+                            batch.delete(doc_reference)
 
-                cursor = docs[-1]
+                        commits_in_flight, acknowledged_deletes = self._submit_batch_commit(
+                            commit_executor, commits_in_flight, batch
+                        )
+                        deleted_count += acknowledged_deletes
 
-            if batch_size_bytes > 0:
-                batch.commit()
+                for commit in commits_in_flight:
+                    deleted_count += len(commit.result())
+
+            logger.info(
+                f"Deleted {deleted_count} documents from sub collection {sub_collection_ref.id} "
+                f"in {time.perf_counter() - start_time:.2f}s."
+            )
 
         except Exception as exc:
             logger.error(f"Error deleting sub collection in batches: {exc}")
             raise RuntimeError("Error deleting sub collection in batches.") from exc
 
+    def _size_delete_writes(
+        self, docs: list[firestore.DocumentSnapshot]
+    ) -> Iterator[tuple[firestore.DocumentReference, int]]:
+        """
+        Lazily pairs each document reference with the size in bytes of its delete, which carries only the
+        document name.
+
+        Parameters:
+        docs (list[firestore.DocumentSnapshot]): The documents being deleted
+        """
+        for doc in docs:
+            yield doc.reference, ByteConversionService.get_firestore_document_name_size(doc.reference.path)
+
+    def _get_document_key_page(
+        self,
+        collection_ref: firestore.CollectionReference,
+        cursor: firestore.DocumentSnapshot | None = None,
+    ) -> list[firestore.DocumentSnapshot]:
+        """
+        Gets a keys-only page of the documents in a collection, so that only document names are downloaded.
+        Paging prevents 530 query timed out errors when the number of documents is too large.
+
+        Parameters:
+        collection_ref (firestore.CollectionReference): The reference to the collection
+        cursor (firestore.DocumentSnapshot | None): The last document of the previous page, if any
+        """
+        query = collection_ref.select([]).order_by("__name__").limit(self.KEYS_ONLY_PAGE_SIZE)
+
+        if cursor:
+            query = query.start_after(cursor)
+
+        return list(query.stream())
+
     def get_unit_supplementary_data(
         self, dataset_id: str, identifier: str
     ) -> UnitDataset:
@@ -191,47 +503,65 @@ class DatasetFirebaseRepository:
         )
 
     def get_number_of_unit_supplementary_data_with_dataset_id(
-        self, dataset_id: str, cursor=None
+        self, dataset_id: str, use_aggregation: bool = True
     ) -> int:
         """
         Get the number of unit supplementary data associated with a dataset id.
-        This function use a cursor to create a snapshot of unit data and aggregate
-        the count. This is to prevent 530 query timed out error when the number of
-        unit data is too large.
+        By default this uses a server-side count aggregation, so no documents are downloaded.
+        If aggregation is not used or fails, the count falls back to paging through the document keys.
 
         Parameters:
         dataset_id (str): The unique id of the dataset
+        use_aggregation (bool): Whether to count using a server-side count aggregation
 
         Returns:
         int: The number of unit supplementary data associated with the dataset id
         """
-        limit = 1000
-        count = 0
-
         collection_ref = self.dataset_collection.document(dataset_id).collection(
             "units"
         )
 
+        if use_aggregation:
+            try:
+                return self._count_documents_with_aggregation(collection_ref)
+            except Exception as exc:
+                logger.warning(f"Count aggregation failed, counting document keys instead: {exc}")
+
+        return self._count_documents_by_keys(collection_ref)
+
+    def _count_documents_with_aggregation(
+        self, collection_ref: firestore.CollectionReference
+    ) -> int:
+        """
+        Counts the documents in a collection with a server-side count aggregation query.
+
+        Parameters:
+        collection_ref (firestore.CollectionReference): The reference to the collection
+        """
+        aggregation_results = collection_ref.count(alias="unit_count").get()
+
+        return int(aggregation_results[0][0].value)
+
+    def _count_documents_by_keys(
+        self, collection_ref: firestore.CollectionReference
+    ) -> int:
+        """
+        Counts the documents in a collection with a cursor over keys-only pages, so that only
+        document names are downloaded.
+
+        Parameters:
+        collection_ref (firestore.CollectionReference): The reference to the collection
+        """
+        count = 0
+        cursor = None
+
         while True:
-            # Frees memory incurred in the recursion algorithm
-            docs = []
-
-            if cursor:
-                docs = list(collection_ref
-                            .limit(limit)
-                            .order_by("__name__")
-                            .start_after(cursor)
-                            .stream())
-            else:
-                docs = list(collection_ref
-                            .limit(limit)
-                            .order_by("__name__")
-                            .stream())
+            docs = self._get_document_key_page(collection_ref, cursor)
 
             count = count + len(docs)
 
-            if len(docs) == limit:
-                cursor = docs[limit - 1]
+            if len(docs) == self.KEYS_ONLY_PAGE_SIZE:
+                cursor = docs[-1]
                 continue
 
             break
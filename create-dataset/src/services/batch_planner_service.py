@@ -0,0 +1,46 @@
+from typing import Iterable, Iterator, TypeVar
+
+Write = TypeVar("Write")
+
+
+class BatchPlannerService:
+    """
+    Groups Firestore writes into batches so that no batch commit exceeds either
+    the byte limit or the write count limit. Writes are grouped as they are consumed,
+    so unit data can be planned while it is streamed.
+    """
+
+    def __init__(self, max_batch_size_bytes: int, max_batch_writes: int):
+        self.max_batch_size_bytes = max_batch_size_bytes
+        self.max_batch_writes = max_batch_writes
+
+    def iter_batches(
+        self, sized_writes: Iterable[tuple[Write, int]]
+    ) -> Iterator[tuple[list[Write], int]]:
+        """
+        Groups writes into batches as they are consumed.
+
+        Parameters:
+        sized_writes (Iterable[tuple[Write, int]]): pairs of write and its size in bytes.
+
+        Returns:
+        Iterator[tuple[list[Write], int]]: each batch of writes with its total size in bytes.
+        """
+        batch = []
+        batch_size_bytes = 0
+
+        for write, write_size_bytes in sized_writes:
+            if batch and (
+                batch_size_bytes + write_size_bytes > self.max_batch_size_bytes
+                or len(batch) >= self.max_batch_writes
+            ):
+                yield batch, batch_size_bytes
+                batch = []
+                batch_size_bytes = 0
+
+            batch.append(write)
+            batch_size_bytes += write_size_bytes
+
+        if batch:
+            yield batch, batch_size_bytes
+
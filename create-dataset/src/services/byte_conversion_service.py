@@ -1,17 +1,99 @@
-import json
+from datetime import datetime
 
 
 class ByteConversionService:
+    # Fixed overheads from https://cloud.google.com/firestore/docs/storage-size
+    DOCUMENT_NAME_OVERHEAD_BYTES = 16
+    DOCUMENT_OVERHEAD_BYTES = 32
+
     @staticmethod
-    def get_serialized_size(obj) -> int:
+    def get_firestore_document_size(document_path: str, document_data: dict) -> int:
         """
-        Calculate the size of serialized object in bytes.
+        Calculate the size of a document in bytes using Firestore's storage size rules.
 
         Parameters:
-        obj (Any): The object to be serilaized and measured
+        document_path (str): The slash separated path of the document, e.g. 'datasets/{id}/units/{identifier}'
+        document_data (dict): The fields of the document
 
         Returns:
-        int: The size of the serialized object in bytes
+        int: The size of the document in bytes
+        """
+        return (
+            ByteConversionService.get_firestore_document_name_size(document_path)
+            + ByteConversionService.get_firestore_value_size(document_data)
+            + ByteConversionService.DOCUMENT_OVERHEAD_BYTES
+        )
+
+    @staticmethod
+    def get_firestore_document_name_size(document_path: str) -> int:
         """
-        serialized_obj = json.dumps(obj)
-        return len(serialized_obj.encode('utf-8'))
+        Calculate the size of a document name in bytes using Firestore's storage size rules, which is all a
+        delete write carries.
+
+        Parameters:
+        document_path (str): The slash separated path of the document
+
+        Returns:
+        int: The size of the document name in bytes
+        """
+        return (
+            sum(ByteConversionService.get_firestore_string_size(path_segment) for path_segment in document_path.split("/"))
+            + ByteConversionService.DOCUMENT_NAME_OVERHEAD_BYTES
+        )
+
+    @staticmethod
+    def get_firestore_string_size(value: str) -> int:
+        """
+        Calculate the size of a string in bytes using Firestore's storage size rules, without encoding ASCII strings.
+
+        Parameters:
+        value (str): The string being measured
+
+        Returns:
+        int: The number of UTF-8 encoded bytes plus 1
+        """
+        if value.isascii():
+            return len(value) + 1
+
+        return len(value.encode("utf-8")) + 1
+
+    @staticmethod
+    def get_firestore_value_size(value) -> int:
+        """
+        Calculate the size of a field value in bytes using Firestore's storage size rules.
+        Maps are measured as the sum of their field name and value sizes, and arrays as the sum of their values.
+
+        Parameters:
+        value (Any): The value being measured
+
+        Returns:
+        int: The size of the value in bytes
+        """
+        size = 0
+        pending_values = [value]
+
+        # Dispatching on the exact type is considerably cheaper than an isinstance chain per value
+        while pending_values:
+            value = pending_values.pop()
+            value_type = type(value)
+
+            if value_type is str:
+                size += ByteConversionService.get_firestore_string_size(value)
+            elif value_type is dict:
+                for field_name in value:
+                    size += ByteConversionService.get_firestore_string_size(field_name)
+                pending_values.extend(value.values())
+            elif value_type is int or value_type is float:
+                size += 8
+            elif value_type is list or value_type is tuple:
+                pending_values.extend(value)
+            elif value is None or value_type is bool:
+                size += 1
+            elif isinstance(value, datetime):
+                size += 8
+            elif isinstance(value, bytes):
+                size += len(value)
+            else:
+                raise TypeError(f"Cannot calculate Firestore size of type {value_type.__name__}")
+
+        return size
@@ -1,38 +1,164 @@
+from datetime import datetime
+from json import JSONDecodeError
+from typing import Iterator
+
 from config.config import config
 from config.logging_config import logging
+from google.cloud import exceptions
 from models.dataset_models import RawDataset
 from repository.dataset_bucket_repository import DatasetBucketRepository
+from repository.dataset_file_queue_repository import DatasetFileQueueRepository
 from services.dataset_validator_service import DatasetValidatorService
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
 
 class DatasetBucketService:
+    # Keys needed to transform unit data, so must be read before the unit data is streamed
+    STREAMED_HEADER_KEYS = ["survey_id", "period_id", "form_types"]
+
     def __init__(self):
         self.dataset_bucket_repository = DatasetBucketRepository()
+        self.dataset_file_queue_repository = (
+            DatasetFileQueueRepository() if config.USE_DATASET_FILE_QUEUE is True else None
+        )
 
-    def get_and_validate_dataset(self, filename: str) -> RawDataset:
+    def get_and_validate_dataset(self, filename: str, autodelete_valid_file: bool = True) -> RawDataset | None:
         """
-        Validates and retrieves create-dataset from bucket
+        Validates and retrieves create-dataset from bucket, returning None if the file is no longer in the bucket
         Parameters:
         filename: name of file being retrieved from bucket
+        autodelete_valid_file: whether a valid file is deleted once retrieved, rather than by the caller after processing
         """
-        is_valid, message = DatasetValidatorService.validate_file_is_json(filename)
+        with stage_timing_service.time_stage("validation"):
+            is_valid, message = DatasetValidatorService.validate_file_extension(filename)
         if not is_valid:
-            if config.AUTODELETE_DATASET_BUCKET_FILE is True:
-                self.try_delete_bucket_file(filename)
+            self.try_autodelete_bucket_file(filename)
 
             raise RuntimeError(message)
 
-        raw_dataset = self.dataset_bucket_repository.get_dataset_file_as_json(filename)
+        # Downloading the file is timed as its own stage within parsing it
+        try:
+            with stage_timing_service.time_stage("parse"):
+                raw_dataset, decode_error = self._try_get_dataset_file_as_json(filename)
+        except exceptions.NotFound:
+            self.remove_missing_file(filename)
+            return None
 
-        if config.AUTODELETE_DATASET_BUCKET_FILE is True:
-            self.try_delete_bucket_file(filename)
+        if autodelete_valid_file:
+            self.try_autodelete_bucket_file(filename)
+
+        is_valid, message = DatasetValidatorService.validate_file_content_is_json(decode_error)
+        if not is_valid:
+            if not autodelete_valid_file:
+                self.try_autodelete_bucket_file(filename)
+
+            raise RuntimeError(message) from decode_error
+
+        try:
+            with stage_timing_service.time_stage("validation"):
+                DatasetValidatorService.validate_raw_dataset(raw_dataset)
+        except RuntimeError:
+            if not autodelete_valid_file:
+                self.try_autodelete_bucket_file(filename)
+            raise
+
+        return raw_dataset
+
+    def get_and_validate_streamed_dataset(self, filename: str) -> RawDataset | None:
+        """
+        Validates and streams create-dataset from bucket, with the unit data under 'data' read lazily
+        as it is consumed. The bucket file is still being read when this returns, so it is only deleted
+        here if validation fails; otherwise the caller deletes it once processing has finished.
+        Returns None if the file is no longer in the bucket.
+        Parameters:
+        filename: name of file being streamed from bucket
+        """
+        with stage_timing_service.time_stage("validation"):
+            is_valid, message = DatasetValidatorService.validate_file_extension(filename)
+        if not is_valid:
+            self.try_autodelete_bucket_file(filename)
+
+            raise RuntimeError(message)
+
+        try:
+            with stage_timing_service.time_stage("parse"):
+                raw_dataset = self.dataset_bucket_repository.stream_dataset_file_as_json(
+                    filename, self.STREAMED_HEADER_KEYS
+                )
+        except exceptions.NotFound:
+            self.remove_missing_file(filename)
+            return None
+        except JSONDecodeError as exc:
+            _, message = DatasetValidatorService.validate_file_content_is_json(exc)
+            self.try_autodelete_bucket_file(filename)
+
+            raise RuntimeError(message) from exc
 
-        DatasetValidatorService.validate_raw_dataset(raw_dataset)
+        try:
+            with stage_timing_service.time_stage("validation"):
+                DatasetValidatorService.validate_raw_dataset(raw_dataset)
+        except RuntimeError:
+            self.try_autodelete_bucket_file(filename)
+            raise
+
+        if "data" in raw_dataset:
+            raw_dataset["data"] = self._validate_streamed_unit_data(raw_dataset["data"])
 
         return raw_dataset
 
+    def _validate_streamed_unit_data(self, unit_data: Iterator[object]) -> Iterator[object]:
+        """
+        Yields the streamed unit data, raising a decode error met while reading it as a file content error,
+        as when the dataset metadata could not be decoded. The caller deletes the bucket file once this raises.
+        Parameters:
+        unit_data: the lazily read unit data of the streamed create-dataset
+        """
+        try:
+            yield from unit_data
+        except JSONDecodeError as exc:
+            _, message = DatasetValidatorService.validate_file_content_is_json(exc)
+
+            raise RuntimeError(message) from exc
+
+    def _try_get_dataset_file_as_json(
+        self, filename: str
+    ) -> tuple[RawDataset | None, JSONDecodeError | None]:
+        """
+        Fetches and decodes create-dataset from bucket once, returning the decode error rather than raising it
+        so the outcome can be validated after the bucket file is deleted.
+        Parameters:
+        filename: name of file being retrieved from bucket
+        """
+        try:
+            return self.dataset_bucket_repository.get_dataset_file_as_json(filename), None
+        except JSONDecodeError as exc:
+            return None, exc
+
+    def remove_missing_file(self, filename: str) -> None:
+        """
+        Removes a file that is no longer in the bucket, such as one deleted after it was queued, from the
+        queue of pending files, so that it does not stay at the head of the queue and block the files after it.
+        Parameters:
+        filename: name of the file missing from the bucket
+        """
+        logger.warning(f"Create-dataset file {filename} is no longer in the bucket. File is skipped.")
+
+        if self.dataset_file_queue_repository is not None:
+            self.try_remove_pending_file(filename)
+
+    def try_autodelete_bucket_file(self, filename) -> None:
+        """
+        Deletes a file from the bucket if auto deletion of bucket files is enabled.
+        The file is removed from the queue of pending files either way, so it is not picked up again.
+        """
+        if self.dataset_file_queue_repository is not None:
+            self.try_remove_pending_file(filename)
+
+        if config.AUTODELETE_DATASET_BUCKET_FILE is True:
+            self.try_delete_bucket_file(filename)
+
     def try_delete_bucket_file(self, filename) -> None:
         """
         Tries to delete a file from the bucket, raises an error on failure.
@@ -45,13 +171,60 @@ class DatasetBucketService:
             )
             raise RuntimeError("Failed to delete file from create-dataset bucket.") from exc
 
+    def try_register_pending_file(self, filename: str, updated: datetime) -> None:
+        """
+        Adds a file uploaded to the bucket to the queue of pending files, raising an error on failure.
+        Parameters:
+        filename: name of the file uploaded to the bucket
+        updated: the time the file was last modified in the bucket
+        """
+        try:
+            self.dataset_file_queue_repository.add_pending_file(filename, updated)
+        except Exception as exc:
+            logger.debug(f"Failed to add file {filename} to the pending file queue with error: {exc}")
+            raise RuntimeError("Failed to add file to the pending create-dataset file queue.") from exc
+
+    def try_backfill_pending_files(self) -> int:
+        """
+        Adds every file already in the bucket to the queue of pending files, for files uploaded before
+        register_dataset_file was deployed. A file that is already queued keeps the same entry.
+        Returns:
+        int: the number of files added to the queue.
+        """
+        try:
+            bucket_files = list(self.dataset_bucket_repository.list_bucket_files())
+        except Exception as exc:
+            logger.debug(f"Failed to list files in bucket {config.DATASET_BUCKET_NAME} with error: {exc}")
+            raise RuntimeError("Failed to list files in create-dataset bucket.") from exc
+
+        for filename, updated in bucket_files:
+            self.try_register_pending_file(filename, updated)
+
+        return len(bucket_files)
+
+    def try_remove_pending_file(self, filename: str) -> None:
+        """
+        Removes a file from the queue of pending files, raising an error on failure.
+        Parameters:
+        filename: name of the file in the bucket
+        """
+        try:
+            self.dataset_file_queue_repository.remove_pending_file(filename)
+        except Exception as exc:
+            logger.debug(f"Failed to remove file {filename} from the pending file queue with error: {exc}")
+            raise RuntimeError("Failed to remove file from the pending create-dataset file queue.") from exc
+
     def try_fetch_oldest_filename_from_bucket(self) -> str | None:
         """
-        Fetches the first filename from the bucket.
+        Fetches the first filename from the bucket, using the queue of pending files when
+        USE_DATASET_FILE_QUEUE is enabled rather than listing the bucket.
         Returns:
         str: filename from the bucket.
         """
         try:
+            if self.dataset_file_queue_repository is not None:
+                return self.dataset_file_queue_repository.fetch_oldest_pending_filename()
+
             filename = (
                 self.dataset_bucket_repository.fetch_oldest_filename_from_bucket()
             )
@@ -62,4 +235,25 @@ class DatasetBucketService:
             logger.debug(
                 f"Failed to fetch first filename from bucket {config.DATASET_BUCKET_NAME} with error: {exc}"
             )
-            raise RuntimeError("Failed to fetch first filename from create-dataset bucket.") from exc
\ No newline at end of file
+            raise RuntimeError("Failed to fetch first filename from create-dataset bucket.") from exc
+
+    def try_fetch_oldest_filenames_from_bucket(self, limit: int) -> list[str]:
+        """
+        Fetches up to limit filenames from the bucket, oldest first, using the queue of pending files when
+        USE_DATASET_FILE_QUEUE is enabled rather than listing the bucket.
+        Parameters:
+        limit: maximum number of filenames to fetch.
+        Returns:
+        list[str]: filenames from the bucket.
+        """
+        try:
+            if self.dataset_file_queue_repository is not None:
+                return self.dataset_file_queue_repository.fetch_oldest_pending_filenames(limit)
+
+            return self.dataset_bucket_repository.fetch_oldest_filenames_from_bucket(limit)
+
+        except Exception as exc:
+            logger.debug(
+                f"Failed to fetch filenames from bucket {config.DATASET_BUCKET_NAME} with error: {exc}"
+            )
+            raise RuntimeError("Failed to fetch filenames from create-dataset bucket.") from exc
\ No newline at end of file
@@ -0,0 +1,236 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from config.config import config
+from config.logging_config import logging
+from models.dataset_models import RawDataset
+from services.dataset_bucket_service import DatasetBucketService
+from services.dataset_processor_service import DatasetProcessorService
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetIngestService:
+    def __init__(self):
+        # Mark the start time of the invocation, against which the PROCESS_TIMEOUT budget is measured
+        self.start_time = time.time()
+        # Whether the unit data of each file is streamed as it is processed, rather than loaded up front
+        self.is_streamed = config.STREAM_DATASET_FILE is True
+
+    def load_dataset_file(self, filename: str) -> RawDataset | None:
+        """
+        Validates and retrieves a create-dataset file from the bucket, streaming its unit data
+        if STREAM_DATASET_FILE is enabled or the bucket is being drained.
+        Parameters:
+        filename (str): name of the file being retrieved from the bucket.
+
+        Returns:
+        RawDataset | None: the create-dataset, or None if the file is no longer in the bucket.
+        """
+        if self.is_streamed:
+            raw_dataset = DatasetBucketService().get_and_validate_streamed_dataset(filename)
+
+            if raw_dataset is not None:
+                logger.info("Dataset stream opened from bucket successfully.")
+
+            return raw_dataset
+
+        # A resumable file is kept in the bucket until it has been processed, in case it is stopped at the deadline
+        raw_dataset = DatasetBucketService().get_and_validate_dataset(
+            filename, config.RESUMABLE_DATASET_INGEST is not True
+        )
+
+        if raw_dataset is None:
+            return None
+
+        logger.info("Dataset obtained from bucket successfully.")
+        logger.debug(f"Dataset: {raw_dataset}")
+
+        return raw_dataset
+
+    def process_dataset_file(self, filename: str, raw_dataset: RawDataset) -> bool:
+        """
+        Processes a create-dataset file retrieved from the bucket. A streamed or resumable file is deleted from
+        the bucket once processing has finished, as it is still needed until then. With RESUMABLE_DATASET_INGEST
+        enabled, processing stops at the PROCESS_TIMEOUT deadline and the file is kept to be resumed.
+        Parameters:
+        filename (str): name of the file the create-dataset was retrieved from.
+        raw_dataset (RawDataset): the create-dataset retrieved from the bucket.
+
+        Returns:
+        bool: whether the file was completely processed, rather than stopped at the deadline.
+        """
+        if not self.is_streamed and config.RESUMABLE_DATASET_INGEST is not True:
+            return DatasetProcessorService().process_raw_dataset(filename, raw_dataset)
+
+        # Unit writes stop early enough to leave DATASET_COMPLETION_MARGIN for completing and publishing the dataset
+        deadline = (
+            self.start_time + config.PROCESS_TIMEOUT - config.DATASET_COMPLETION_MARGIN
+            if config.RESUMABLE_DATASET_INGEST is True
+            else None
+        )
+
+        try:
+            if self.is_streamed:
+                is_complete = DatasetProcessorService().process_streamed_raw_dataset(filename, raw_dataset, deadline)
+            else:
+                is_complete = DatasetProcessorService().process_raw_dataset(filename, raw_dataset, deadline)
+        except Exception:
+            DatasetBucketService().try_autodelete_bucket_file(filename)
+            raise
+
+        if is_complete:
+            DatasetBucketService().try_autodelete_bucket_file(filename)
+
+        return is_complete
+
+    def drain_dataset_files(self) -> tuple[int, int]:
+        """
+        Processes create-dataset files from the bucket, oldest first, until none are left or another
+        round would not finish within the PROCESS_TIMEOUT budget. Each round takes up to
+        DATASET_DRAIN_CONCURRENCY files and retrieves them concurrently. Files for different survey
+        and period ids are processed concurrently, while files for the same survey and period id are
+        processed one after another in the order they were uploaded, so their sds_dataset_version
+        is assigned in that order. With RESUMABLE_DATASET_INGEST enabled, draining stops once a file
+        is stopped at the deadline. Drained files are always streamed, so that a round only holds the
+        metadata of its files up front rather than the unit data of up to DATASET_DRAIN_CONCURRENCY files.
+
+        Returns:
+        tuple[int, int]: the number of files processed successfully and the number that failed.
+        """
+        self.is_streamed = True
+
+        processed_count = 0
+        failed_count = 0
+        claimed_filenames = set()
+        longest_round_seconds = 0.0
+
+        with (
+            ThreadPoolExecutor(max_workers=config.DATASET_DRAIN_CONCURRENCY) as load_executor,
+            ThreadPoolExecutor(max_workers=config.DATASET_DRAIN_CONCURRENCY) as process_executor,
+        ):
+            while self._has_time_for_round(longest_round_seconds):
+                round_start_time = time.time()
+
+                filenames = [
+                    filename
+                    for filename in DatasetBucketService().try_fetch_oldest_filenames_from_bucket(
+                        config.DATASET_DRAIN_CONCURRENCY + len(claimed_filenames)
+                    )
+                    if filename not in claimed_filenames
+                ][:config.DATASET_DRAIN_CONCURRENCY]
+
+                if not filenames:
+                    logger.info("No create-dataset files left in bucket.")
+                    break
+
+                claimed_filenames.update(filenames)
+
+                process_tasks, load_failed_count = self._dispatch_round(
+                    load_executor, process_executor, filenames
+                )
+                failed_count += load_failed_count
+
+                is_deadline_reached = False
+                for filename, process_task in process_tasks:
+                    if not self._is_task_successful(filename, process_task):
+                        failed_count += 1
+                    elif process_task.result():
+                        processed_count += 1
+                    else:
+                        is_deadline_reached = True
+                        logger.info(f"Create-dataset file {filename} stopped at the deadline and will be resumed.")
+
+                if is_deadline_reached:
+                    break
+
+                longest_round_seconds = max(longest_round_seconds, time.time() - round_start_time)
+
+        return processed_count, failed_count
+
+    def _dispatch_round(
+        self,
+        load_executor: ThreadPoolExecutor,
+        process_executor: ThreadPoolExecutor,
+        filenames: list[str],
+    ) -> tuple[list[tuple[str, Future]], int]:
+        """
+        Retrieves a round of files concurrently, then submits each for processing behind the
+        previous file in the round with the same survey and period id.
+        Parameters:
+        load_executor (ThreadPoolExecutor): executor retrieving the files from the bucket.
+        process_executor (ThreadPoolExecutor): executor processing the retrieved files.
+        filenames (list[str]): the files in the round, oldest first.
+
+        Returns:
+        tuple[list[tuple[str, Future]], int]: each filename with its processing task, and the number of
+        files that failed to be retrieved.
+        """
+        load_tasks = [load_executor.submit(self.load_dataset_file, filename) for filename in filenames]
+        previous_tasks: dict[tuple[str, str], Future] = {}
+        process_tasks = []
+        load_failed_count = 0
+
+        # Tasks are dispatched in upload order, so the previous task for a survey and period id is always older
+        for filename, load_task in zip(filenames, load_tasks):
+            if not self._is_task_successful(filename, load_task):
+                load_failed_count += 1
+                continue
+
+            raw_dataset = load_task.result()
+
+            # The file is no longer in the bucket, and has been removed from the queue of pending files
+            if raw_dataset is None:
+                continue
+
+            survey_period = (raw_dataset["survey_id"], raw_dataset["period_id"])
+
+            process_task = process_executor.submit(
+                self._process_dataset_file_after,
+                previous_tasks.get(survey_period),
+                filename,
+                raw_dataset,
+            )
+            previous_tasks[survey_period] = process_task
+            process_tasks.append((filename, process_task))
+
+        return process_tasks, load_failed_count
+
+    def _process_dataset_file_after(
+        self, previous_task: Future | None, filename: str, raw_dataset: RawDataset
+    ) -> bool:
+        """
+        Processes a create-dataset file once the previous task for the same survey and period id has finished,
+        whether or not it succeeded.
+        Parameters:
+        previous_task (Future | None): the processing task for the previous file with the same survey and period id.
+        filename (str): name of the file the create-dataset was retrieved from.
+        raw_dataset (RawDataset): the create-dataset retrieved from the bucket.
+        """
+        if previous_task is not None:
+            wait([previous_task])
+
+        return self.process_dataset_file(filename, raw_dataset)
+
+    def _is_task_successful(self, filename: str, task: Future) -> bool:
+        """
+        Waits for a task on a file to finish, logging the error if it failed.
+        Parameters:
+        filename (str): name of the file the task was for.
+        task (Future): the task being checked.
+        """
+        exc = task.exception()
+
+        if exc is not None:
+            logger.error(f"Failed to process create-dataset file {filename}: {exc}")
+            return False
+
+        return True
+
+    def _has_time_for_round(self, longest_round_seconds: float) -> bool:
+        """
+        Checks if a round as long as the longest so far would finish within the PROCESS_TIMEOUT budget.
+        Parameters:
+        longest_round_seconds (float): duration of the longest round so far.
+        """
+        return time.time() - self.start_time + longest_round_seconds < config.PROCESS_TIMEOUT
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import Iterable, Iterator
 
 from config.config import config
 from config.logging_config import logging
@@ -10,9 +11,10 @@ from models.dataset_models import (
     RawDatasetWithoutData,
     UnitDataset,
 )
+from repository.dataset_checkpoint_repository import DatasetCheckpointRepository
 from repository.dataset_firebase_repository import DatasetFirebaseRepository
 from services.dataset_writer_service import DatasetWriterService
-from services.document_version_service import DocumentVersionService
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
@@ -21,45 +23,197 @@ class DatasetProcessorService:
     def __init__(self) -> None:
         self.dataset_repository = DatasetFirebaseRepository()
         self.dataset_writer_service = DatasetWriterService(self.dataset_repository)
+        self.dataset_checkpoint_repository = DatasetCheckpointRepository()
 
-    def process_raw_dataset(self, filename: str, raw_dataset: RawDataset) -> None:
+    def process_raw_dataset(self, filename: str, raw_dataset: RawDataset, deadline: float | None = None) -> bool:
         """
         Processes the incoming create-dataset.
         Parameters:
         filename (str): the filename of the json containing the create-dataset data
         raw_dataset (RawDatasetWithMetadata): new create-dataset to be processed
+        deadline (float | None): if given, the time after which the write stops to be resumed from a checkpoint
+
+        Returns:
+        bool: whether the create-dataset was completed, rather than stopped at the deadline
         """
         logger.info("Processing new create-dataset...")
         logger.debug(f"Dataset being processed: {raw_dataset}")
 
-        new_dataset_unit_data_collection = raw_dataset.pop("data")
+        return self._process_dataset_unit_data(filename, raw_dataset, raw_dataset.pop("data"), deadline)
+
+    def process_streamed_raw_dataset(
+            self, filename: str, raw_dataset: RawDataset, deadline: float | None = None
+    ) -> bool:
+        """
+        Processes the incoming create-dataset with its unit data streamed, so that each unit is transformed
+        and written as it is read rather than the whole collection being held in memory.
+        Parameters:
+        filename (str): the filename of the json containing the create-dataset data
+        raw_dataset (RawDataset): new create-dataset to be processed, with 'data' as an iterator of unit data
+        deadline (float | None): if given, the time after which the write stops to be resumed from a checkpoint
+
+        Returns:
+        bool: whether the create-dataset was completed, rather than stopped at the deadline
+        """
+        logger.info("Processing new streamed create-dataset...")
+
+        return self._process_dataset_unit_data(filename, raw_dataset, raw_dataset.pop("data"), deadline)
+
+    def _process_dataset_unit_data(
+            self,
+            filename: str,
+            raw_dataset: RawDatasetWithoutData,
+            raw_dataset_unit_data: Iterable[object],
+            deadline: float | None,
+    ) -> bool:
+        """
+        Transforms the unit data of a create-dataset as it is written, then publishes the new create-dataset.
+        Parameters:
+        filename (str): the filename of the json containing the create-dataset data
+        raw_dataset (RawDatasetWithoutData): the create-dataset without the data object
+        raw_dataset_unit_data (Iterable[object]): the unit data of the create-dataset, either a list or a stream
+        deadline (float | None): if given, the time after which the write stops to be resumed from a checkpoint
+        """
+        if deadline is not None:
+            return self._process_resumable_dataset_unit_data(filename, raw_dataset, raw_dataset_unit_data, deadline)
+
         dataset_id = str(uuid.uuid4())
 
         dataset_metadata_without_id = self._add_metadata_to_new_dataset(
-            raw_dataset, filename, new_dataset_unit_data_collection
-        )
-        unit_data_collection_with_metadata = self._add_metadata_to_unit_data_collection(
-            dataset_id, dataset_metadata_without_id, new_dataset_unit_data_collection
+            raw_dataset, filename, 0
         )
-        extracted_unit_data_identifiers = self._extract_identifiers_from_unit_data(
-            new_dataset_unit_data_collection
+        unit_data_with_identifiers = stage_timing_service.time_iterable(
+            "transform",
+            self._transform_unit_data_with_identifiers(
+                dataset_id, dataset_metadata_without_id, raw_dataset, raw_dataset_unit_data
+            ),
         )
 
         dataset_publish_response = self.dataset_writer_service.perform_dataset_write(
             dataset_id,
             dataset_metadata_without_id,
-            unit_data_collection_with_metadata,
-            extracted_unit_data_identifiers,
+            unit_data_with_identifiers,
+        )
+
+        self._publish_and_determine_deletion_of_previous_version_dataset(
+            dataset_publish_response
+        )
+
+        return True
+
+    def _process_resumable_dataset_unit_data(
+            self,
+            filename: str,
+            raw_dataset: RawDatasetWithoutData,
+            raw_dataset_unit_data: Iterable[object],
+            deadline: float,
+    ) -> bool:
+        """
+        Transforms and writes the unit data of a create-dataset until the deadline, continuing from the checkpoint
+        of the file if an earlier invocation stopped partway through. If the deadline is reached the checkpoint
+        records the units written so far, otherwise the create-dataset is completed and published.
+        Unit writes are idempotent, so units written after the last checkpoint are safely written again on resume.
+        Parameters:
+        filename (str): the filename of the json containing the create-dataset data
+        raw_dataset (RawDatasetWithoutData): the create-dataset without the data object
+        raw_dataset_unit_data (Iterable[object]): the unit data of the create-dataset, either a list or a stream
+        deadline (float): the time, in seconds since the epoch, after which no more unit data batches are started
+        """
+        checkpoint = self.dataset_checkpoint_repository.get_checkpoint(filename)
+
+        if checkpoint is None:
+            dataset_id = str(uuid.uuid4())
+            dataset_metadata_without_id = self._add_metadata_to_new_dataset(raw_dataset, filename, 0)
+            checkpoint = {
+                "filename": filename,
+                "dataset_id": dataset_id,
+                "sds_dataset_version": dataset_metadata_without_id["sds_dataset_version"],
+                "unit_offset": 0,
+                "dataset_metadata": dataset_metadata_without_id,
+            }
+            self.dataset_checkpoint_repository.save_checkpoint(checkpoint)
+        else:
+            logger.info(
+                f"Resuming create-dataset {checkpoint['dataset_id']} version {checkpoint['sds_dataset_version']} "
+                f"from unit {checkpoint['unit_offset']}..."
+            )
+
+        unit_data_with_identifiers = stage_timing_service.time_iterable(
+            "transform",
+            self._transform_unit_data_with_identifiers(
+                checkpoint["dataset_id"],
+                checkpoint["dataset_metadata"],
+                raw_dataset,
+                raw_dataset_unit_data,
+                checkpoint["unit_offset"],
+            ),
         )
 
-        self.dataset_writer_service.try_publish_dataset_metadata_to_topic(
+        try:
+            acknowledged_write_count, is_complete = self.dataset_writer_service.perform_resumable_unit_data_write(
+                checkpoint["dataset_id"], unit_data_with_identifiers, deadline
+            )
+            checkpoint["unit_offset"] += acknowledged_write_count
+
+            if not is_complete:
+                self.dataset_checkpoint_repository.save_checkpoint(checkpoint)
+                logger.info(
+                    f"Deadline reached with {checkpoint['unit_offset']} units written. "
+                    f"Create-dataset will resume from checkpoint."
+                )
+                return False
+
+            dataset_publish_response = self.dataset_writer_service.complete_resumable_dataset_write(
+                checkpoint["dataset_id"], checkpoint["dataset_metadata"], checkpoint["unit_offset"]
+            )
+        except Exception:
+            # A failed create-dataset is not resumed, so the next attempt at the file starts again
+            self.dataset_checkpoint_repository.delete_checkpoint(filename)
+            raise
+
+        self.dataset_checkpoint_repository.delete_checkpoint(filename)
+
+        self._publish_and_determine_deletion_of_previous_version_dataset(
             dataset_publish_response
         )
 
+        return True
+
+    def _publish_and_determine_deletion_of_previous_version_dataset(
+            self, dataset_publish_response: DatasetMetadata
+    ) -> None:
+        """
+        Records the version of the written create-dataset as published, then publishes its metadata and determines
+        whether to delete its previous version. A version that completes after a later version has been published
+        is not published, so that subscribers are never told of a superseded create-dataset after the later one.
+        Parameters:
+        dataset_publish_response (DatasetMetadata): metadata of the written create-dataset
+        """
+        current_dataset_version = dataset_publish_response["sds_dataset_version"]
+
+        # The published version is recorded regardless of the retention flag, so the counter stays current
+        previous_dataset_version_from_firestore = self.dataset_repository.record_published_dataset_version(
+            dataset_publish_response["survey_id"],
+            dataset_publish_response["period_id"],
+            current_dataset_version,
+        )
+
+        if previous_dataset_version_from_firestore >= current_dataset_version:
+            logger.warning(
+                f"A later create-dataset version has already been published."
+                f" Current version: '{current_dataset_version}' Published version in FireStore:"
+                f" '{previous_dataset_version_from_firestore}'. Current version is not published."
+            )
+        else:
+            self.dataset_writer_service.try_publish_dataset_metadata_to_topic(
+                dataset_publish_response
+            )
+
         self._determine_deletion_of_previous_version_dataset(
-            dataset_metadata_without_id["survey_id"],
-            dataset_metadata_without_id["period_id"],
-            dataset_metadata_without_id["sds_dataset_version"],
+            dataset_publish_response["survey_id"],
+            dataset_publish_response["period_id"],
+            current_dataset_version,
+            previous_dataset_version_from_firestore,
         )
 
     def get_dataset_metadata_collection(
@@ -79,14 +233,14 @@ class DatasetProcessorService:
             self,
             raw_dataset: RawDatasetWithoutData,
             filename: str,
-            dataset_unit_data_collection: list[object],
+            total_reporting_units: int,
     ) -> DatasetMetadataWithoutId:
         """
         Returns a copy of the create-dataset with added metadata.
         Parameters:
         raw_dataset (RawDatasetWithoutData): the original create-dataset without the data object.
         filename (str): the filename of the json containing the create-dataset data
-        dataset_unit_data_collection (list[object]): collection of unit data in the new create-dataset
+        total_reporting_units (int): number of units in the new create-dataset
         """
         logger.info("Adding metadata to new create-dataset...")
 
@@ -98,7 +252,7 @@ class DatasetProcessorService:
             "sds_published_at": str(
                 datetime.now().strftime(config.TIME_FORMAT)
             ),
-            "total_reporting_units": len(dataset_unit_data_collection),
+            "total_reporting_units": total_reporting_units,
             "sds_dataset_version": self._calculate_next_dataset_version(
                 raw_dataset["survey_id"], raw_dataset["period_id"]
             ),
@@ -114,68 +268,13 @@ class DatasetProcessorService:
 
     def _calculate_next_dataset_version(self, survey_id: str, period_id: str) -> int:
         """
-        Calculates the next sds_dataset_version from a single create-dataset from firestore with a specific survey_id.
+        Allocates the next sds_dataset_version from the version counter in firestore of a specific survey_id and
+        period_id, with a single transactional read and write of the counter.
         Parameters:
         survey_id: survey_id of the specified create-dataset.
         period_id: period_id of the specified create-dataset.
         """
-        datasets_result = (
-            self.dataset_repository.get_latest_dataset_with_survey_id_and_period_id(
-                survey_id, period_id
-            )
-        )
-
-        return DocumentVersionService.calculate_survey_version(
-            datasets_result, "sds_dataset_version"
-        )
-
-    def _calculate_previous_dataset_version_from_firestore(
-            self, survey_id: str, period_id: str
-    ) -> int:
-        """
-        Calculates the previous sds_dataset_version from a single create-dataset from firestore with a specific survey_id.
-        Parameters:
-        survey_id: survey_id of the specified create-dataset.
-        period_id: period_id of the specified create-dataset.
-        """
-        datasets_result = (
-            self.dataset_repository.get_latest_dataset_with_survey_id_and_period_id(
-                survey_id, period_id
-            )
-        )
-
-        return DocumentVersionService.calculate_previous_version(
-            datasets_result, "sds_dataset_version"
-        )
-
-    def _add_metadata_to_unit_data_collection(
-            self,
-            dataset_id: str,
-            transformed_dataset_metadata: DatasetMetadataWithoutId,
-            raw_dataset_unit_data_collection: list[object],
-    ) -> list[UnitDataset]:
-        """
-        Transforms the new unit data to a new format for storing in firestore.
-        Parameters:
-        dataset_id (str): dataset_id for the new create-dataset.
-        transformed_dataset_metadata (DatasetMetadataWithoutId): the create-dataset metadata without id
-        raw_dataset_unit_data_collection (list[object]): list of unit data to be transformed
-        """
-        logger.info("Adding metadata to unit data collection...")
-
-        unit_data_collection_with_metadata = [
-            self._add_metatadata_to_unit_data_item(
-                dataset_id, transformed_dataset_metadata, item
-            )
-            for item in raw_dataset_unit_data_collection
-        ]
-
-        logger.info("Metadata added to unit data collection transformed successfully.")
-        logger.debug(
-            f"Metadata added to unit data collection for create-dataset with id: {dataset_id}"
-        )
-
-        return unit_data_collection_with_metadata
+        return self.dataset_repository.allocate_next_dataset_version(survey_id, period_id)
 
     def _add_metatadata_to_unit_data_item(
             self,
@@ -198,30 +297,53 @@ class DatasetProcessorService:
             "data": unit_data_item["unit_data"],
         }
 
-    def _extract_identifiers_from_unit_data(
-            self, raw_dataset_unit_data_collection: list[object]
-    ) -> list:
+    def _transform_unit_data_with_identifiers(
+            self,
+            dataset_id: str,
+            transformed_dataset_metadata: DatasetMetadataWithoutId,
+            raw_dataset: RawDatasetWithoutData,
+            raw_dataset_unit_data: Iterable[object],
+            unit_offset: int = 0,
+    ) -> Iterator[tuple[str, UnitDataset]]:
         """
-        Extracts all identifiers from unit data to store in a separate list
+        Lazily transforms unit data, yielding each identifier with its unit data for storing in firestore.
+        Once the unit data is exhausted the create-dataset metadata is completed with the number of units read and
+        any optional fields that followed the unit data in a streamed file.
         Parameters:
-        raw_dataset_unit_data_collection (list[object]): list of unit data containing identifier
+        dataset_id (str): dataset_id for the new create-dataset.
+        transformed_dataset_metadata (DatasetMetadataWithoutId): the create-dataset metadata without id
+        raw_dataset (RawDatasetWithoutData): the original create-dataset without the data object.
+        raw_dataset_unit_data (Iterable[object]): list or stream of unit data to be transformed
+        unit_offset (int): number of units already written, which are counted but not transformed again
         """
-        logger.info("Extracting identifiers from unit data...")
+        logger.info("Transforming unit data collection with metadata...")
+
+        total_reporting_units = 0
+        # Reading each unit from a stream is timed as the parse stage, apart from the transform
+        for item in stage_timing_service.time_iterable("parse", raw_dataset_unit_data):
+            total_reporting_units += 1
+            if total_reporting_units <= unit_offset:
+                continue
+            yield item["identifier"], self._add_metatadata_to_unit_data_item(
+                dataset_id, transformed_dataset_metadata, item
+            )
 
-        extracted_unit_data_identifiers = [
-            item["identifier"] for item in raw_dataset_unit_data_collection
-        ]
+        transformed_dataset_metadata["total_reporting_units"] = total_reporting_units
 
-        logger.info("identifiers are extracted and stored successfully.")
-        logger.debug(f"Extracted identifiers: {extracted_unit_data_identifiers}")
+        if "title" in raw_dataset:
+            transformed_dataset_metadata["title"] = raw_dataset["title"]
 
-        return extracted_unit_data_identifiers
+        logger.info("Unit data collection transformed successfully.")
+        logger.debug(
+            f"Transformed {total_reporting_units} units for create-dataset with id: {dataset_id}"
+        )
 
     def _determine_deletion_of_previous_version_dataset(
             self,
             current_dataset_survey_id: str,
             current_dataset_period_id: str,
             current_dataset_version: int,
+            previous_dataset_version_from_firestore: int,
     ) -> None:
         """
         Determine whether to delete the previous version of create-dataset.
@@ -229,12 +351,14 @@ class DatasetProcessorService:
         This flow should be present until an updated data retention policy is formulated (Card SDSS-207).
         Deletion of previous version of create-dataset happens when all of the following criteria are satisfied:
         1. Retention flag is off (False)
-        2. The current version of create-dataset is > 1
-        3. The current create-dataset is successfully added to FireStore
+        2. A previous version of create-dataset has been published, according to the version counter
+        3. No later version of create-dataset has been published, otherwise the current version is deleted instead,
+        as it was superseded before it completed
         Parameters:
         current_dataset_survey_id (str): Survey id of current processing create-dataset
         current_dataset_period_id (str): Period id of current processing create-dataset
         current_dataset_version (int): Version of current processing create-dataset
+        previous_dataset_version_from_firestore (int): Latest version published before the current version
         """
         logger.info("Determining whether to delete previous version of create-dataset...")
 
@@ -247,24 +371,19 @@ class DatasetProcessorService:
             logger.info("Retention flag is on. Process is skipped.")
             return None
 
-        previous_dataset_version_from_firestore = (
-            self._calculate_previous_dataset_version_from_firestore(
-                current_dataset_survey_id, current_dataset_period_id
-            )
-        )
-
         if previous_dataset_version_from_firestore < 1:
             logger.info(
                 "Previous create-dataset version deletion is not required. Process is skipped."
             )
             return None
 
-        if previous_dataset_version_from_firestore != current_dataset_version - 1:
-            logger.error(
-                f"Previous create-dataset version calculated from firestore does not match."
-                f" Expected version: '{current_dataset_version - 1}' Actual version in FireStore:"
-                f" '{previous_dataset_version_from_firestore}'."
-                f" New create-dataset may have not been saved properly. Process is skipped."
+        if previous_dataset_version_from_firestore >= current_dataset_version:
+            # The current version completed after a later one, which has already deleted the versions before it
+            logger.info("Current create-dataset version is deleted as superseded.")
+            self.dataset_writer_service.try_perform_delete_previous_version_dataset_batch(
+                current_dataset_survey_id,
+                current_dataset_period_id,
+                current_dataset_version,
             )
             return None
 
@@ -272,4 +391,4 @@ class DatasetProcessorService:
             current_dataset_survey_id,
             current_dataset_period_id,
             previous_dataset_version_from_firestore,
-        )
\ No newline at end of file
+        )
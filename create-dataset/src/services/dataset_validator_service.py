@@ -2,8 +2,8 @@ from json import JSONDecodeError
 
 from config.config import config
 from config.logging_config import logging
+from models.dataset_file_format import DatasetFileFormat
 from models.dataset_models import DatasetError, RawDataset
-from repository.dataset_bucket_repository import DatasetBucketRepository
 from services.publisher_service import publisher_service
 
 logger = logging.getLogger(__name__)
@@ -11,9 +11,9 @@ logger = logging.getLogger(__name__)
 
 class DatasetValidatorService:
     @staticmethod
-    def validate_file_is_json(filename: str) -> tuple[bool, str]:
+    def validate_file_extension(filename: str) -> tuple[bool, str]:
         """
-        Validates the file extension is json.
+        Validates the file extension is a supported json format, publishing an error to the topic if not.
         Parameters:
         filename (str): filename being validated.
         """
@@ -27,45 +27,56 @@ class DatasetValidatorService:
                     "message": message,
                 }
             )
-            return False, message
 
-        is_valid, message = DatasetValidatorService._validate_file_content_is_json(
-            filename
-        )
-        if not is_valid:
-            DatasetValidatorService.try_publish_dataset_error_to_topic(
-                {
-                    "error": "File content error",
-                    "message": message,
-                }
-            )
-            return False, message
-
-        return True, ""
+        return is_valid, message
 
     @staticmethod
     def _validate_file_extension_is_json(filename: str) -> tuple[bool, str]:
         """
-        Raises a runtime error if the file type is not json.
+        Returns a failed response if the file type is not json or line-delimited json, optionally compressed
+        with gzip or zstd, or Parquet.
         Parameters:
         filename (str): filename being validated.
         """
-        if filename[-5:].lower() != ".json":
+        if DatasetFileFormat.from_filename(filename) is None:
             message = "Invalid filetype received."
             return False, message
 
         return True, ""
 
     @staticmethod
-    def _validate_file_content_is_json(filename: str) -> tuple[bool, str]:
+    def validate_file_content_is_json(
+            decode_error: JSONDecodeError | None,
+    ) -> tuple[bool, str]:
         """
-        Raises a runtime error if the file content is not json.
+        Validates the file content is json using the outcome of decoding the file, publishing an error to the
+        topic if not. The file is only fetched and decoded once, with the result shared between checks.
         Parameters:
-        filename (str): filename being validated.
+        decode_error (JSONDecodeError | None): the error raised decoding the file, or None if it decoded.
         """
-        try:
-            DatasetBucketRepository().get_dataset_file_as_json(filename)
-        except JSONDecodeError:
+        is_valid, message = DatasetValidatorService._validate_file_content_is_json(
+            decode_error
+        )
+        if not is_valid:
+            DatasetValidatorService.try_publish_dataset_error_to_topic(
+                {
+                    "error": "File content error",
+                    "message": message,
+                }
+            )
+
+        return is_valid, message
+
+    @staticmethod
+    def _validate_file_content_is_json(
+            decode_error: JSONDecodeError | None,
+    ) -> tuple[bool, str]:
+        """
+        Returns a failed response if the file content could not be decoded as json.
+        Parameters:
+        decode_error (JSONDecodeError | None): the error raised decoding the file, or None if it decoded.
+        """
+        if decode_error is not None:
             message = "Invalid JSON content received."
             return False, message
 
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from config.config import config
 from config.logging_config import logging
 from models.dataset_models import (
@@ -6,8 +8,10 @@ from models.dataset_models import (
     DatasetPublishResponse,
     UnitDataset,
 )
+from models.unit_count_mode import UnitCountMode
 from repository.dataset_firebase_repository import DatasetFirebaseRepository
 from services.publisher_service import publisher_service
+from services.stage_timing_service import stage_timing_service
 
 logger = logging.getLogger(__name__)
 
@@ -23,37 +27,109 @@ class DatasetWriterService:
         self,
         dataset_id: str,
         dataset_metadata_without_id: DatasetMetadataWithoutId,
-        unit_data_collection_with_metadata: list[UnitDataset],
-        extracted_unit_data_identifiers: list[str],
+        unit_data_with_identifiers: Iterable[tuple[str, UnitDataset]],
     ) -> DatasetMetadata:
         """
-        Writes dataset metadata and unit data to Firestore in batches and checks the unit data count matches the total
-        reporting units.
+        Writes unit data to Firestore in batches as it is consumed, then the dataset metadata, and checks the unit
+        data count matches the total reporting units.
 
         Parameters:
         dataset_id: the uniquely generated id of the dataset
-        dataset_metadata_without_id: the metadata of the dataset without its id
-        unit_data_collection_with_metadata: the collection of unit data associated with the new dataset
-        extracted_unit_data_identifiers: list of identifiers ordered to match the identifier for each set of
-        unit data in the collection.
+        dataset_metadata_without_id: the metadata of the dataset without its id, completed once the unit data is consumed
+        unit_data_with_identifiers: pairs of identifier and unit data associated with the new dataset
         """
         logger.info("Performing batched dataset write...")
 
-        self.dataset_firebase_repository.perform_batched_dataset_write(
+        acknowledged_write_count = self.dataset_firebase_repository.perform_batched_dataset_write(
             dataset_id,
             dataset_metadata_without_id,
-            unit_data_collection_with_metadata,
-            extracted_unit_data_identifiers,
+            unit_data_with_identifiers,
         )
 
         logger.info("Batch writes for dataset completed successfully.")
 
-        logger.info("Checking unit data count matches total reporting units.")
+        return self._verify_unit_data_count(
+            dataset_id, dataset_metadata_without_id, acknowledged_write_count
+        )
+
+    def perform_resumable_unit_data_write(
+        self,
+        dataset_id: str,
+        unit_data_with_identifiers: Iterable[tuple[str, UnitDataset]],
+        deadline: float,
+    ) -> tuple[int, bool]:
+        """
+        Writes unit data to Firestore in batches as it is consumed, stopping once the deadline has passed so
+        the write can be resumed by a later invocation.
+
+        Parameters:
+        dataset_id: the uniquely generated id of the dataset
+        unit_data_with_identifiers: pairs of identifier and unit data not yet written for the new dataset
+        deadline: the time, in seconds since the epoch, after which no more batches are started
+        """
+        logger.info("Performing resumable unit data write...")
+
+        acknowledged_write_count, is_complete = self.dataset_firebase_repository.perform_batched_unit_data_write(
+            dataset_id, unit_data_with_identifiers, deadline
+        )
+
+        logger.info(f"Unit data writes acknowledged: {acknowledged_write_count}, completed: {is_complete}.")
+
+        return acknowledged_write_count, is_complete
+
+    def complete_resumable_dataset_write(
+        self,
+        dataset_id: str,
+        dataset_metadata_without_id: DatasetMetadataWithoutId,
+        acknowledged_write_count: int,
+    ) -> DatasetMetadata:
+        """
+        Writes the dataset metadata once all its unit data has been written, across one or more invocations,
+        and checks the unit data count matches the total reporting units.
+
+        Parameters:
+        dataset_id: the uniquely generated id of the dataset
+        dataset_metadata_without_id: the metadata of the dataset without its id
+        acknowledged_write_count: the number of unit writes acknowledged by Firestore across all invocations
+        """
+        self.dataset_firebase_repository.write_dataset_metadata(dataset_id, dataset_metadata_without_id)
 
-        unit_data_count = self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id(
-            dataset_id
+        logger.info("Resumable writes for dataset completed successfully.")
+
+        return self._verify_unit_data_count(
+            dataset_id, dataset_metadata_without_id, acknowledged_write_count
         )
 
+    def _verify_unit_data_count(
+        self,
+        dataset_id: str,
+        dataset_metadata_without_id: DatasetMetadataWithoutId,
+        acknowledged_write_count: int,
+    ) -> DatasetMetadata:
+        """
+        Checks the unit data count matches the total reporting units, raising an error if not.
+        Depending on UNIT_COUNT_MODE the count is either read back from Firestore, with a count aggregation
+        or keys-only paging, or taken from the tally of writes Firestore acknowledged.
+        The tally costs no reads, but cannot detect units that overwrote each other through a repeated identifier.
+
+        Parameters:
+        dataset_id: the uniquely generated id of the dataset
+        dataset_metadata_without_id: the metadata of the dataset without its id
+        acknowledged_write_count: the number of unit writes acknowledged by Firestore
+        """
+        logger.info("Checking unit data count matches total reporting units.")
+
+        with stage_timing_service.time_stage("count_verification") as span:
+            if config.UNIT_COUNT_MODE == UnitCountMode.WRITE_TALLY:
+                unit_data_count = acknowledged_write_count
+            else:
+                unit_data_count = (
+                    self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id(
+                        dataset_id, config.UNIT_COUNT_MODE == UnitCountMode.AGGREGATION
+                    )
+                )
+            span.add(items=unit_data_count)
+
         if unit_data_count != dataset_metadata_without_id["total_reporting_units"]:
             logger.error(
                 f"Unit data count {unit_data_count} does not match total reporting "
@@ -79,10 +155,11 @@ class DatasetWriterService:
         dataset_publish_response: dataset metadata or unhappy path response to be published.
         """
         try:
-            publisher_service.publish_data_to_topic(
-                dataset_publish_response,
-                config.PUBLISH_DATASET_TOPIC_ID,
-            )
+            with stage_timing_service.time_stage("publish"):
+                publisher_service.publish_data_to_topic(
+                    dataset_publish_response,
+                    config.PUBLISH_DATASET_TOPIC_ID,
+                )
             logger.debug(
                 f"Dataset response {dataset_publish_response} published to topic {config.PUBLISH_DATASET_TOPIC_ID}"
             )
@@ -123,7 +200,8 @@ class DatasetWriterService:
         try:
             dataset_id = dataset_metadata["dataset_id"]
 
-            self.dataset_firebase_repository.delete_dataset_with_dataset_id(dataset_id)
+            with stage_timing_service.time_stage("previous_version_delete"):
+                self.dataset_firebase_repository.delete_dataset_with_dataset_id(dataset_id)
 
             logger.info("Previous version of dataset deleted succesfully.")
 
@@ -0,0 +1,86 @@
+import zlib
+from json import JSONDecodeError
+from typing import BinaryIO
+
+from models.dataset_file_format import DatasetFileCompression
+
+# Accept only a gzip header and trailer when decompressing with zlib
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class DecompressionStreamService:
+    """
+    Readable file object decompressing a gzip or zstd compressed file as it is read, fetching the
+    underlying file in fixed size chunks so that only the compressed chunk and the bytes requested
+    are held in memory. Content that cannot be decompressed raises a JSONDecodeError, as it cannot
+    be decoded as a create-dataset.
+    """
+
+    def __init__(self, file_obj: BinaryIO, compression: DatasetFileCompression, chunk_size: int):
+        self.file_obj = file_obj
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.decompressor = self._create_decompressor()
+        self.buffer = b""
+        self.is_exhausted = False
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads up to size decompressed bytes, or all of the remaining bytes if size is negative.
+
+        Parameters:
+        size (int): the maximum number of bytes to read.
+        """
+        while (size < 0 or len(self.buffer) < size) and not self.is_exhausted:
+            self._decompress_chunk()
+
+        if size < 0:
+            size = len(self.buffer)
+
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self) -> None:
+        self.file_obj.close()
+
+    def __enter__(self) -> "DecompressionStreamService":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _create_decompressor(self):
+        """
+        Creates a decompressor for the compression of the file. zstandard is only imported when a
+        zstd compressed file is read.
+        """
+        if self.compression == DatasetFileCompression.ZSTD:
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompressobj()
+
+        return zlib.decompressobj(GZIP_WBITS)
+
+    def _decompress_chunk(self) -> None:
+        """
+        Decompresses the next chunk of the file into the buffer. A gzip file may be made up of several
+        members, and a zstd file of several frames, each of which is decompressed in turn. The file
+        ending partway through a member or frame raises a JSONDecodeError.
+        """
+        chunk = self.file_obj.read(self.chunk_size)
+
+        if not chunk:
+            self.is_exhausted = True
+            if not self.decompressor.eof:
+                raise JSONDecodeError("Compressed content is truncated", "", 0)
+            return
+
+        try:
+            while chunk:
+                if self.decompressor.eof:
+                    self.decompressor = self._create_decompressor()
+
+                self.buffer += self.decompressor.decompress(chunk)
+                chunk = self.decompressor.unused_data
+        except Exception as exc:
+            raise JSONDecodeError(f"Invalid compressed content: {exc}", "", 0) from exc
@@ -0,0 +1,217 @@
+import codecs
+import json
+from typing import BinaryIO, Iterator
+
+WHITESPACE = " \t\n\r"
+# Characters that can end a number or literal, which cannot be decoded until one of them has been read
+VALUE_DELIMITERS = WHITESPACE + ",]}"
+# Characters a single value can span before it is treated as malformed, rather than read on towards the end of the file
+MAX_VALUE_LENGTH = 16 * 1024 * 1024
+
+
+class JsonStreamService:
+    """
+    Incremental reader for a top-level JSON object, reading the underlying
+    file in fixed size chunks so that only the value currently being decoded
+    is held in memory.
+    """
+
+    def __init__(self, file_obj: BinaryIO, chunk_size: int):
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.position = 0
+        self.is_exhausted = False
+        self.is_object_opened = False
+
+    def read_object_until(self, array_key: str) -> tuple[dict, bool]:
+        """
+        Reads the keys of the top-level object up to the array key, leaving the stream positioned at the array.
+
+        Parameters:
+        array_key (str): key of the array that is to be streamed.
+
+        Returns:
+        tuple[dict, bool]: the keys read before the array key and whether the array key was found.
+        """
+        if not self.is_object_opened:
+            self._expect("{")
+            self.is_object_opened = True
+
+        header = {}
+        for key in self._iter_object_keys():
+            if key == array_key:
+                return header, True
+            header[key] = self._decode_value()
+
+        return header, False
+
+    def iter_array_items(self) -> Iterator[object]:
+        """
+        Yields the items of the array the stream is positioned at, one at a time.
+        """
+        self._expect("[")
+
+        if self._peek() == "]":
+            self.position += 1
+            return
+
+        while True:
+            yield self._decode_value()
+
+            if self._peek() == "]":
+                self.position += 1
+                return
+
+            self._expect(",")
+
+    def skip_array(self) -> int:
+        """
+        Reads past the array the stream is positioned at without keeping its items.
+
+        Returns:
+        int: the number of items in the array.
+        """
+        return sum(1 for _ in self.iter_array_items())
+
+    def read_remaining_object(self) -> dict:
+        """
+        Reads the keys left in the top-level object after a streamed array.
+
+        Returns:
+        dict: the remaining keys and values of the object.
+        """
+        return {key: self._decode_value() for key in self._iter_object_keys(is_after_value=True)}
+
+    def read_end(self) -> None:
+        """
+        Checks nothing but whitespace follows the top-level object, raising a decode error otherwise.
+        """
+        if self._peek():
+            raise json.JSONDecodeError("Extra data", self.buffer, self.position)
+
+    def _iter_object_keys(self, is_after_value: bool = False) -> Iterator[str]:
+        """
+        Yields each key of the open object, the caller being responsible for consuming its value.
+
+        Parameters:
+        is_after_value (bool): whether the stream is positioned after a value of the object, so that
+        the next key must follow a comma.
+        """
+        if self._peek() == "}":
+            self.position += 1
+            return
+
+        if is_after_value:
+            self._expect(",")
+
+        while True:
+            if self._peek() != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes", self.buffer, self.position
+                )
+
+            key = self._decode_value()
+            self._expect(":")
+            yield key
+
+            if self._peek() == "}":
+                self.position += 1
+                return
+
+            self._expect(",")
+
+    def _decode_value(self) -> object:
+        """
+        Decodes the next JSON value, reading further chunks until the value is complete. A number or literal
+        is only decoded once the character following it has been read, as it may continue into the next chunk.
+        """
+        if self._peek() not in ('"', "{", "["):
+            self._read_until_delimiter()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.is_exhausted:
+                    raise
+                self._read_value_chunks()
+                continue
+
+            self.position = end
+            return value
+
+    def _read_until_delimiter(self) -> None:
+        """
+        Reads further chunks until a delimiter follows the number or literal at the current position,
+        or the end of the file is reached.
+        """
+        searched = self.position
+
+        while not self.is_exhausted:
+            while searched < len(self.buffer):
+                if self.buffer[searched] in VALUE_DELIMITERS:
+                    return
+                searched += 1
+
+            searched -= self.position
+            self._check_value_length()
+            self._read_chunk()
+
+    def _read_value_chunks(self) -> None:
+        """
+        Reads further chunks of the value at the current position until at least double what has been read
+        of it, so that a value spanning many chunks is only decoded again a few times rather than once a chunk.
+        """
+        self._check_value_length()
+        value_length = len(self.buffer) - self.position
+
+        self._read_chunk()
+        while not self.is_exhausted and len(self.buffer) - self.position < 2 * value_length:
+            self._read_chunk()
+
+    def _check_value_length(self) -> None:
+        """
+        Raises a decode error if the value at the current position has grown beyond MAX_VALUE_LENGTH
+        without being decoded.
+        """
+        if len(self.buffer) - self.position > MAX_VALUE_LENGTH:
+            raise json.JSONDecodeError(
+                f"Value exceeds {MAX_VALUE_LENGTH} characters", self.buffer, self.position
+            )
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, or an empty string at the end of the file.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer) or self.is_exhausted:
+                return self.buffer[self.position:self.position + 1]
+
+            self._read_chunk()
+
+    def _expect(self, char: str) -> None:
+        """
+        Consumes the next character, raising a decode error if it is not the one expected.
+        """
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.position)
+
+        self.position += 1
+
+    def _read_chunk(self) -> None:
+        """
+        Appends the next chunk of the file to the buffer, discarding what has already been consumed.
+        """
+        chunk = self.file_obj.read(self.chunk_size)
+
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(chunk, final=not chunk)
+        self.position = 0
+
+        if not chunk:
+            self.is_exhausted = True
@@ -0,0 +1,54 @@
+import json
+from typing import BinaryIO, Iterator
+
+
+class NdjsonStreamService:
+    """
+    Incremental reader for a line-delimited JSON file, reading the underlying file in fixed size
+    chunks so that only the line currently being decoded is held in memory. The first line is a
+    header object and every following line is a single value.
+    """
+
+    def __init__(self, file_obj: BinaryIO, chunk_size: int):
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.lines = self._iter_raw_lines()
+
+    def read_header(self) -> dict:
+        """
+        Reads the header object from the first line of the file.
+
+        Returns:
+        dict: the header object.
+        """
+        line = next(self.lines, b"")
+        header = json.loads(line) if line else None
+
+        if not isinstance(header, dict):
+            raise json.JSONDecodeError("Expecting header object", line.decode("utf-8", "replace"), 0)
+
+        return header
+
+    def iter_lines(self) -> Iterator[object]:
+        """
+        Yields the value decoded from each line after the header, one at a time.
+        """
+        for line in self.lines:
+            yield json.loads(line)
+
+    def _iter_raw_lines(self) -> Iterator[bytes]:
+        """
+        Yields each line of the file that is not blank, reading further chunks until the line is complete.
+        """
+        buffer = b""
+
+        while True:
+            chunk = self.file_obj.read(self.chunk_size)
+            if not chunk:
+                break
+
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            yield from (line for line in lines if line.strip())
+
+        if buffer.strip():
+            yield buffer
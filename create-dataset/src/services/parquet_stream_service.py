@@ -0,0 +1,111 @@
+import json
+from json import JSONDecodeError
+from typing import TYPE_CHECKING, BinaryIO, Iterator
+
+from google.cloud import exceptions
+
+if TYPE_CHECKING:
+    import pyarrow.parquet as pq
+
+# Keys of the file-level metadata holding the dataset metadata, each value being JSON encoded
+METADATA_KEYS = ["survey_id", "period_id", "form_types", "title"]
+IDENTIFIER_COLUMN = "identifier"
+UNIT_DATA_COLUMN = "unit_data"
+
+
+class ParquetStreamService:
+    """
+    Incremental reader for a Parquet create-dataset file, with the dataset metadata in the file-level
+    metadata and a row per unit in its identifier and unit_data columns. Units are read a record batch
+    at a time, so that only the batch currently being converted is held in memory. The unit_data column
+    is either a struct column, read as a dict for each unit, or a string column of JSON objects.
+    A struct column has the fields of every unit, so the keys a unit does not have are read back as
+    None and left out.
+    """
+
+    def __init__(self, file_obj: BinaryIO, batch_size: int):
+        self.file_obj = file_obj
+        self.batch_size = batch_size
+        self.parquet_file = self._open_parquet_file()
+
+    def read_metadata(self) -> dict:
+        """
+        Reads the dataset metadata from the file-level metadata, leaving out any key that is missing.
+
+        Returns:
+        dict: the dataset metadata.
+        """
+        file_metadata = self.parquet_file.schema_arrow.metadata or {}
+
+        return {
+            key: json.loads(file_metadata[key.encode("utf-8")])
+            for key in METADATA_KEYS
+            if key.encode("utf-8") in file_metadata
+        }
+
+    def iter_units(self) -> Iterator[dict]:
+        """
+        Yields each unit as an identifier and its unit data, converting one record batch at a time.
+        """
+        is_unit_data_json = self._is_unit_data_json()
+
+        for record_batch in self.parquet_file.iter_batches(
+            batch_size=self.batch_size, columns=[IDENTIFIER_COLUMN, UNIT_DATA_COLUMN]
+        ):
+            identifiers = record_batch.column(IDENTIFIER_COLUMN).to_pylist()
+            unit_data = record_batch.column(UNIT_DATA_COLUMN).to_pylist()
+
+            if is_unit_data_json:
+                unit_data = [json.loads(item) for item in unit_data]
+            else:
+                unit_data = [self._drop_missing_keys(item) for item in unit_data]
+
+            for identifier, item in zip(identifiers, unit_data):
+                yield {"identifier": identifier, "unit_data": item}
+
+    def _drop_missing_keys(self, value: object) -> object:
+        """
+        Removes the keys with a None value from the dicts of a struct value, including those nested in it.
+
+        Parameters:
+        value (object): the value read from a struct column.
+        """
+        if isinstance(value, dict):
+            return {key: self._drop_missing_keys(item) for key, item in value.items() if item is not None}
+
+        if isinstance(value, list):
+            return [self._drop_missing_keys(item) for item in value]
+
+        return value
+
+    def _open_parquet_file(self) -> "pq.ParquetFile":
+        """
+        Opens the file as Parquet, reading only its footer, and checks it has the identifier and unit_data
+        columns. pyarrow is only imported when a Parquet file is read. A file that is not Parquet or is
+        missing either column raises a JSONDecodeError, as it cannot be decoded as a create-dataset.
+        """
+        import pyarrow.parquet as pq
+
+        try:
+            parquet_file = pq.ParquetFile(self.file_obj)
+        except exceptions.NotFound:
+            # The file is missing from the bucket, rather than not being Parquet
+            raise
+        except Exception as exc:
+            raise JSONDecodeError(f"Invalid parquet content: {exc}", "", 0) from exc
+
+        missing_columns = {IDENTIFIER_COLUMN, UNIT_DATA_COLUMN} - set(parquet_file.schema_arrow.names)
+        if missing_columns:
+            raise JSONDecodeError(f"Missing parquet columns: {', '.join(sorted(missing_columns))}", "", 0)
+
+        return parquet_file
+
+    def _is_unit_data_json(self) -> bool:
+        """
+        Checks if the unit_data column holds JSON strings rather than structs.
+        """
+        import pyarrow as pa
+
+        unit_data_type = self.parquet_file.schema_arrow.field(UNIT_DATA_COLUMN).type
+
+        return pa.types.is_string(unit_data_type) or pa.types.is_large_string(unit_data_type)
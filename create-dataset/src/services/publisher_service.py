@@ -1,16 +1,34 @@
 import json
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import TYPE_CHECKING
 
 from config.config import config
-from google.cloud.pubsub_v1 import PublisherClient
 from config.logging_config import logging
 from models.dataset_models import DatasetError, DatasetMetadata
+from repository.client_registry import client_registry
+from services.stage_timing_service import stage_timing_service
+
+if TYPE_CHECKING:
+    from google.cloud.pubsub_v1 import PublisherClient
 
 logger = logging.getLogger(__name__)
 
 
 class PublisherService:
     def __init__(self):
-        self.publisher = PublisherClient()
+        self._lock = threading.Lock()
+        # Topic paths known to exist, with the time each verification expires
+        self.verified_topic_paths: dict[str, float] = {}
+        self.pending_publishes: list[tuple[str, Future]] = []
+
+    @property
+    def publisher(self) -> "PublisherClient":
+        """
+        The shared publisher client, created on first use rather than at import.
+        """
+        return client_registry.get_publisher_client()
 
     def publish_data_to_topic(
         self,
@@ -18,7 +36,8 @@ class PublisherService:
         topic_id: str,
     ) -> None:
         """
-        Publishes data to the pubsub topic.
+        Publishes data to the pubsub topic without waiting for it to be delivered. The message is sent in a
+        batch by the publisher client, and its delivery is confirmed by flush_published_messages.
 
         Parameters:
         publish_data: data to be sent to the pubsub topic,
@@ -27,14 +46,53 @@ class PublisherService:
         topic_path = self.publisher.topic_path(config.PROJECT_ID, topic_id)
         self._verify_topic_exists(topic_path)
 
-        self.publisher.publish(
+        publish_future = self.publisher.publish(
             topic_path, data=json.dumps(publish_data).encode("utf-8")
         )
 
+        with self._lock:
+            self.pending_publishes.append((topic_path, publish_future))
+
+    def flush_published_messages(self) -> None:
+        """
+        Waits for every message published since the last flush to be delivered, all at once, raising an error
+        if any failed. The topic of a failed message is verified again on its next publish.
+        """
+        with self._lock:
+            pending_publishes, self.pending_publishes = self.pending_publishes, []
+
+        if not pending_publishes:
+            return
+
+        with stage_timing_service.time_stage("publish") as span:
+            wait([publish_future for _, publish_future in pending_publishes])
+            span.add(items=len(pending_publishes))
+
+        failed_topic_paths = [
+            topic_path for topic_path, publish_future in pending_publishes if publish_future.exception() is not None
+        ]
+
+        if failed_topic_paths:
+            with self._lock:
+                for topic_path in failed_topic_paths:
+                    self.verified_topic_paths.pop(topic_path, None)
+
+            logger.error(
+                f"{len(failed_topic_paths)} of {len(pending_publishes)} messages failed to publish "
+                f"to topics: {sorted(set(failed_topic_paths))}"
+            )
+            raise RuntimeError("Error delivering published messages to the topic.")
+
+        logger.info(f"{len(pending_publishes)} published messages delivered successfully.")
+
     def _verify_topic_exists(self, topic_path: str) -> None:
         """
-        If the topic does not exist raises 500 global error.
+        If the topic does not exist raises 500 global error. A topic found to exist is not checked again
+        until PUBLISH_TOPIC_CACHE_TTL seconds have passed.
         """
+        if self.verified_topic_paths.get(topic_path, 0) > time.monotonic():
+            return
+
         try:
             self.publisher.get_topic(request={"topic": topic_path})
         except Exception as exc:
@@ -44,6 +102,9 @@ class PublisherService:
                 return
             raise RuntimeError("Topic not found") from exc
 
+        with self._lock:
+            self.verified_topic_paths[topic_path] = time.monotonic() + config.PUBLISH_TOPIC_CACHE_TTL
+
     def _create_topic(self, topic_path) -> None:
         self.publisher.create_topic(request={"name": topic_path})
 
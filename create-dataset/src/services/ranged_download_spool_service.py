@@ -0,0 +1,163 @@
+import io
+import mmap
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud.storage import Blob
+
+
+class RangedDownloadSpoolService(io.RawIOBase):
+    """
+    Readable file object downloading a bucket file as concurrent byte ranges into a memory-mapped
+    temporary file, so that the raw bytes are held outside of the Python heap. Ranges are requested
+    in order and each read only waits for the ranges it covers, so the start of the file can be
+    parsed while later ranges are still downloading. Every range is pinned to the generation of the
+    file when it was opened, so a file replaced during the download fails rather than being mixed.
+    """
+
+    def __init__(self, blob: Blob, range_size: int, concurrency: int, raw_download: bool = False):
+        super().__init__()
+        self.blob = blob
+        self.size = blob.size
+        self.range_size = range_size
+        self.raw_download = raw_download
+        self.position = 0
+        self.spool_file = tempfile.TemporaryFile()
+        self.spool = None
+        self.executor = None
+        self.range_events: list[threading.Event] = []
+        self.range_errors: dict[int, Exception] = {}
+
+        # An empty file cannot be memory-mapped, and has nothing to download
+        if self.size:
+            self.spool_file.truncate(self.size)
+            self.spool = mmap.mmap(self.spool_file.fileno(), self.size)
+            self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+            for range_index, start in enumerate(range(0, self.size, range_size)):
+                self.range_events.append(threading.Event())
+                self.executor.submit(self._download_range, range_index, start)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+
+        self.position = max(offset, 0)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        """
+        Reads into the buffer from the current position, waiting for the ranges it covers to be downloaded.
+
+        Parameters:
+        buffer: the writable buffer being read into.
+        """
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
+
+        self._wait_for_ranges(self.position, end)
+
+        read_size = end - self.position
+        buffer[:read_size] = self.spool[self.position:end]
+        self.position = end
+
+        return read_size
+
+    def readall(self) -> bytes:
+        """
+        Reads the rest of the file, waiting for its remaining ranges to be downloaded.
+        """
+        if self.position >= self.size:
+            return b""
+
+        self._wait_for_ranges(self.position, self.size)
+
+        data = self.spool[self.position:self.size]
+        self.position = self.size
+
+        return data
+
+    def close(self) -> None:
+        """
+        Stops any ranges still downloading, then releases the memory map and removes the temporary file.
+        """
+        if self.closed:
+            return
+
+        super().close()
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.spool is not None:
+            self.spool.close()
+        self.spool_file.close()
+
+    def _download_range(self, range_index: int, start: int) -> None:
+        """
+        Downloads a range of the file into the memory map, recording the error if it fails.
+
+        Parameters:
+        range_index (int): index of the range in the file.
+        start (int): offset of the first byte of the range.
+        """
+        try:
+            self.blob.download_to_file(
+                _SpoolRangeWriter(self, start),
+                start=start,
+                end=min(start + self.range_size, self.size) - 1,
+                raw_download=self.raw_download,
+                if_generation_match=self.blob.generation,
+                # The checksum of the file cannot be validated against a range of it
+                checksum=None,
+            )
+        except Exception as exc:
+            self.range_errors[range_index] = exc
+        finally:
+            self.range_events[range_index].set()
+
+    def _wait_for_ranges(self, start: int, end: int) -> None:
+        """
+        Waits for the ranges covering the bytes from start up to end to be downloaded, raising the error of
+        any that failed.
+
+        Parameters:
+        start (int): offset of the first byte needed.
+        end (int): offset after the last byte needed.
+        """
+        for range_index in range(start // self.range_size, (end - 1) // self.range_size + 1):
+            self.range_events[range_index].wait()
+
+            if range_index in self.range_errors:
+                raise self.range_errors[range_index]
+
+
+class _SpoolRangeWriter:
+    """
+    File object the download of a range is written to, copying each chunk into the memory map in turn.
+    """
+
+    def __init__(self, spool_service: RangedDownloadSpoolService, offset: int):
+        self.spool_service = spool_service
+        self.offset = offset
+
+    def write(self, data: bytes) -> int:
+        if self.spool_service.closed:
+            raise RuntimeError("Download spool closed before the range was downloaded.")
+
+        self.spool_service.spool[self.offset:self.offset + len(data)] = data
+        self.offset += len(data)
+
+        return len(data)
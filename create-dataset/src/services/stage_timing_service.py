@@ -0,0 +1,234 @@
+import json
+import threading
+import time
+from typing import BinaryIO, Iterable, Iterator, TypeVar
+
+from config.anomaly_logs import anomaly_logs
+from config.config import config
+from config.logging_config import STRUCTURED_LOGGER_NAME, logging
+
+logger = logging.getLogger(__name__)
+structured_logger = logging.getLogger(STRUCTURED_LOGGER_NAME)
+
+Item = TypeVar("Item")
+
+
+class StageTimingService:
+    """
+    Times the stages of an invocation, such as download, parse and Firestore write, across every thread
+    it uses. Stages run inside one another as unit data is pulled lazily through the pipeline, so each
+    stage is timed exclusive of the stages nested within it on the same thread. Time in a stage is summed
+    across threads, so a stage run concurrently may take longer than the invocation.
+    Every thread records into its own totals, so timing a stage takes no lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stage_totals: list[dict[str, list]] = []
+        self._invocation_id = 0
+        self.start_time = time.perf_counter()
+
+    def start_invocation(self) -> None:
+        """
+        Discards the stage totals of the previous invocation and starts timing a new one.
+        """
+        with self._lock:
+            self._thread_stage_totals = []
+            self._invocation_id += 1
+            self.start_time = time.perf_counter()
+
+    def time_stage(self, stage: str) -> "StageSpan":
+        """
+        Times the code within a with statement as a stage, returning a span that items and bytes can be added to.
+
+        Parameters:
+        stage (str): name of the stage.
+        """
+        return StageSpan(self, stage)
+
+    def time_iterable(self, stage: str, iterable: Iterable[Item]) -> Iterator[Item]:
+        """
+        Yields each item of an iterable, timing the production of each as a stage and counting it as an item.
+
+        Parameters:
+        stage (str): name of the stage.
+        iterable (Iterable[Item]): the iterable being timed.
+        """
+        iterator = iter(iterable)
+        # Inlined rather than using a span per item, as this runs for every unit
+        stack, stage_totals = self._get_thread_state()
+        totals = stage_totals.setdefault(stage, [0.0, 0, 0])
+
+        while True:
+            nested_seconds = [0.0]
+            stack.append(nested_seconds)
+            start = time.perf_counter()
+
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed_seconds = time.perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed_seconds
+                totals[0] += elapsed_seconds - nested_seconds[0]
+
+            totals[1] += 1
+            yield item
+
+    def time_file_reads(self, stage: str, file_obj: BinaryIO) -> BinaryIO:
+        """
+        Wraps a file so that its reads are timed as a stage, counting the bytes read.
+
+        Parameters:
+        stage (str): name of the stage.
+        file_obj (BinaryIO): the file whose reads are timed.
+        """
+        return _StageTimedFile(self, stage, file_obj)
+
+    def log_stage_timings(self) -> None:
+        """
+        Logs the stage totals of the invocation as one JSON record, then logs an anomaly for each stage that took
+        longer than RESPONSE_TIME_ALERT_THRESHOLD milliseconds.
+        """
+        stages = self._get_stage_summaries()
+
+        structured_logger.info(
+            json.dumps(
+                {
+                    "severity": "INFO",
+                    "message": "Create-dataset stage timings",
+                    "total_seconds": round(time.perf_counter() - self.start_time, 6),
+                    "stages": stages,
+                }
+            )
+        )
+
+        for stage, summary in stages.items():
+            duration_ms = summary["duration_seconds"] * 1000
+
+            if duration_ms > config.RESPONSE_TIME_ALERT_THRESHOLD:
+                logger.error(
+                    f"{anomaly_logs.ANOMALY_LOG_STAGE_DURATION}"
+                    f" Stage {stage} took {duration_ms:.0f} ms while the threshold is"
+                    f" {config.RESPONSE_TIME_ALERT_THRESHOLD} ms."
+                )
+
+    def _get_stage_summaries(self) -> dict[str, dict]:
+        """
+        Sums the stage totals of every thread, with the throughput of each stage.
+        """
+        summed_totals: dict[str, list] = {}
+
+        with self._lock:
+            for stage_totals in self._thread_stage_totals:
+                for stage, (seconds, items, size_bytes) in list(stage_totals.items()):
+                    summed = summed_totals.setdefault(stage, [0.0, 0, 0])
+                    summed[0] += seconds
+                    summed[1] += items
+                    summed[2] += size_bytes
+
+        return {
+            stage: {
+                "duration_seconds": round(seconds, 6),
+                "items": items,
+                "bytes": size_bytes,
+                "units_per_second": round(items / seconds, 1) if items and seconds else None,
+            }
+            for stage, (seconds, items, size_bytes) in summed_totals.items()
+        }
+
+    def _get_thread_state(self) -> tuple[list[list[float]], dict[str, list]]:
+        """
+        Gets the stack of stages running on the current thread and its stage totals for this invocation.
+        """
+        local = self._local
+
+        if getattr(local, "invocation_id", None) != self._invocation_id:
+            local.invocation_id = self._invocation_id
+            local.stack = []
+            local.stage_totals = {}
+
+            with self._lock:
+                self._thread_stage_totals.append(local.stage_totals)
+
+        return local.stack, local.stage_totals
+
+
+class StageSpan:
+    """
+    A single run of a stage, timed exclusive of the stages nested within it.
+    """
+
+    def __init__(self, stage_timing_service: StageTimingService, stage: str):
+        self.stage_timing_service = stage_timing_service
+        self.stage = stage
+        self.items = 0
+        self.size_bytes = 0
+
+    def add(self, items: int = 0, size_bytes: int = 0) -> None:
+        self.items += items
+        self.size_bytes += size_bytes
+
+    def __enter__(self) -> "StageSpan":
+        self.stack, self.stage_totals = self.stage_timing_service._get_thread_state()
+        # Time spent in nested stages, subtracted from this stage when it ends
+        self.nested_seconds = [0.0]
+        self.stack.append(self.nested_seconds)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        elapsed_seconds = time.perf_counter() - self.start
+        self.stack.pop()
+
+        if self.stack:
+            self.stack[-1][0] += elapsed_seconds
+
+        totals = self.stage_totals.get(self.stage)
+        if totals is None:
+            totals = self.stage_totals[self.stage] = [0.0, 0, 0]
+
+        totals[0] += elapsed_seconds - self.nested_seconds[0]
+        totals[1] += self.items
+        totals[2] += self.size_bytes
+
+
+class _StageTimedFile:
+    """
+    File object timing the reads of the file it wraps as a stage, passing everything else through.
+    """
+
+    def __init__(self, stage_timing_service: StageTimingService, stage: str, file_obj: BinaryIO):
+        self.stage_timing_service = stage_timing_service
+        self.stage = stage
+        self.file_obj = file_obj
+
+    def read(self, size: int = -1) -> bytes:
+        with self.stage_timing_service.time_stage(self.stage) as span:
+            data = self.file_obj.read(size)
+            span.add(size_bytes=len(data))
+
+        return data
+
+    def readinto(self, buffer) -> int:
+        with self.stage_timing_service.time_stage(self.stage) as span:
+            read_size = self.file_obj.readinto(buffer)
+            span.add(size_bytes=read_size or 0)
+
+        return read_size
+
+    def __getattr__(self, name: str):
+        return getattr(self.file_obj, name)
+
+    def __enter__(self) -> "_StageTimedFile":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.file_obj.close()
+
+
+stage_timing_service = StageTimingService()
@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from services.batch_planner_service import BatchPlannerService
+
+
+class BatchPlannerServiceTest(TestCase):
+    def setUp(self):
+        self.batch_planner = BatchPlannerService(max_batch_size_bytes=100, max_batch_writes=3)
+
+    def test_batch_is_started_once_the_write_count_limit_is_reached(self):
+        batches = list(self.batch_planner.iter_batches((write, 10) for write in range(7)))
+
+        assert batches == [([0, 1, 2], 30), ([3, 4, 5], 30), ([6], 10)]
+
+    def test_batch_is_started_before_the_byte_limit_is_exceeded(self):
+        batches = list(self.batch_planner.iter_batches([("a", 60), ("b", 40), ("c", 1), ("d", 50)]))
+
+        assert batches == [(["a", "b"], 100), (["c", "d"], 51)]
+
+    def test_write_larger_than_the_byte_limit_is_batched_alone(self):
+        batches = list(self.batch_planner.iter_batches([("a", 10), ("b", 150), ("c", 10)]))
+
+        assert batches == [(["a"], 10), (["b"], 150), (["c"], 10)]
+
+    def test_no_writes_is_no_batches(self):
+        assert list(self.batch_planner.iter_batches([])) == []
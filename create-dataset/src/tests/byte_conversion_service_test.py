@@ -0,0 +1,50 @@
+from datetime import datetime
+from unittest import TestCase
+
+from services.byte_conversion_service import ByteConversionService
+
+# The example task document from https://cloud.google.com/firestore/docs/storage-size
+TASK_DOCUMENT_PATH = "users/jeff/tasks/my_task_id"
+TASK_DOCUMENT_DATA = {
+    "type": "Personal",
+    "done": False,
+    "priority": 1,
+    "description": "Learn Cloud Firestore",
+}
+
+
+class ByteConversionServiceTest(TestCase):
+    def test_string_is_utf8_bytes_plus_one(self):
+        assert ByteConversionService.get_firestore_string_size("Personal") == 9
+        assert ByteConversionService.get_firestore_string_size("") == 1
+        # 'é' is 2 bytes and '€' is 3 bytes once UTF-8 encoded
+        assert ByteConversionService.get_firestore_string_size("é€") == 6
+
+    def test_number_is_eight_bytes(self):
+        for value in (1, 2**62, 1.5, datetime(2024, 1, 1)):
+            with self.subTest(value=value):
+                assert ByteConversionService.get_firestore_value_size(value) == 8
+
+    def test_boolean_and_null_are_one_byte(self):
+        for value in (True, False, None):
+            with self.subTest(value=value):
+                assert ByteConversionService.get_firestore_value_size(value) == 1
+
+    def test_map_is_its_field_names_and_values_and_array_is_its_values(self):
+        # "type" 5 + "Personal" 9
+        assert ByteConversionService.get_firestore_value_size({"type": "Personal"}) == 14
+        # "tags" 5 + "personal" 9 + "work" 5
+        assert ByteConversionService.get_firestore_value_size({"tags": ["personal", "work"]}) == 19
+
+    def test_document_name_is_its_path_segments_plus_sixteen(self):
+        # "users" 6 + "jeff" 5 + "tasks" 6 + "my_task_id" 11 + 16
+        assert ByteConversionService.get_firestore_document_name_size(TASK_DOCUMENT_PATH) == 44
+
+    def test_document_is_its_name_and_fields_plus_thirty_two(self):
+        # 44 byte name + 71 bytes of fields + 32
+        assert ByteConversionService.get_firestore_value_size(TASK_DOCUMENT_DATA) == 71
+        assert ByteConversionService.get_firestore_document_size(TASK_DOCUMENT_PATH, TASK_DOCUMENT_DATA) == 147
+
+    def test_unsupported_type_is_an_error(self):
+        with self.assertRaises(TypeError):
+            ByteConversionService.get_firestore_value_size({"value": object()})
@@ -0,0 +1,30 @@
+import os
+from unittest import TestCase, mock
+
+from config.config_helpers import get_enum_value_from_env
+from models.unit_count_mode import UnitCountMode
+
+
+class ConfigHelpersTest(TestCase):
+    def test_enum_value_is_parsed_from_env(self):
+        for unit_count_mode in UnitCountMode:
+            with (
+                self.subTest(unit_count_mode=unit_count_mode),
+                mock.patch.dict(os.environ, {"UNIT_COUNT_MODE": unit_count_mode.value}),
+            ):
+                assert get_enum_value_from_env(
+                    "UNIT_COUNT_MODE", UnitCountMode, UnitCountMode.AGGREGATION
+                ) is unit_count_mode
+
+    def test_enum_value_defaults_when_not_set(self):
+        with mock.patch.dict(os.environ, clear=True):
+            assert get_enum_value_from_env(
+                "UNIT_COUNT_MODE", UnitCountMode, UnitCountMode.AGGREGATION
+            ) is UnitCountMode.AGGREGATION
+
+    def test_unknown_enum_value_raises(self):
+        with (
+            mock.patch.dict(os.environ, {"UNIT_COUNT_MODE": "write-tally"}),
+            self.assertRaisesRegex(ValueError, "UNIT_COUNT_MODE must be one of aggregation, keys_only, write_tally"),
+        ):
+            get_enum_value_from_env("UNIT_COUNT_MODE", UnitCountMode, UnitCountMode.AGGREGATION)
@@ -0,0 +1,66 @@
+import gzip
+import json
+from unittest import TestCase, mock
+
+import zstandard
+from config.config import config
+from local_gcp import LocalStorageClient
+from repository.bucket_loader import bucket_loader
+from repository.dataset_bucket_repository import DatasetBucketRepository
+from services.ranged_download_spool_service import RangedDownloadSpoolService
+
+HEADER = {"survey_id": "test_survey_id", "period_id": "test_period_id", "form_types": ["0001"]}
+UNITS = [{"identifier": f"{unit:011d}", "unit_data": {"runame": f"Unit {unit}"}} for unit in range(200)]
+RAW_DATASET = {**HEADER, "data": UNITS, "title": "Test"}
+
+
+class DatasetBucketRepositoryTest(TestCase):
+    def setUp(self):
+        storage_client = LocalStorageClient(project=config.PROJECT_ID)
+        self.bucket = storage_client.create_bucket(config.DATASET_BUCKET_NAME)
+
+        for patcher in (
+            mock.patch.object(bucket_loader, "dataset_bucket", self.bucket),
+            mock.patch.object(config, "DATASET_STREAM_CHUNK_SIZE", 256),
+            mock.patch.object(config, "BUCKET_DOWNLOAD_RANGE_SIZE", 1024),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        json_content = json.dumps(RAW_DATASET).encode("utf-8")
+        ndjson_content = "\n".join(json.dumps(line) for line in [{**HEADER, "title": "Test"}, *UNITS]).encode("utf-8")
+
+        self.files = {
+            "dataset.json": json_content,
+            "dataset.json.gz": gzip.compress(json_content),
+            "dataset.json.zst": zstandard.ZstdCompressor().compress(json_content),
+            "dataset.ndjson": ndjson_content,
+        }
+        for filename, content in self.files.items():
+            self.bucket.blob(filename).upload_from_string(content)
+
+    def test_dataset_file_is_read_in_every_format_with_and_without_parallel_download(self):
+        for parallel_bucket_download in (False, True):
+            for filename in self.files:
+                with (
+                    self.subTest(filename=filename, parallel_bucket_download=parallel_bucket_download),
+                    mock.patch.object(config, "PARALLEL_BUCKET_DOWNLOAD", parallel_bucket_download),
+                ):
+                    assert DatasetBucketRepository().get_dataset_file_as_json(filename) == RAW_DATASET
+
+    def test_parallel_download_is_parsed_from_the_spool_without_reading_it_whole(self):
+        for filename in self.files:
+            with (
+                self.subTest(filename=filename),
+                mock.patch.object(config, "PARALLEL_BUCKET_DOWNLOAD", True),
+                mock.patch.object(RangedDownloadSpoolService, "readall") as readall,
+            ):
+                assert DatasetBucketRepository().get_dataset_file_as_json(filename) == RAW_DATASET
+
+            readall.assert_not_called()
+
+    def test_data_after_the_dataset_object_is_a_decode_error(self):
+        self.bucket.blob("trailing.json").upload_from_string(self.files["dataset.json"] + b" {}")
+
+        with self.assertRaises(json.JSONDecodeError):
+            DatasetBucketRepository().get_dataset_file_as_json("trailing.json")
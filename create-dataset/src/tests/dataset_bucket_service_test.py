@@ -0,0 +1,152 @@
+from json import JSONDecodeError
+from unittest import TestCase, mock
+
+import main
+from config.config import config
+from google.cloud import exceptions
+from services.dataset_bucket_service import DatasetBucketService
+from services.dataset_ingest_service import DatasetIngestService
+from services.dataset_validator_service import DatasetValidatorService
+
+RAW_DATASET = {
+    "survey_id": "test_survey_id",
+    "period_id": "test_period_id",
+    "form_types": ["0001"],
+    "data": [{"identifier": "00000000001", "unit_data": {"runame": "Unit 1"}}],
+}
+
+
+class DatasetBucketServiceTest(TestCase):
+    def setUp(self):
+        self.pending_filenames = ["missing.json", "dataset.json"]
+
+        dataset_bucket_repository = mock.Mock()
+        dataset_bucket_repository.get_dataset_file_as_json.side_effect = self._get_dataset_file_as_json
+
+        dataset_file_queue_repository = mock.Mock()
+        dataset_file_queue_repository.fetch_oldest_pending_filename.side_effect = (
+            lambda: self.pending_filenames[0] if self.pending_filenames else None
+        )
+        dataset_file_queue_repository.remove_pending_file.side_effect = self.pending_filenames.remove
+
+        for patcher in (
+            mock.patch.object(config, "USE_DATASET_FILE_QUEUE", True),
+            mock.patch.object(config, "STREAM_DATASET_FILE", False),
+            mock.patch.object(config, "RESUMABLE_DATASET_INGEST", False),
+            mock.patch.object(config, "DRAIN_DATASET_FILES", False),
+            mock.patch(
+                "services.dataset_bucket_service.DatasetBucketRepository", return_value=dataset_bucket_repository
+            ),
+            mock.patch(
+                "services.dataset_bucket_service.DatasetFileQueueRepository",
+                return_value=dataset_file_queue_repository,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.dataset_bucket_repository = dataset_bucket_repository
+
+    def _get_dataset_file_as_json(self, filename: str) -> dict:
+        if filename == "missing.json":
+            raise exceptions.NotFound(f"No such object: {filename}")
+
+        return dict(RAW_DATASET)
+
+    def test_missing_file_is_removed_from_the_pending_file_queue(self):
+        raw_dataset = DatasetBucketService().get_and_validate_dataset("missing.json")
+
+        assert raw_dataset is None
+        assert self.pending_filenames == ["dataset.json"]
+        self.dataset_bucket_repository.delete_bucket_file.assert_not_called()
+
+    def test_create_dataset_processes_the_next_file_after_a_missing_one(self):
+        with mock.patch.object(DatasetIngestService, "process_dataset_file", return_value=True) as process_dataset_file:
+            _, status_code, _ = main._create_dataset()
+
+        assert status_code == 200
+        process_dataset_file.assert_called_once_with("dataset.json", RAW_DATASET)
+        assert self.pending_filenames == []
+
+    def test_decode_error_in_streamed_unit_data_is_a_file_content_error(self):
+        def stream_unit_data():
+            yield RAW_DATASET["data"][0]
+            raise JSONDecodeError("Expecting ','", "", 0)
+
+        self.dataset_bucket_repository.stream_dataset_file_as_json.return_value = {
+            **RAW_DATASET,
+            "data": stream_unit_data(),
+        }
+
+        with mock.patch.object(DatasetValidatorService, "try_publish_dataset_error_to_topic") as publish_error:
+            raw_dataset = DatasetBucketService().get_and_validate_streamed_dataset("dataset.json")
+
+            assert next(raw_dataset["data"]) == RAW_DATASET["data"][0]
+            with self.assertRaises(RuntimeError) as context:
+                next(raw_dataset["data"])
+
+        assert str(context.exception) == "Invalid JSON content received."
+        publish_error.assert_called_once_with(
+            {"error": "File content error", "message": "Invalid JSON content received."}
+        )
+
+    def test_valid_streamed_dataset_is_not_deleted_while_it_is_read(self):
+        self.dataset_bucket_repository.stream_dataset_file_as_json.return_value = {
+            **RAW_DATASET,
+            "data": iter(RAW_DATASET["data"]),
+        }
+
+        raw_dataset = DatasetBucketService().get_and_validate_streamed_dataset("dataset.json")
+
+        assert list(raw_dataset["data"]) == RAW_DATASET["data"]
+        self.dataset_bucket_repository.stream_dataset_file_as_json.assert_called_once_with(
+            "dataset.json", DatasetBucketService.STREAMED_HEADER_KEYS
+        )
+        self.dataset_bucket_repository.delete_bucket_file.assert_not_called()
+        assert self.pending_filenames == ["missing.json", "dataset.json"]
+
+    def test_decode_error_in_streamed_metadata_deletes_the_file(self):
+        self.dataset_bucket_repository.stream_dataset_file_as_json.side_effect = JSONDecodeError(
+            "Expecting value", "", 0
+        )
+
+        with (
+            mock.patch.object(config, "AUTODELETE_DATASET_BUCKET_FILE", True),
+            mock.patch.object(DatasetValidatorService, "try_publish_dataset_error_to_topic") as publish_error,
+            self.assertRaisesRegex(RuntimeError, "Invalid JSON content received."),
+        ):
+            DatasetBucketService().get_and_validate_streamed_dataset("dataset.json")
+
+        publish_error.assert_called_once_with(
+            {"error": "File content error", "message": "Invalid JSON content received."}
+        )
+        self.dataset_bucket_repository.delete_bucket_file.assert_called_once_with("dataset.json")
+        assert self.pending_filenames == ["missing.json"]
+
+    def test_streamed_metadata_missing_a_mandatory_key_deletes_the_file(self):
+        self.dataset_bucket_repository.stream_dataset_file_as_json.return_value = {
+            "survey_id": "test_survey_id",
+            "form_types": ["0001"],
+            "data": iter(RAW_DATASET["data"]),
+        }
+
+        with (
+            mock.patch.object(config, "AUTODELETE_DATASET_BUCKET_FILE", True),
+            mock.patch.object(DatasetValidatorService, "try_publish_dataset_error_to_topic") as publish_error,
+            self.assertRaisesRegex(RuntimeError, "Mandatory key\\(s\\) missing from JSON: period_id."),
+        ):
+            DatasetBucketService().get_and_validate_streamed_dataset("dataset.json")
+
+        publish_error.assert_called_once_with(
+            {"error": "Mandatory key(s) error", "message": "Mandatory key(s) missing from JSON."}
+        )
+        self.dataset_bucket_repository.delete_bucket_file.assert_called_once_with("dataset.json")
+
+    def test_missing_streamed_file_is_skipped(self):
+        self.dataset_bucket_repository.stream_dataset_file_as_json.side_effect = exceptions.NotFound(
+            "No such object: missing.json"
+        )
+
+        assert DatasetBucketService().get_and_validate_streamed_dataset("missing.json") is None
+        assert self.pending_filenames == ["dataset.json"]
+        self.dataset_bucket_repository.delete_bucket_file.assert_not_called()
@@ -0,0 +1,101 @@
+import json
+import time
+from unittest import TestCase, mock
+
+from config.config import config
+from local_gcp import LocalFirestoreClient, LocalStorageClient, use_in_create_dataset
+from repository.bucket_loader import bucket_loader
+from repository.client_registry import client_registry
+from repository.dataset_bucket_repository import DatasetBucketRepository
+from services.dataset_ingest_service import DatasetIngestService
+from services.dataset_processor_service import DatasetProcessorService
+from services.dataset_writer_service import DatasetWriterService
+
+# Files in upload order, with the survey id of each
+DATASET_FILES = [
+    ("survey_a_1.json", "survey_a"),
+    ("survey_b_1.json", "survey_b"),
+    ("survey_a_2.json", "survey_a"),
+    ("survey_a_3.json", "survey_a"),
+    ("survey_b_2.json", "survey_b"),
+]
+
+
+class DatasetDrainTest(TestCase):
+    def setUp(self):
+        firestore_client = LocalFirestoreClient(project=config.PROJECT_ID)
+        storage_client = LocalStorageClient(project=config.PROJECT_ID)
+        self.bucket = storage_client.create_bucket(config.DATASET_BUCKET_NAME)
+
+        for patcher in (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch.object(bucket_loader, "dataset_bucket", self.bucket),
+            mock.patch.object(config, "DRAIN_DATASET_FILES", True),
+            mock.patch.object(config, "DATASET_DRAIN_CONCURRENCY", 4),
+            mock.patch.object(config, "STREAM_DATASET_FILE", False),
+            mock.patch.object(config, "RESUMABLE_DATASET_INGEST", False),
+            mock.patch.object(config, "USE_DATASET_FILE_QUEUE", False),
+            mock.patch.object(config, "RETAIN_DATASET_FIRESTORE", True),
+            mock.patch.object(config, "AUTODELETE_DATASET_BUCKET_FILE", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        use_in_create_dataset(firestore_client=firestore_client)
+        bucket_loader.dataset_bucket = self.bucket
+
+        for unit_count, (filename, survey_id) in enumerate(DATASET_FILES, start=1):
+            raw_dataset = {
+                "survey_id": survey_id,
+                "period_id": "test_period_id",
+                "form_types": ["0001"],
+                "data": [
+                    {"identifier": f"{unit:011d}", "unit_data": {"runame": f"Unit {unit}"}}
+                    for unit in range(unit_count)
+                ],
+            }
+            self.bucket.blob(filename).upload_from_string(json.dumps(raw_dataset))
+            # Keep the upload times distinct, as files are drained oldest first
+            time.sleep(0.002)
+
+    def test_drained_files_are_streamed_and_versioned_in_upload_order(self):
+        processing_order = []
+        process_streamed_raw_dataset = DatasetProcessorService.process_streamed_raw_dataset
+
+        def process_slowly_if_first(processor, filename, raw_dataset, deadline=None):
+            # The first file of a survey takes longest, so a later file of the survey would finish first if not held
+            if filename.endswith("_1.json"):
+                time.sleep(0.2)
+            processing_order.append(filename)
+            return process_streamed_raw_dataset(processor, filename, raw_dataset, deadline)
+
+        with (
+            mock.patch.object(
+                DatasetProcessorService,
+                "process_streamed_raw_dataset",
+                autospec=True,
+                side_effect=process_slowly_if_first,
+            ),
+            mock.patch.object(DatasetWriterService, "try_publish_dataset_metadata_to_topic") as publish_dataset,
+            mock.patch.object(DatasetBucketRepository, "get_dataset_file_as_json") as get_dataset_file_as_json,
+        ):
+            processed_count, failed_count = DatasetIngestService().drain_dataset_files()
+
+        assert (processed_count, failed_count) == (len(DATASET_FILES), 0)
+        get_dataset_file_as_json.assert_not_called()
+        assert list(self.bucket.list_blobs()) == []
+
+        for survey_id in ("survey_a", "survey_b"):
+            survey_filenames = [filename for filename, file_survey_id in DATASET_FILES if file_survey_id == survey_id]
+            assert [filename for filename in processing_order if filename in survey_filenames] == survey_filenames
+
+        published_versions = {
+            call.args[0]["filename"]: call.args[0]["sds_dataset_version"] for call in publish_dataset.call_args_list
+        }
+        assert published_versions == {
+            "survey_a_1.json": 1,
+            "survey_b_1.json": 1,
+            "survey_a_2.json": 2,
+            "survey_a_3.json": 3,
+            "survey_b_2.json": 2,
+        }
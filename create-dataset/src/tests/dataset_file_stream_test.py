@@ -0,0 +1,110 @@
+import gzip
+import importlib.util
+import io
+import json
+from unittest import TestCase, skipIf
+
+import zstandard
+from models.dataset_file_format import DatasetFileCompression, DatasetFileFormat, DatasetFileLayout
+from services.decompression_stream_service import DecompressionStreamService
+from services.json_stream_service import JsonStreamService
+from services.ndjson_stream_service import NdjsonStreamService
+from services.parquet_stream_service import ParquetStreamService
+
+CHUNK_SIZE = 64
+
+HEADER = {"survey_id": "test_survey_id", "period_id": "test_period_id", "form_types": ["0001"], "title": "Test"}
+UNITS = [{"identifier": f"{unit:011d}", "unit_data": {"runame": f"Unit {unit}"}} for unit in range(500)]
+# Units with differing keys, as a struct column holds the keys of every unit
+VARIED_UNITS = [
+    {"identifier": "00000000001", "unit_data": {"runame": "Unit 1", "local_units": [{"luref": "1"}]}},
+    {"identifier": "00000000002", "unit_data": {"runame": "Unit 2", "employment": 10}},
+    {"identifier": "00000000003", "unit_data": {"local_units": [{"luref": "3", "postcode": "AB1 2CD"}]}},
+]
+
+
+class DatasetFileStreamTest(TestCase):
+    def test_file_format_is_determined_from_extension(self):
+        assert DatasetFileFormat.from_filename("dataset.json") == DatasetFileFormat(
+            DatasetFileLayout.JSON, DatasetFileCompression.NONE
+        )
+        assert DatasetFileFormat.from_filename("dataset.JSON.GZ") == DatasetFileFormat(
+            DatasetFileLayout.JSON, DatasetFileCompression.GZIP
+        )
+        assert DatasetFileFormat.from_filename("dataset.ndjson.zst") == DatasetFileFormat(
+            DatasetFileLayout.NDJSON, DatasetFileCompression.ZSTD
+        )
+        assert DatasetFileFormat.from_filename("dataset.parquet") == DatasetFileFormat(
+            DatasetFileLayout.PARQUET, DatasetFileCompression.NONE
+        )
+        assert DatasetFileFormat.from_filename("dataset.csv.gz") is None
+        assert DatasetFileFormat.from_filename("dataset.parquet.gz") is None
+        assert DatasetFileFormat.from_filename("dataset.gz") is None
+
+    def test_gzip_compressed_ndjson_is_read_line_by_line(self):
+        ndjson = "\n".join(json.dumps(line) for line in [HEADER, *UNITS]).encode("utf-8")
+        # Split into two gzip members, as concatenated uploads are
+        compressed_file = io.BytesIO(gzip.compress(ndjson[:1000]) + gzip.compress(ndjson[1000:]))
+
+        reader = NdjsonStreamService(
+            DecompressionStreamService(compressed_file, DatasetFileCompression.GZIP, CHUNK_SIZE), CHUNK_SIZE
+        )
+
+        assert reader.read_header() == HEADER
+        assert list(reader.iter_lines()) == UNITS
+
+    def test_truncated_content_raises_decode_error(self):
+        content = json.dumps(HEADER).encode("utf-8")
+
+        for compression, compressed_content in (
+            (DatasetFileCompression.GZIP, gzip.compress(content)),
+            (DatasetFileCompression.ZSTD, zstandard.ZstdCompressor().compress(content)),
+        ):
+            for length in (len(compressed_content) // 2, len(compressed_content) - 8, len(compressed_content) - 1):
+                with self.subTest(compression=compression, length=length):
+                    reader = DecompressionStreamService(
+                        io.BytesIO(compressed_content[:length]), compression, CHUNK_SIZE
+                    )
+
+                    with self.assertRaises(json.JSONDecodeError):
+                        reader.read()
+
+    def test_zstd_compressed_ndjson_is_read_across_frames(self):
+        ndjson = "\n".join(json.dumps(line) for line in [HEADER, *UNITS]).encode("utf-8")
+        compressor = zstandard.ZstdCompressor()
+        # Split into two frames, as concatenated uploads are
+        compressed_file = io.BytesIO(compressor.compress(ndjson[:1000]) + compressor.compress(ndjson[1000:]))
+
+        reader = NdjsonStreamService(
+            DecompressionStreamService(compressed_file, DatasetFileCompression.ZSTD, CHUNK_SIZE), CHUNK_SIZE
+        )
+
+        assert reader.read_header() == HEADER
+        assert list(reader.iter_lines()) == UNITS
+
+    @skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow is not installed")
+    def test_parquet_units_match_json_units(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        json_reader = JsonStreamService(io.BytesIO(json.dumps({**HEADER, "data": VARIED_UNITS}).encode("utf-8")), 8)
+        json_reader.read_object_until("data")
+        json_units = list(json_reader.iter_array_items())
+
+        for unit_data_column in (
+            [unit["unit_data"] for unit in VARIED_UNITS],
+            [json.dumps(unit["unit_data"]) for unit in VARIED_UNITS],
+        ):
+            with self.subTest(unit_data_type=type(unit_data_column[0]).__name__):
+                table = pa.table(
+                    {"identifier": [unit["identifier"] for unit in VARIED_UNITS], "unit_data": unit_data_column},
+                    metadata={key: json.dumps(value) for key, value in HEADER.items()},
+                )
+                parquet_file = io.BytesIO()
+                pq.write_table(table, parquet_file)
+                parquet_file.seek(0)
+
+                parquet_reader = ParquetStreamService(parquet_file, 2)
+
+                assert parquet_reader.read_metadata() == HEADER
+                assert list(parquet_reader.iter_units()) == json_units == VARIED_UNITS
@@ -0,0 +1,164 @@
+import threading
+import time
+from unittest import TestCase, mock
+
+from config.config import config
+from local_gcp import CallProfile, LocalFirestoreClient, use_in_create_dataset
+from repository.client_registry import client_registry
+from repository.dataset_firebase_repository import DatasetFirebaseRepository
+
+DATASET_ID = "test_dataset_id"
+WRITE_CONCURRENCY = 3
+
+
+def create_unit_data_with_identifiers(unit_count: int):
+    for unit in range(unit_count):
+        yield f"{unit:011d}", {"dataset_id": DATASET_ID, "data": {"runame": f"Unit {unit}"}}
+
+
+class DatasetFirebaseRepositoryTest(TestCase):
+    def setUp(self):
+        self.firestore_client = LocalFirestoreClient(project=config.PROJECT_ID)
+
+        for patcher in (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch.object(config, "FIRESTORE_WRITE_CONCURRENCY", WRITE_CONCURRENCY),
+            mock.patch.object(DatasetFirebaseRepository, "MAX_BATCH_WRITES", 10),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        use_in_create_dataset(firestore_client=self.firestore_client)
+
+        self.dataset_firebase_repository = DatasetFirebaseRepository()
+
+    def _get_unit_count(self) -> int:
+        return self.firestore_client.get_document_count(f"datasets/{DATASET_ID}/units")
+
+    def _track_commits_in_flight(self) -> list[int]:
+        """
+        Records the number of commits in flight as each commit starts, with each commit held long enough
+        for the next to start alongside it.
+        """
+        commits_in_flight_counts = []
+        commits_in_flight = 0
+        lock = threading.Lock()
+        commit_writes = self.firestore_client._commit_writes
+
+        def commit_writes_slowly(writes, read_documents=None):
+            nonlocal commits_in_flight
+            with lock:
+                commits_in_flight += 1
+                commits_in_flight_counts.append(commits_in_flight)
+            try:
+                time.sleep(0.02)
+                return commit_writes(writes, read_documents)
+            finally:
+                with lock:
+                    commits_in_flight -= 1
+
+        patcher = mock.patch.object(self.firestore_client, "_commit_writes", side_effect=commit_writes_slowly)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        return commits_in_flight_counts
+
+    def test_unit_batches_are_committed_with_several_in_flight(self):
+        commits_in_flight_counts = self._track_commits_in_flight()
+
+        acknowledged_write_count, is_complete = self.dataset_firebase_repository.perform_batched_unit_data_write(
+            DATASET_ID, create_unit_data_with_identifiers(100)
+        )
+
+        assert (acknowledged_write_count, is_complete) == (100, True)
+        assert self._get_unit_count() == 100
+        assert len(commits_in_flight_counts) == 10
+        assert max(commits_in_flight_counts) == WRITE_CONCURRENCY
+
+    def test_no_unit_batches_are_started_once_the_deadline_has_passed(self):
+        acknowledged_write_count, is_complete = self.dataset_firebase_repository.perform_batched_unit_data_write(
+            DATASET_ID, create_unit_data_with_identifiers(100), deadline=time.time()
+        )
+
+        assert (acknowledged_write_count, is_complete) == (10, False)
+        assert self._get_unit_count() == 10
+
+    def test_failed_commit_deletes_the_dataset_once_commits_in_flight_complete(self):
+        self.firestore_client.set_profile("commit", CallProfile(latency_seconds=0.02, failing_calls={4}))
+
+        with self.assertRaisesRegex(RuntimeError, "Error performing batched dataset write."):
+            self.dataset_firebase_repository.perform_batched_unit_data_write(
+                DATASET_ID, create_unit_data_with_identifiers(100)
+            )
+
+        # Commits that were still in flight would otherwise add units back after the clean up
+        time.sleep(0.1)
+        assert self._get_unit_count() == 0
+
+    def _create_units(self, unit_count: int) -> None:
+        self.firestore_client.collection("datasets").document(DATASET_ID).set({"survey_id": "test_survey_id"})
+        self.dataset_firebase_repository.perform_batched_unit_data_write(
+            DATASET_ID, create_unit_data_with_identifiers(unit_count)
+        )
+        self.firestore_client.reset_stats()
+
+    def test_sub_collection_is_deleted_from_keys_only_pages(self):
+        self._create_units(50)
+
+        with mock.patch.object(DatasetFirebaseRepository, "KEYS_ONLY_PAGE_SIZE", 20):
+            self.dataset_firebase_repository.delete_dataset_with_dataset_id(DATASET_ID)
+
+        assert self._get_unit_count() == 0
+        assert self.firestore_client.get_document_count("datasets") == 0
+
+        firestore_stats = self.firestore_client.get_stats()
+        # Pages of 20, 20 and 10 units, each deleted in batches of at most 10, then the dataset itself
+        assert firestore_stats["commit"]["calls"] == 6
+        # The list of sub collections, then the three pages
+        assert firestore_stats["query"]["calls"] == 4
+
+    def test_failed_delete_commit_is_an_error(self):
+        self._create_units(50)
+        self.firestore_client.set_profile("commit", CallProfile(failing_calls={2}))
+
+        with self.assertRaisesRegex(RuntimeError, "Error deleting dataset."):
+            self.dataset_firebase_repository.delete_dataset_with_dataset_id(DATASET_ID)
+
+    def test_units_are_counted_with_a_count_aggregation(self):
+        self._create_units(50)
+
+        assert self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id(DATASET_ID) == 50
+
+        firestore_stats = self.firestore_client.get_stats()
+        assert firestore_stats["count"]["calls"] == 1
+        assert "query" not in firestore_stats
+
+    def test_failed_count_aggregation_falls_back_to_counting_keys(self):
+        self._create_units(50)
+        self.firestore_client.set_profile("count", CallProfile(failure_rate=1.0))
+
+        with (
+            mock.patch.object(DatasetFirebaseRepository, "KEYS_ONLY_PAGE_SIZE", 20),
+            self.assertLogs("repository.dataset_firebase_repository", "WARNING"),
+        ):
+            unit_count = self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id(
+                DATASET_ID
+            )
+
+        assert unit_count == 50
+        # Pages of 20, 20 and 10 units
+        assert self.firestore_client.get_stats()["query"]["calls"] == 3
+
+    def test_units_are_counted_by_keys_without_aggregation(self):
+        self._create_units(40)
+
+        with mock.patch.object(DatasetFirebaseRepository, "KEYS_ONLY_PAGE_SIZE", 20):
+            unit_count = self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id(
+                DATASET_ID, use_aggregation=False
+            )
+
+        assert unit_count == 40
+        firestore_stats = self.firestore_client.get_stats()
+        assert "count" not in firestore_stats
+        # Two full pages, then an empty page showing there are no more
+        assert firestore_stats["query"]["calls"] == 3
@@ -0,0 +1,77 @@
+import tracemalloc
+from unittest import TestCase, mock
+
+from services.dataset_processor_service import DatasetProcessorService
+
+TOTAL_UNITS = 20000
+
+
+def create_synthetic_raw_dataset() -> dict:
+    return {
+        "survey_id": "test_survey_id",
+        "period_id": "test_period_id",
+        "form_types": ["0001", "0002"],
+        "title": "Synthetic dataset",
+        "data": [
+            {
+                "identifier": f"{unit:011d}",
+                "unit_data": {"runame": f"Unit {unit}", "local_unit_count": unit % 7},
+            }
+            for unit in range(TOTAL_UNITS)
+        ],
+    }
+
+
+class DatasetProcessorMemoryTest(TestCase):
+    def setUp(self):
+        with mock.patch.object(DatasetProcessorService, "__init__", return_value=None):
+            self.dataset_processor_service = DatasetProcessorService()
+
+        self.raw_dataset = create_synthetic_raw_dataset()
+        self.unit_data = self.raw_dataset.pop("data")
+        self.dataset_metadata_without_id = {
+            "survey_id": self.raw_dataset["survey_id"],
+            "period_id": self.raw_dataset["period_id"],
+            "form_types": self.raw_dataset["form_types"],
+            "total_reporting_units": 0,
+        }
+
+    def test_transform_yields_each_identifier_with_its_unit_data(self):
+        unit_data_with_identifiers = self.dataset_processor_service._transform_unit_data_with_identifiers(
+            "test_dataset_id", self.dataset_metadata_without_id, self.raw_dataset, self.unit_data
+        )
+
+        for (identifier, unit_dataset), item in zip(unit_data_with_identifiers, self.unit_data, strict=True):
+            assert identifier == item["identifier"]
+            assert unit_dataset["dataset_id"] == "test_dataset_id"
+            assert unit_dataset["data"] is item["unit_data"]
+
+        assert self.dataset_metadata_without_id["total_reporting_units"] == TOTAL_UNITS
+        assert self.dataset_metadata_without_id["title"] == "Synthetic dataset"
+
+    def test_transform_peak_memory_does_not_grow_with_unit_count(self):
+        tracemalloc.start()
+        try:
+            for _ in self.dataset_processor_service._transform_unit_data_with_identifiers(
+                "test_dataset_id", self.dataset_metadata_without_id, self.raw_dataset, self.unit_data
+            ):
+                pass
+            lazy_peak_bytes = tracemalloc.get_traced_memory()[1]
+
+            tracemalloc.reset_peak()
+            baseline_bytes = tracemalloc.get_traced_memory()[0]
+
+            # Materialise the unit documents and identifiers as separate lists, as the transform previously did
+            unit_data_collection_with_metadata = [
+                self.dataset_processor_service._add_metatadata_to_unit_data_item(
+                    "test_dataset_id", self.dataset_metadata_without_id, item
+                )
+                for item in self.unit_data
+            ]
+            extracted_unit_data_identifiers = [item["identifier"] for item in self.unit_data]
+            eager_peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+        finally:
+            tracemalloc.stop()
+
+        assert len(unit_data_collection_with_metadata) == len(extracted_unit_data_identifiers) == TOTAL_UNITS
+        assert lazy_peak_bytes * 20 < eager_peak_bytes
@@ -0,0 +1,66 @@
+from unittest import TestCase, mock
+
+from config.config import config
+from services.dataset_processor_service import DatasetProcessorService
+
+
+class DatasetProcessorServiceTest(TestCase):
+    def setUp(self):
+        with mock.patch.object(DatasetProcessorService, "__init__", return_value=None):
+            self.dataset_processor_service = DatasetProcessorService()
+
+        self.published_version = 0
+        self.dataset_processor_service.dataset_repository = mock.Mock()
+        self.dataset_processor_service.dataset_repository.record_published_dataset_version.side_effect = (
+            self._record_published_dataset_version
+        )
+        self.dataset_writer_service = mock.Mock()
+        self.dataset_processor_service.dataset_writer_service = self.dataset_writer_service
+
+        patcher = mock.patch.object(config, "RETAIN_DATASET_FIRESTORE", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record_published_dataset_version(self, survey_id: str, period_id: str, version: int) -> int:
+        previous_published_version = self.published_version
+        self.published_version = max(self.published_version, version)
+
+        return previous_published_version
+
+    def _complete_version(self, version: int) -> None:
+        self.dataset_processor_service._publish_and_determine_deletion_of_previous_version_dataset(
+            {"survey_id": "test_survey_id", "period_id": "test_period_id", "sds_dataset_version": version}
+        )
+
+    def _get_published_versions(self) -> list[int]:
+        return [
+            call.args[0]["sds_dataset_version"]
+            for call in self.dataset_writer_service.try_publish_dataset_metadata_to_topic.call_args_list
+        ]
+
+    def test_versions_completed_in_order_delete_the_previous_version(self):
+        self._complete_version(1)
+        self._complete_version(2)
+
+        assert self._get_published_versions() == [1, 2]
+        self.dataset_writer_service.try_perform_delete_previous_version_dataset_batch.assert_called_once_with(
+            "test_survey_id", "test_period_id", 1
+        )
+
+    def test_version_completed_after_a_later_version_is_deleted_without_being_published(self):
+        self._complete_version(2)
+        self._complete_version(1)
+
+        assert self._get_published_versions() == [2]
+        self.dataset_writer_service.try_perform_delete_previous_version_dataset_batch.assert_called_once_with(
+            "test_survey_id", "test_period_id", 1
+        )
+        assert self.published_version == 2
+
+    def test_version_completed_after_a_later_version_is_not_published_when_retained(self):
+        with mock.patch.object(config, "RETAIN_DATASET_FIRESTORE", True):
+            self._complete_version(2)
+            self._complete_version(1)
+
+        assert self._get_published_versions() == [2]
+        self.dataset_writer_service.try_perform_delete_previous_version_dataset_batch.assert_not_called()
@@ -0,0 +1,77 @@
+from unittest import TestCase, mock
+
+from config.config import config
+from local_gcp import LocalFirestoreClient, use_in_create_dataset
+from models.unit_count_mode import UnitCountMode
+from repository.client_registry import client_registry
+from services.dataset_bucket_service import DatasetBucketService
+from services.dataset_ingest_service import DatasetIngestService
+from services.dataset_processor_service import DatasetProcessorService
+from services.dataset_writer_service import DatasetWriterService
+
+TOTAL_UNITS = 3000
+FILENAME = "dataset.json"
+
+
+def create_raw_dataset() -> dict:
+    return {
+        "survey_id": "test_survey_id",
+        "period_id": "test_period_id",
+        "form_types": ["0001"],
+        "title": "Resumable dataset",
+        "data": [
+            {"identifier": f"{unit:011d}", "unit_data": {"runame": f"Unit {unit}"}}
+            for unit in range(TOTAL_UNITS)
+        ],
+    }
+
+
+class DatasetResumableIngestTest(TestCase):
+    def setUp(self):
+        self.firestore_client = LocalFirestoreClient(project=config.PROJECT_ID)
+
+        for patcher in (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch.object(config, "RESUMABLE_DATASET_INGEST", True),
+            mock.patch.object(config, "STREAM_DATASET_FILE", False),
+            mock.patch.object(config, "RETAIN_DATASET_FIRESTORE", True),
+            mock.patch.object(config, "UNIT_COUNT_MODE", UnitCountMode.AGGREGATION),
+            # Every invocation has passed its deadline once its first batch of units is written
+            mock.patch.object(config, "PROCESS_TIMEOUT", 0),
+            mock.patch.object(config, "DATASET_COMPLETION_MARGIN", 0),
+            mock.patch.object(DatasetBucketService, "__init__", return_value=None),
+            mock.patch.object(DatasetBucketService, "try_autodelete_bucket_file"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        use_in_create_dataset(firestore_client=self.firestore_client)
+
+    def test_suspended_dataset_resumes_without_transforming_written_units_again(self):
+        invocation_count = 0
+        is_complete = False
+
+        with (
+            mock.patch.object(
+                DatasetProcessorService,
+                "_add_metatadata_to_unit_data_item",
+                autospec=True,
+                side_effect=DatasetProcessorService._add_metatadata_to_unit_data_item,
+            ) as add_metadata_to_unit_data_item,
+            mock.patch.object(DatasetWriterService, "try_publish_dataset_metadata_to_topic") as publish_dataset,
+        ):
+            while not is_complete:
+                invocation_count += 1
+                is_complete = DatasetIngestService().process_dataset_file(FILENAME, create_raw_dataset())
+
+        assert invocation_count > 1
+        # Each suspended invocation may have read ahead the first unit of the batch it did not start
+        assert TOTAL_UNITS <= add_metadata_to_unit_data_item.call_count <= TOTAL_UNITS + invocation_count - 1
+
+        dataset_metadata = publish_dataset.call_args.args[0]
+        assert dataset_metadata["total_reporting_units"] == TOTAL_UNITS
+        assert dataset_metadata["title"] == "Resumable dataset"
+        assert self.firestore_client.get_document_count(
+            f"datasets/{dataset_metadata['dataset_id']}/units"
+        ) == TOTAL_UNITS
+        assert self.firestore_client.get_document_count("dataset_checkpoints") == 0
@@ -0,0 +1,52 @@
+from unittest import TestCase, mock
+
+from config.config import config
+from models.unit_count_mode import UnitCountMode
+from services.dataset_writer_service import DatasetWriterService
+
+DATASET_ID = "test_dataset_id"
+TOTAL_REPORTING_UNITS = 10
+
+
+class DatasetWriterServiceTest(TestCase):
+    def setUp(self):
+        self.dataset_firebase_repository = mock.Mock()
+        self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id.return_value = (
+            TOTAL_REPORTING_UNITS
+        )
+        self.dataset_writer_service = DatasetWriterService(self.dataset_firebase_repository)
+
+    def _verify_unit_data_count(self, unit_count_mode: UnitCountMode, acknowledged_write_count: int) -> dict:
+        with mock.patch.object(config, "UNIT_COUNT_MODE", unit_count_mode):
+            return self.dataset_writer_service._verify_unit_data_count(
+                DATASET_ID, {"total_reporting_units": TOTAL_REPORTING_UNITS}, acknowledged_write_count
+            )
+
+    def test_aggregation_mode_counts_with_a_count_aggregation(self):
+        dataset_metadata = self._verify_unit_data_count(UnitCountMode.AGGREGATION, 0)
+
+        assert dataset_metadata == {"total_reporting_units": TOTAL_REPORTING_UNITS, "dataset_id": DATASET_ID}
+        self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id.assert_called_once_with(
+            DATASET_ID, True
+        )
+
+    def test_keys_only_mode_counts_document_keys(self):
+        self._verify_unit_data_count(UnitCountMode.KEYS_ONLY, 0)
+
+        self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id.assert_called_once_with(
+            DATASET_ID, False
+        )
+
+    def test_write_tally_mode_counts_acknowledged_writes_without_reading(self):
+        self._verify_unit_data_count(UnitCountMode.WRITE_TALLY, TOTAL_REPORTING_UNITS)
+
+        self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id.assert_not_called()
+
+    def test_count_mismatch_raises_in_every_mode(self):
+        for unit_count_mode in UnitCountMode:
+            with (
+                self.subTest(unit_count_mode=unit_count_mode),
+                self.assertRaisesRegex(RuntimeError, "Unit data count does not match total reporting units."),
+            ):
+                self.dataset_firebase_repository.get_number_of_unit_supplementary_data_with_dataset_id.return_value = 9
+                self._verify_unit_data_count(unit_count_mode, 9)
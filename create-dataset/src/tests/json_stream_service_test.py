@@ -0,0 +1,93 @@
+import io
+import json
+from unittest import TestCase
+
+from services.json_stream_service import JsonStreamService
+
+CHUNK_SIZES = range(1, 9)
+
+ITEMS = [
+    -4.5,
+    1e10,
+    -0.25e-3,
+    12,
+    0,
+    True,
+    None,
+    "quote \" backslash \\ newline \n tab \t",
+    "café ☃ \U0001f600",
+    {"identifier": "00000000001", "unit_data": {"runame": "Unit 1", "values": [1, [2.5, {"deep": []}], {}]}},
+    [],
+]
+
+
+class JsonStreamServiceTest(TestCase):
+    def _open(self, content: str, chunk_size: int) -> JsonStreamService:
+        return JsonStreamService(io.BytesIO(content.encode("utf-8")), chunk_size)
+
+    def test_array_items_split_across_chunks_are_decoded(self):
+        content = json.dumps({"survey_id": "test_survey_id", "data": ITEMS}, ensure_ascii=False)
+
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                reader = self._open(content, chunk_size)
+
+                assert reader.read_object_until("data") == ({"survey_id": "test_survey_id"}, True)
+                assert list(reader.iter_array_items()) == ITEMS
+                assert reader.read_remaining_object() == {}
+
+    def test_numbers_split_on_point_or_exponent_are_decoded_whole(self):
+        for content in ['{"data": [-4.5]}', '{"data": [1e10]}', '{"data": [-0.25E-3, 7]}', '{"data":[10]}']:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    reader = self._open(content, chunk_size)
+                    reader.read_object_until("data")
+
+                    assert list(reader.iter_array_items()) == json.loads(content)["data"]
+
+    def test_header_keys_after_data_are_read(self):
+        content = json.dumps({"title": "Test", "data": ITEMS, "survey_id": "test_survey_id", "version": -1.5})
+
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                reader = self._open(content, chunk_size)
+
+                assert reader.read_object_until("data") == ({"title": "Test"}, True)
+                assert reader.skip_array() == len(ITEMS)
+                assert reader.read_remaining_object() == {"survey_id": "test_survey_id", "version": -1.5}
+
+    def test_truncated_content_raises_decode_error(self):
+        content = json.dumps({"survey_id": "test_survey_id", "data": ITEMS})
+
+        for length in range(len(content)):
+            for chunk_size in (1, 3, 8):
+                with self.subTest(length=length, chunk_size=chunk_size):
+                    reader = self._open(content[:length], chunk_size)
+
+                    with self.assertRaises(json.JSONDecodeError):
+                        reader.read_object_until("data")
+                        reader.skip_array()
+                        reader.read_remaining_object()
+
+    def test_malformed_number_raises_decode_error(self):
+        for content in ['{"data": [-4.]}', '{"data": [1e]}', '{"data": [12x]}']:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    reader = self._open(content, chunk_size)
+                    reader.read_object_until("data")
+
+                    with self.assertRaises(json.JSONDecodeError):
+                        list(reader.iter_array_items())
+
+    def test_missing_or_extra_object_comma_raises_decode_error(self):
+        for content in ['{,"data": [1]}', '{"data": [1, 2] "title": "Test"}', '{"data": [1], }', '{"a": 1 "data": [1]}']:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    reader = self._open(content, chunk_size)
+
+                    with self.assertRaises(json.JSONDecodeError):
+                        json.loads(content)
+                    with self.assertRaises(json.JSONDecodeError):
+                        reader.read_object_until("data")
+                        reader.skip_array()
+                        reader.read_remaining_object()
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from unittest import TestCase, mock
+
+import main
+from cloudevents.http import CloudEvent
+from config.config import config
+from local_gcp import LocalFirestoreClient
+from repository.bucket_loader import bucket_loader
+from repository.client_registry import client_registry
+from services.publisher_service import publisher_service
+
+
+class CreateDatasetTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            publisher_service,
+            "flush_published_messages",
+            side_effect=RuntimeError("Error delivering published messages to the topic."),
+        )
+        self.flush_published_messages = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_flush_error_does_not_replace_the_request_error(self):
+        with mock.patch.object(main, "_create_dataset", side_effect=RuntimeError("Invalid JSON content received.")):
+            with self.assertRaisesRegex(RuntimeError, "Invalid JSON content received."):
+                main.create_dataset(None)
+
+        self.flush_published_messages.assert_called_once()
+
+    def test_flush_error_does_not_fail_a_successful_request(self):
+        with mock.patch.object(main, "_create_dataset", return_value=("{}", 200, {})):
+            with self.assertLogs("main", "ERROR"):
+                _, status_code, _ = main.create_dataset(None)
+
+        assert status_code == 200
+        self.flush_published_messages.assert_called_once()
+
+
+class RegisterDatasetFileTest(TestCase):
+    def setUp(self):
+        self.firestore_client = LocalFirestoreClient(project="test-project")
+        self.storage_client = mock.Mock()
+
+        # Only the settings the register-file deploy step sets, with every other setting left at its default
+        for patcher in (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch.object(bucket_loader, "dataset_bucket", None),
+            mock.patch.object(config, "PROJECT_ID", "test-project"),
+            mock.patch.object(config, "DATABASE", "test-project-sds"),
+            mock.patch.object(config, "USE_DATASET_FILE_QUEUE", True),
+            mock.patch.object(config, "CONF", "sandbox"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        client_registry.register_client("firestore", self.firestore_client)
+        client_registry.register_client("storage", self.storage_client)
+
+    def test_file_is_queued_without_fetching_the_bucket(self):
+        cloud_event = CloudEvent(
+            {"type": "google.cloud.storage.object.v1.finalized", "source": "test"},
+            {"name": "folder/dataset.json", "updated": "2024-01-01T00:00:00+00:00"},
+        )
+
+        main.register_dataset_file(cloud_event)
+
+        self.storage_client.get_bucket.assert_not_called()
+        pending_file = self.firestore_client.collection("dataset_file_queue").document("folder%2Fdataset.json").get()
+        assert pending_file.to_dict() == {
+            "filename": "folder/dataset.json",
+            "updated": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        }
@@ -0,0 +1,89 @@
+import json
+from unittest import TestCase, mock
+
+from config.config import config
+from local_gcp import CallProfile, LocalPublisherClient, use_in_create_dataset
+from repository.client_registry import client_registry
+from services.publisher_service import publisher_service
+
+TOPIC_ID = "test_topic_id"
+TOPIC_PATH = f"projects/{config.PROJECT_ID}/topics/{TOPIC_ID}"
+
+
+class PublisherServiceTest(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch.object(publisher_service, "pending_publishes", []),
+            mock.patch.object(config, "CONF", "unit"),
+            mock.patch.object(config, "PUBLISH_BATCH_MAX_MESSAGES", 2),
+            mock.patch.object(config, "PUBLISH_BATCH_MAX_BYTES", 1000),
+            mock.patch.object(config, "PUBLISH_BATCH_MAX_LATENCY", 0.05),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.publisher_client = LocalPublisherClient(
+            profiles={"publish": CallProfile(latency_seconds=0.02)}, topics=[TOPIC_PATH]
+        )
+        use_in_create_dataset(publisher_client=self.publisher_client)
+        self.addCleanup(publisher_service.verified_topic_paths.clear)
+
+    def test_publisher_client_is_created_with_the_batch_settings(self):
+        with (
+            mock.patch.dict(client_registry._clients, clear=True),
+            mock.patch("google.cloud.pubsub_v1.PublisherClient") as publisher_client,
+        ):
+            client_registry.get_publisher_client()
+
+        batch_settings = publisher_client.call_args.kwargs["batch_settings"]
+        assert (batch_settings.max_messages, batch_settings.max_bytes, batch_settings.max_latency) == (2, 1000, 0.05)
+
+    def test_messages_are_published_without_waiting_and_delivered_on_flush(self):
+        for message in range(3):
+            publisher_service.publish_data_to_topic({"message": message}, TOPIC_ID)
+
+        assert len(publisher_service.pending_publishes) == 3
+        assert not all(publish_future.done() for _, publish_future in publisher_service.pending_publishes)
+
+        publisher_service.flush_published_messages()
+
+        assert publisher_service.pending_publishes == []
+        assert [json.loads(data) for data in self.publisher_client.published_messages[TOPIC_PATH]] == [
+            {"message": 0},
+            {"message": 1},
+            {"message": 2},
+        ]
+
+    def test_topic_is_verified_once_within_the_cache_ttl(self):
+        for message in range(3):
+            publisher_service.publish_data_to_topic({"message": message}, TOPIC_ID)
+        publisher_service.flush_published_messages()
+
+        assert self.publisher_client.get_stats()["get_topic"]["calls"] == 1
+
+    def test_failed_delivery_raises_on_flush_and_the_topic_is_verified_again(self):
+        self.publisher_client.set_profile("publish", CallProfile(failure_rate=1.0))
+
+        publisher_service.publish_data_to_topic({"message": 0}, TOPIC_ID)
+
+        with (
+            self.assertLogs("services.publisher_service", "ERROR"),
+            self.assertRaisesRegex(RuntimeError, "Error delivering published messages to the topic."),
+        ):
+            publisher_service.flush_published_messages()
+
+        assert publisher_service.pending_publishes == []
+        assert TOPIC_PATH not in publisher_service.verified_topic_paths
+
+        self.publisher_client.set_profile("publish", CallProfile())
+        publisher_service.publish_data_to_topic({"message": 1}, TOPIC_ID)
+        publisher_service.flush_published_messages()
+
+        assert self.publisher_client.get_stats()["get_topic"]["calls"] == 2
+
+    def test_missing_topic_is_an_error(self):
+        with self.assertRaisesRegex(RuntimeError, "Topic not found"):
+            publisher_service.publish_data_to_topic({"message": 0}, "missing_topic_id")
+
+        assert publisher_service.pending_publishes == []
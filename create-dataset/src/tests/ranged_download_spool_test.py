@@ -0,0 +1,58 @@
+import threading
+from unittest import TestCase
+
+from services.ranged_download_spool_service import RangedDownloadSpoolService
+
+RANGE_SIZE = 100
+CONTENT = bytes(range(256)) * 4
+
+
+class FakeBlob:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.size = len(content)
+        self.generation = 1
+        self.last_range_released = threading.Event()
+
+    def download_to_file(self, file_obj, start, end, **kwargs):
+        assert kwargs["if_generation_match"] == self.generation
+
+        # Hold back the last range, so that reads of earlier ranges must not wait for it
+        if end == self.size - 1:
+            self.last_range_released.wait(timeout=5)
+
+        for offset in range(start, end + 1, 7):
+            file_obj.write(self.content[offset:min(offset + 7, end + 1)])
+
+
+class RangedDownloadSpoolTest(TestCase):
+    def setUp(self):
+        self.blob = FakeBlob(CONTENT)
+
+    def test_early_ranges_are_read_while_later_ranges_download(self):
+        with RangedDownloadSpoolService(self.blob, RANGE_SIZE, 4) as spool:
+            assert spool.read(250) == CONTENT[:250]
+
+            self.blob.last_range_released.set()
+
+            assert spool.read() == CONTENT[250:]
+
+    def test_seek_reads_from_any_range(self):
+        self.blob.last_range_released.set()
+
+        with RangedDownloadSpoolService(self.blob, RANGE_SIZE, 4) as spool:
+            spool.seek(-30, 2)
+            assert spool.read() == CONTENT[-30:]
+
+            spool.seek(95)
+            assert spool.read(10) == CONTENT[95:105]
+
+    def test_failed_range_raises_on_read(self):
+        def fail_download(*args, **kwargs):
+            raise ConnectionError("range failed")
+
+        self.blob.download_to_file = fail_download
+
+        with RangedDownloadSpoolService(self.blob, RANGE_SIZE, 4) as spool:
+            with self.assertRaises(ConnectionError):
+                spool.read(10)
@@ -0,0 +1,46 @@
+import json
+import time
+from unittest import TestCase, mock
+
+from config.config import config
+from services.stage_timing_service import StageTimingService
+
+
+class StageTimingServiceTest(TestCase):
+    def setUp(self):
+        self.stage_timing_service = StageTimingService()
+        self.stage_timing_service.start_invocation()
+
+    def slow_units(self, count: int):
+        for unit in range(count):
+            time.sleep(0.01)
+            yield unit
+
+    def test_nested_stages_are_timed_exclusively(self):
+        with self.stage_timing_service.time_stage("firestore_write") as span:
+            for _ in self.stage_timing_service.time_iterable("parse", self.slow_units(5)):
+                span.add(items=1)
+
+        stages = self.stage_timing_service._get_stage_summaries()
+
+        assert stages["parse"]["items"] == 5
+        assert stages["parse"]["duration_seconds"] >= 0.05
+        assert stages["firestore_write"]["items"] == 5
+        assert stages["firestore_write"]["duration_seconds"] < 0.01
+
+    def test_stage_over_threshold_logs_one_record_and_an_anomaly(self):
+        with self.stage_timing_service.time_stage("download") as span:
+            time.sleep(0.02)
+            span.add(size_bytes=100)
+
+        with (
+            mock.patch.object(config, "RESPONSE_TIME_ALERT_THRESHOLD", 10),
+            mock.patch("services.stage_timing_service.structured_logger") as structured_logger,
+            mock.patch("services.stage_timing_service.logger") as logger,
+        ):
+            self.stage_timing_service.log_stage_timings()
+
+        record = json.loads(structured_logger.info.call_args.args[0])
+        assert record["stages"]["download"]["bytes"] == 100
+        assert logger.error.call_count == 1
+        assert "Stage download took" in logger.error.call_args.args[0]
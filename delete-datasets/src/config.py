@@ -5,7 +5,19 @@ class Config:
     PROJECT_ID = get_value_from_env("PROJECT_ID", "ons-sds-sandbox-01")
     DATABASE = get_value_from_env("FIRESTORE_DB_NAME", "ons-sds-sandbox-01-sds")
     PROCESS_TIMEOUT = int(get_value_from_env("PROCESS_TIMEOUT", "3400"))
-    DELETION_BATCH_SIZE = int(get_value_from_env("DELETION_BATCH_SIZE", "100"))
+    DELETION_BATCH_SIZE = int(get_value_from_env("DELETION_BATCH_SIZE", "500"))
+    DELETION_PAGE_SIZE = int(get_value_from_env("DELETION_PAGE_SIZE", "5000"))
+    DELETION_COMMIT_CONCURRENCY = int(get_value_from_env("DELETION_COMMIT_CONCURRENCY", "10"))
+    DELETION_MIN_BATCH_SIZE = int(get_value_from_env("DELETION_MIN_BATCH_SIZE", "20"))
+    DELETION_MAX_COMMIT_CONCURRENCY = int(get_value_from_env("DELETION_MAX_COMMIT_CONCURRENCY", "50"))
+    DELETION_TARGET_COMMIT_LATENCY = float(get_value_from_env("DELETION_TARGET_COMMIT_LATENCY", "1.0"))
+    DELETION_COMMIT_RETRIES = int(get_value_from_env("DELETION_COMMIT_RETRIES", "5"))
+    DELETION_THROUGHPUT_WINDOW = int(get_value_from_env("DELETION_THROUGHPUT_WINDOW", "50"))
+    DELETION_STATUS_UPDATE_SECONDS = float(get_value_from_env("DELETION_STATUS_UPDATE_SECONDS", "2.0"))
+    DELETION_DEADLINE_SAFETY_FACTOR = float(get_value_from_env("DELETION_DEADLINE_SAFETY_FACTOR", "1.5"))
+    DELETION_CLAIM_MARGIN = int(get_value_from_env("DELETION_CLAIM_MARGIN", "120"))
+    DELETION_CLAIM_CANDIDATES = int(get_value_from_env("DELETION_CLAIM_CANDIDATES", "10"))
+    DELETION_LEASE_SECONDS = int(get_value_from_env("DELETION_LEASE_SECONDS", "300"))
     TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
 config = Config()
\ No newline at end of file
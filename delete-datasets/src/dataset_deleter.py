@@ -1,25 +1,45 @@
+import itertools
+import random
 import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
+from google.api_core import exceptions
 from google.cloud import firestore
 from logging_config import logging
 from config import config
+from deadline_scheduler import DeadlineScheduler
+from deletion_controller import DeletionController
 from status import Status
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
+# Errors from contention or load on Firestore, after which a commit of deletes is retried
+RETRYABLE_COMMIT_ERRORS = (
+    exceptions.Aborted,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+)
+
 class DatasetDeleter:
     """
     Class that will handle the deletion of a dataset in Firestore.
-    DatasetDeleter will only pick 1 dataset with Pending deletion status and
-    process the deletion of that dataset.
+    DatasetDeleter claims 1 dataset at a time by leasing its deletion
+    record, so that several instances can delete different datasets at once,
+    and processes the deletion of that dataset.
     """
+    # Firestore client shared by every deletion in a warm instance
+    _client = None
+
     def __init__(self):
         # Mark the start time of the deletion process
         self.start_time = time.time()
 
         # Initialize Firestore client
-        self.client = firestore.Client(project=config.PROJECT_ID, database=config.DATABASE)
+        self.client = self.get_client()
 
         # Initialize Firestore collections
         self.mark_deletion_collection = self.client.collection("marked_for_deletion")
@@ -30,46 +50,232 @@ class DatasetDeleter:
         # Record ID in the 'marked_for_deletion' collection
         self.marked_id = None
 
+        # Documents deleted across every dataset deleted by this instance
+        self.deleted_document_count = 0
+
+        # Batch size and commits in flight, adjusted to Firestore's response across every dataset
+        self.deletion_controller = DeletionController()
+        # Stops batches from being started once they would not finish before the timeout
+        self.deadline_scheduler = DeadlineScheduler(self.start_time)
+
+        # Documents of the dataset being deleted, and the documents deleted by this instance before it
+        self.dataset_document_count = 0
+        self.dataset_start_document_count = 0
+
+        # Owner of the leases this instance takes out on deletion records
+        self.owner_id = str(uuid.uuid4())
+        # Time, in seconds since the epoch, after which the lease being held is renewed
+        self.lease_renew_at = 0.0
+
+
+    @classmethod
+    def get_client(cls) -> firestore.Client:
+        """
+        Function that will return the Firestore client, creating it on first use
+        rather than per request so that warm instances reuse its connection.
+        """
+        if cls._client is None:
+            cls._client = firestore.Client(project=config.PROJECT_ID, database=config.DATABASE)
+
+        return cls._client
 
     def fetch_dataset_deletion_from_collection(self) -> None:
         """
-        Function that will fetch 1 dataset with Processing or 
-        Pending status from the 'marked_for_deletion' collection 
-        in Firestore and store the guid of that dataset and the
-        deletion record id.
+        Function that will claim 1 dataset with Processing or
+        Pending status from the 'marked_for_deletion' collection
+        in Firestore by taking out a lease on its deletion record,
+        and store the guid of that dataset and the deletion record id.
+        Records leased by another instance are skipped, so that
+        instances running at once delete different datasets, while a
+        record whose lease has expired is taken over.
+        The guid is None if no dataset is left to claim.
         """
-        # Fetch the dataset with status 'Processing' first
-        marked_datasets = (
+        self.guid = None
+        self.marked_id = None
+
+        # Try datasets with status 'Processing' first, then datasets with status 'Pending'
+        processing_datasets = (
             self.mark_deletion_collection
             .where("status", "==", Status.PROCESSING)
-            .limit(1)
             .stream()
         )
+        pending_datasets = (
+            self.mark_deletion_collection
+            .where("status", "==", Status.PENDING)
+            .limit(config.DELETION_CLAIM_CANDIDATES)
+            .stream()
+        )
+
+        for marked_dataset in itertools.chain(processing_datasets, pending_datasets):
+            if not self.claim_deletion_record(marked_dataset):
+                continue
 
-        for marked_dataset in marked_datasets:
             dataset = marked_dataset.to_dict()
             self.guid = dataset.get('dataset_guid')
             self.marked_id = marked_dataset.id
 
-        if self.guid is not None:
-            logger.info(
-                f"Picking up last deletion process."
-            )
+            if dataset.get("status") == Status.PROCESSING:
+                logger.info(
+                    f"Picking up last deletion process."
+                )
             return
 
-        # If no dataset with status 'Processing' is found, fetch the dataset with status 'Pending'
-        marked_datasets = (
-            self.mark_deletion_collection
-            .where("status", "==", Status.PENDING)
-            .limit(1)
-            .stream()
+
+    def claim_deletion_record(self, marked_dataset: firestore.DocumentSnapshot) -> bool:
+        """
+        Function that will take out a lease on a deletion record in a transaction,
+        unless another instance holds an unexpired lease on it.
+
+        Parameters:
+        marked_dataset: The snapshot of the deletion record, as fetched by the query.
+
+        Returns:
+        bool: True if the lease was taken out, False otherwise.
+        """
+        # Records leased by other instances are skipped without starting a transaction
+        if not self.is_deletion_record_claimable(marked_dataset.to_dict()):
+            return False
+
+        try:
+            return firestore.transactional(self._claim_deletion_record_in_transaction)(
+                self.client.transaction(), marked_dataset.reference
+            )
+        except Exception as e:
+            raise RuntimeError("Error claiming deletion record.") from e
+
+
+    def _claim_deletion_record_in_transaction(
+        self, transaction: firestore.Transaction, document_reference: firestore.DocumentReference
+    ) -> bool:
+        """
+        Function that will read a deletion record and lease it to this instance in a transaction,
+        so that if another instance claims it first, the transaction is retried and sees its lease.
+        """
+        marked_dataset = document_reference.get(transaction=transaction).to_dict()
+
+        if (
+            marked_dataset is None
+            or marked_dataset.get("status") not in (Status.PROCESSING, Status.PENDING)
+            or not self.is_deletion_record_claimable(marked_dataset)
+        ):
+            return False
+
+        transaction.update(document_reference, self._get_lease_fields())
+
+        return True
+
+
+    def is_deletion_record_claimable(self, marked_dataset: dict) -> bool:
+        """
+        Function that will check if a deletion record is unleased, leased to this instance,
+        or has a lease that has expired.
+        """
+        lease_expires_at = marked_dataset.get("lease_expires_at")
+
+        return (
+            marked_dataset.get("lease_owner") in (None, self.owner_id)
+            or lease_expires_at is None
+            or lease_expires_at <= datetime.now(timezone.utc)
         )
 
-        for marked_dataset in marked_datasets:
-            dataset = marked_dataset.to_dict()
-            self.guid = dataset.get('dataset_guid')
-            self.marked_id = marked_dataset.id
-        
+
+    def renew_lease_if_due(self) -> bool:
+        """
+        Function that will extend the lease on the deletion record being processed once
+        half of it has passed, as a heartbeat showing the deletion is still in progress.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
+        """
+        if time.time() < self.lease_renew_at:
+            return True
+
+        try:
+            update_start = time.time()
+            is_renewed = firestore.transactional(self._update_lease_in_transaction)(
+                self.client.transaction(),
+                self.mark_deletion_collection.document(self.marked_id),
+                self._get_lease_fields() | self._get_progress_fields(),
+            )
+            self.deadline_scheduler.record_status_update(time.time() - update_start)
+        except Exception as e:
+            raise RuntimeError("Error renewing lease on deletion record.") from e
+
+        if not is_renewed:
+            logger.warning("Lease on deletion record has been taken over by another instance.")
+
+        return is_renewed
+
+
+    def release_lease(self) -> None:
+        """
+        Function that will release the lease on the deletion record being processed, if this
+        instance still holds it, so that a suspended deletion can be picked up straight away,
+        recording the documents left to delete and when they are expected to be deleted.
+        """
+        try:
+            update_start = time.time()
+            firestore.transactional(self._update_lease_in_transaction)(
+                self.client.transaction(),
+                self.mark_deletion_collection.document(self.marked_id),
+                {"lease_owner": None, "lease_expires_at": None} | self._get_progress_fields(),
+            )
+            self.deadline_scheduler.record_status_update(time.time() - update_start)
+        except Exception as e:
+            raise RuntimeError("Error releasing lease on deletion record.") from e
+
+
+    def _update_lease_in_transaction(
+        self,
+        transaction: firestore.Transaction,
+        document_reference: firestore.DocumentReference,
+        lease_fields: dict,
+    ) -> bool:
+        """
+        Function that will update the lease, status or progress fields of a deletion record
+        in a transaction, only if this instance still holds the lease.
+        """
+        marked_dataset = document_reference.get(transaction=transaction).to_dict()
+
+        if marked_dataset is None or marked_dataset.get("lease_owner") != self.owner_id:
+            return False
+
+        transaction.update(document_reference, lease_fields)
+
+        return True
+
+
+    def _get_lease_fields(self) -> dict:
+        """
+        Function that will return the fields leasing a deletion record to this instance
+        for DELETION_LEASE_SECONDS from now, and schedule the lease's renewal.
+        """
+        self.lease_renew_at = time.time() + config.DELETION_LEASE_SECONDS / 2
+
+        return {
+            "lease_owner": self.owner_id,
+            "lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=config.DELETION_LEASE_SECONDS),
+        }
+
+
+    def _get_progress_fields(self) -> dict:
+        """
+        Function that will return the fields recording the documents of the dataset left to delete,
+        and the time they are expected to be deleted by at the recent throughput, if known.
+        """
+        remaining_document_count = max(
+            self.dataset_document_count - (self.deleted_document_count - self.dataset_start_document_count), 0
+        )
+        eta = self.deadline_scheduler.get_eta(remaining_document_count)
+
+        return {
+            "remaining_document_count": remaining_document_count,
+            "deletion_eta": (
+                None if eta is None
+                else datetime.fromtimestamp(eta, timezone.utc).strftime(config.TIME_FORMAT)
+            ),
+        }
+
 
     def fetch_dataset_with_guid(self) -> firestore.DocumentReference | None:
         """
@@ -93,36 +299,46 @@ class DatasetDeleter:
             bool: False if the deletion process is ended due to timeout, True otherwise.
             """
             try:
-                batch_size = config.DELETION_BATCH_SIZE
+                sub_collections = list(doc_ref.collections())
 
-                for sub_collection in doc_ref.collections():
-                    
-                    while True:
+                # Count the documents of the dataset, so that the time left to delete them can be estimated,
+                # renewing the lease between counts as counting a large sub collection takes a while
+                self.dataset_start_document_count = self.deleted_document_count
+                self.dataset_document_count = 1
 
-                        doc_deleted = self.delete_sub_collection_in_batches(sub_collection)
+                for sub_collection in sub_collections:
+                    if not self.renew_lease_if_due():
+                        return False
 
-                        # Check if the dataset deletion process has reached the timeout
-                        # If it has, exit the deletion process immediately
-                        if self.is_dataset_deletion_timeout():
-                            return False
+                    self.dataset_document_count += sub_collection.count().get()[0][0].value
 
-                        if doc_deleted < batch_size:
-                            break
+                for sub_collection in sub_collections:
+                    if not self.delete_sub_collection_in_batches(sub_collection):
+                        return False
 
                 doc_ref.delete()
+                self.deleted_document_count += 1
 
                 return True
 
             except Exception as e:
-                raise RuntimeError("Error deleting dataset.")
-            
+                raise RuntimeError("Error deleting dataset.") from e
+
 
     def delete_sub_collection_in_batches(
         self,
         sub_collection_ref: firestore.CollectionReference,
-    ) -> int:
+    ) -> bool:
         """
-        Deletes a sub collection in batches.
+        Deletes a sub collection in batches, with the batch size and commits in flight
+        set by the deletion controller as the deletion runs.
+        Document keys are read a keys-only page of DELETION_PAGE_SIZE at a time,
+        paging on from the last key rather than querying from the start again,
+        and the next page is fetched while the deletes of the current page are
+        committed. A batch is only started if the deadline scheduler expects it
+        and the final status update to finish before the timeout, and no more
+        batches are started once it does not or the lease is lost, but the
+        commits already in flight are waited for.
 
         Parameters:
         sub_collection_ref (firestore.CollectionReference): The reference to the sub collection
@@ -131,69 +347,249 @@ class DatasetDeleter:
         bool: False if the deletion process is ended due to timeout, True otherwise.
         """
         try:
-            batch_size = config.DELETION_BATCH_SIZE
+            start_time = time.time()
+            start_document_count = self.deleted_document_count
+            commits_in_flight: set[Future] = set()
+            is_complete = True
+
+            with (
+                ThreadPoolExecutor(max_workers=1) as page_executor,
+                ThreadPoolExecutor(max_workers=config.DELETION_MAX_COMMIT_CONCURRENCY) as commit_executor,
+            ):
+                next_page = page_executor.submit(self.get_document_key_page, sub_collection_ref)
+
+                while next_page is not None and is_complete:
+                    docs = next_page.result()
+
+                    # A short page is the last, otherwise the next page is prefetched while this one is deleted
+                    next_page = None
+                    if len(docs) == config.DELETION_PAGE_SIZE:
+                        next_page = page_executor.submit(self.get_document_key_page, sub_collection_ref, docs[-1])
+
+                    batch_start = 0
+                    while batch_start < len(docs):
+                        commits_in_flight = self.wait_for_commit_slot(commits_in_flight)
+
+                        batch_end = batch_start + self.deletion_controller.batch_size
+                        doc_refs = [doc.reference for doc in docs[batch_start:batch_end]]
+                        batch_start = batch_end
+
+                        # Check if the batch would finish after the timeout,
+                        # or if the lease has expired and another instance has taken over the deletion
+                        if (
+                            not self.deadline_scheduler.has_time_for_batch(len(doc_refs))
+                            or not self.renew_lease_if_due()
+                        ):
+                            is_complete = False
+                            break
+
+                        commits_in_flight.add(commit_executor.submit(self.commit_batch_deletion, doc_refs))
+
+                if not self.wait_for_commits_in_flight(commits_in_flight):
+                    is_complete = False
+
+            self.log_deletion_rate(self.deleted_document_count - start_document_count, time.time() - start_time)
+
+            return is_complete
+
+        except Exception as e:
+            raise RuntimeError("Error deleting sub collection in batches.") from e
+
+
+    def get_document_key_page(
+        self,
+        sub_collection_ref: firestore.CollectionReference,
+        cursor: firestore.DocumentSnapshot | None = None,
+    ) -> list[firestore.DocumentSnapshot]:
+        """
+        Function that will get a keys-only page of the documents in a sub collection,
+        so that only document names are downloaded.
+
+        Parameters:
+        sub_collection_ref (firestore.CollectionReference): The reference to the sub collection
+        cursor (firestore.DocumentSnapshot | None): The last document of the previous page, if any
+        """
+        query = sub_collection_ref.select([]).order_by("__name__").limit(config.DELETION_PAGE_SIZE)
+
+        if cursor:
+            query = query.start_after(cursor)
+
+        return list(query.stream())
+
+
+    def wait_for_commit_slot(self, commits_in_flight: set[Future]) -> set[Future]:
+        """
+        Function that will wait for batch commits to complete while as many commits as the
+        deletion controller allows are in flight. Raises the error of any completed commit that failed.
+
+        Returns:
+        set[Future]: The batch commits still in flight.
+        """
+        while len(commits_in_flight) >= self.deletion_controller.commit_concurrency:
+            completed_commits, commits_in_flight = wait(commits_in_flight, return_when=FIRST_COMPLETED)
+
+            for commit in completed_commits:
+                self.deleted_document_count += commit.result()
+
+        return commits_in_flight
+
+
+    def wait_for_commits_in_flight(self, commits_in_flight: set[Future]) -> bool:
+        """
+        Function that will wait for every batch commit in flight to complete, renewing the lease
+        whenever it is due in the meantime. Raises the error of any completed commit that failed.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
+        """
+        is_lease_held = True
+
+        while commits_in_flight:
+            completed_commits, commits_in_flight = wait(
+                commits_in_flight, timeout=max(self.lease_renew_at - time.time(), 0), return_when=FIRST_COMPLETED
+            )
+
+            for commit in completed_commits:
+                self.deleted_document_count += commit.result()
 
-            docs = sub_collection_ref.limit(batch_size).get()
-            doc_count = 0
+            if is_lease_held:
+                is_lease_held = self.renew_lease_if_due()
+
+        return is_lease_held
+
+
+    def commit_batch_deletion(self, doc_refs: list[firestore.DocumentReference]) -> int:
+        """
+        Function that will delete documents in a batch commit, reporting the latency of
+        the commit to the deletion controller. A commit failing from contention or load
+        is retried up to DELETION_COMMIT_RETRIES times with exponential backoff, as
+        deleting a document that has already been deleted succeeds.
+
+        Returns:
+        int: The number of documents deleted.
+        """
+        for attempt in itertools.count():
+            generation = self.deletion_controller.generation
 
             batch = self.client.batch()
+            for doc_ref in doc_refs:
+                batch.delete(doc_ref)
 
-            for doc in docs:
-                doc_count += 1
-                batch.delete(doc.reference)                    
+            commit_start = time.time()
+            try:
+                batch.commit()
+            except RETRYABLE_COMMIT_ERRORS as e:
+                self.deletion_controller.record_commit_error(generation, e)
 
-            batch.commit()
+                if attempt >= config.DELETION_COMMIT_RETRIES:
+                    raise
 
-            return doc_count
+                logger.warning(f"Batch deletion failed with {type(e).__name__}, retrying.")
+                time.sleep(random.uniform(0, min(0.1 * 2**attempt, 5)))
+                continue
 
-        except Exception as e:
-            raise RuntimeError("Error deleting sub collection in batches.")
-        
-    
-    def mark_dataset_as_deleted(self):
+            commit_end = time.time()
+            self.deletion_controller.record_commit(generation, commit_end - commit_start)
+            self.deadline_scheduler.record_commit(commit_start, commit_end, len(doc_refs))
+
+            return len(doc_refs)
+
+
+    def log_deletion_rate(self, document_count: int, deletion_seconds: float) -> None:
+        """
+        Function that will log the documents deleted per second, with the settings the deletion controller reached.
+        """
+        settings = self.deletion_controller.get_settings()
+
+        logger.info(
+            f"Deleted {document_count} documents at {document_count / max(deletion_seconds, 1e-6):.0f} documents "
+            f"per second, reaching batch size {settings['batch_size']} with "
+            f"{settings['commit_concurrency']} commits in flight."
+        )
+
+
+    def mark_dataset_as_deleted(self) -> bool:
         """
         Function that will mark the dataset as deleted in Firestore.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
         """
-        self.mark_dataset_deletion_status(Status.DELETED)
+        return self.mark_dataset_deletion_status(Status.DELETED)
 
 
-    def mark_dataset_as_error(self):
+    def mark_dataset_as_error(self) -> bool:
         """
         Function that will mark the dataset as error in Firestore.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
         """
-        self.mark_dataset_deletion_status(Status.ERROR)
+        return self.mark_dataset_deletion_status(Status.ERROR)
 
 
-    def mark_dataset_as_processing(self):
+    def mark_dataset_as_processing(self) -> bool:
         """
         Function that will mark the dataset as processing in Firestore.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
         """
-        self.mark_dataset_deletion_status(Status.PROCESSING)
+        return self.mark_dataset_deletion_status(Status.PROCESSING)
 
 
-    def mark_dataset_deletion_status(self, dataset_status: str):
+    def mark_dataset_deletion_status(self, dataset_status: str) -> bool:
         """
-        Function that will mark the dataset deletion status in Firestore.
+        Function that will mark the dataset deletion status in Firestore, in a transaction
+        that only updates the deletion record if this instance still holds its lease.
 
         Parameters:
-        dataset_guid: The document guid of the dataset to be marked as deleted.
-        status: The status of the deletion.
+        dataset_status: The status of the deletion.
+
+        Returns:
+        bool: False if the lease has been taken over by another instance, True otherwise.
         """
         try:
-            document_reference = self.mark_deletion_collection.document(self.marked_id)
+            update_start = time.time()
 
-            document_reference.update({"status": dataset_status})
+            status_fields = {"status": dataset_status}
 
-            if dataset_status == Status.DELETED:
-                # Mark the deleted timestamp
-                timestamp = self.get_current_time_with_format()
-                document_reference.update({"deleted_at": timestamp})
+            if dataset_status != Status.PROCESSING:
+                # The deletion is finished, so its record no longer needs to be leased
+                status_fields.update({"lease_owner": None, "lease_expires_at": None})
 
-            logger.info(
-                f"Deletion record has been marked as '{dataset_status}'."
+            if dataset_status == Status.DELETED:
+                # Mark the deleted timestamp, and clear the estimate of the deletion's progress
+                status_fields.update(
+                    {
+                        "deleted_at": self.get_current_time_with_format(),
+                        "remaining_document_count": 0,
+                        "deletion_eta": None,
+                    }
+                )
+
+            is_marked = firestore.transactional(self._update_lease_in_transaction)(
+                self.client.transaction(),
+                self.mark_deletion_collection.document(self.marked_id),
+                status_fields,
             )
+
+            self.deadline_scheduler.record_status_update(time.time() - update_start)
         except Exception as e:
-            raise RuntimeError("Error marking status on deletion record.")
+            raise RuntimeError("Error marking status on deletion record.") from e
+
+        if not is_marked:
+            logger.warning(
+                f"Lease on deletion record has been taken over by another instance, "
+                f"so it is not marked as '{dataset_status}'."
+            )
+            return False
+
+        logger.info(
+            f"Deletion record has been marked as '{dataset_status}'."
+        )
+
+        return True
 
     
     def is_document_exists(self, doc_ref: firestore.DocumentReference) -> bool:
@@ -208,12 +604,24 @@ class DatasetDeleter:
     
     def is_dataset_deletion_timeout(self) -> bool:
         """
-        Function that will check if the dataset deletion process has reached the timeout.
+        Function that will check if the dataset deletion process has reached the timeout,
+        or stopped starting batches as they would not have finished before it.
 
         Returns:
         bool: True if the dataset deletion process has reached the timeout, False otherwise.
         """
-        return time.time() - self.start_time > config.PROCESS_TIMEOUT
+        return self.deadline_scheduler.is_deadline_reached or time.time() - self.start_time > config.PROCESS_TIMEOUT
+
+
+    def has_time_for_another_dataset(self) -> bool:
+        """
+        Function that will check if there is enough of the time budget left to claim another dataset,
+        leaving DELETION_CLAIM_MARGIN seconds of PROCESS_TIMEOUT unclaimed.
+
+        Returns:
+        bool: True if another dataset can be claimed, False otherwise.
+        """
+        return time.time() - self.start_time < config.PROCESS_TIMEOUT - config.DELETION_CLAIM_MARGIN
     
     
     def get_current_time_with_format(self) -> str:
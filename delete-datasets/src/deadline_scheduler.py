@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from logging_config import logging
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """
+    Class that will decide whether another batch of deletes can be started before
+    the deadline of PROCESS_TIMEOUT seconds from the start of the deletion process.
+    The time a batch takes is estimated from the throughput of the last
+    DELETION_THROUGHPUT_WINDOW commits, and the time of the final status update from
+    the slowest status update seen, so that a batch is only started if it and the
+    final status update are expected to finish before the deadline.
+    The current time is read from the clock given, time.time by default.
+    """
+    def __init__(self, start_time: float, clock: Callable[[], float] = time.time):
+        self.deadline = start_time + config.PROCESS_TIMEOUT
+        self.clock = clock
+
+        # Start and end times, and documents deleted, of the most recent commits
+        self.recent_commits = deque(maxlen=config.DELETION_THROUGHPUT_WINDOW)
+        # Slowest status update seen, starting from the expected time of one
+        self.status_update_seconds = config.DELETION_STATUS_UPDATE_SECONDS
+        # Whether a batch was not started as the deadline would have been missed
+        self.is_deadline_reached = False
+
+        # Commits complete on the commit executor's threads
+        self.lock = threading.Lock()
+
+
+    def record_commit(self, commit_start: float, commit_end: float, document_count: int) -> None:
+        """
+        Function that will record a commit that succeeded, as a measure of recent throughput.
+
+        Parameters:
+        commit_start (float): The time the commit was started, in seconds since the epoch
+        commit_end (float): The time the commit completed, in seconds since the epoch
+        document_count (int): The number of documents deleted by the commit
+        """
+        with self.lock:
+            self.recent_commits.append((commit_start, commit_end, document_count))
+
+
+    def record_status_update(self, update_seconds: float) -> None:
+        """
+        Function that will record the time a status update of the deletion record took.
+        """
+        with self.lock:
+            self.status_update_seconds = max(self.status_update_seconds, update_seconds)
+
+
+    def has_time_for_batch(self, batch_size: int) -> bool:
+        """
+        Function that will check if a batch of deletes can be committed, and the final
+        status update made, before the deadline, with DELETION_DEADLINE_SAFETY_FACTOR
+        to spare. Once a batch cannot, no more are started.
+
+        Parameters:
+        batch_size (int): The number of documents in the batch
+
+        Returns:
+        bool: True if the batch can be started, False otherwise.
+        """
+        if not self.is_deadline_reached:
+            with self.lock:
+                predicted_seconds = config.DELETION_DEADLINE_SAFETY_FACTOR * (
+                    self._estimate_batch_seconds(batch_size) + self.status_update_seconds
+                )
+
+            if self.clock() + predicted_seconds >= self.deadline:
+                logger.info(
+                    f"A batch of {batch_size} documents is expected to take {predicted_seconds:.2f}s with the "
+                    f"final status update, which would miss the deadline."
+                )
+                self.is_deadline_reached = True
+
+        return not self.is_deadline_reached
+
+
+    def get_documents_per_second(self) -> float | None:
+        """
+        Function that will return the documents deleted per second across the recent commits,
+        including the time they overlapped, or None if no commits have completed yet.
+        """
+        with self.lock:
+            if not self.recent_commits:
+                return None
+
+            window_seconds = (
+                max(commit_end for _, commit_end, _ in self.recent_commits)
+                - min(commit_start for commit_start, _, _ in self.recent_commits)
+            )
+            document_count = sum(count for _, _, count in self.recent_commits)
+
+        return document_count / max(window_seconds, 1e-6)
+
+
+    def get_eta(self, remaining_document_count: int) -> float | None:
+        """
+        Function that will estimate when the remaining documents will have been deleted at the
+        recent throughput, as seconds since the epoch, or None if there is no throughput yet.
+        """
+        documents_per_second = self.get_documents_per_second()
+
+        if documents_per_second is None:
+            return None
+
+        return self.clock() + remaining_document_count / documents_per_second
+
+
+    def _estimate_batch_seconds(self, batch_size: int) -> float:
+        """
+        Function that will estimate the time a commit of a batch takes, from the commit time per
+        document of the recent commits, or DELETION_TARGET_COMMIT_LATENCY before any have completed.
+        """
+        commit_seconds = sum(commit_end - commit_start for commit_start, commit_end, _ in self.recent_commits)
+        document_count = sum(count for _, _, count in self.recent_commits)
+
+        if not document_count:
+            return config.DELETION_TARGET_COMMIT_LATENCY
+
+        return batch_size * commit_seconds / document_count
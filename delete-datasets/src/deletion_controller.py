@@ -0,0 +1,128 @@
+import threading
+
+from logging_config import logging
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Firestore's limit on the writes in a single batch commit
+MAX_BATCH_WRITES = 500
+# Documents added to the batch size on each additive increase
+BATCH_SIZE_INCREMENT = 50
+
+
+class DeletionController:
+    """
+    Class that will adjust the batch size and the number of commits in flight
+    of a deletion while it runs, by additive increase and multiplicative decrease.
+    Every round of commits completed within DELETION_TARGET_COMMIT_LATENCY grows
+    the batch size, up to the per-commit write cap, and then the commits in flight.
+    A commit slower than the target halves the commits in flight, or the batch
+    size once only 1 commit is in flight, and a commit that fails with a retryable
+    error halves both. Only the first slow or failed commit of each adjustment
+    causes a decrease, so that the commits in flight at the time do not all halve
+    the settings again.
+    """
+    def __init__(self):
+        self.batch_size = max(min(config.DELETION_BATCH_SIZE, MAX_BATCH_WRITES), config.DELETION_MIN_BATCH_SIZE)
+        self.commit_concurrency = max(
+            min(config.DELETION_COMMIT_CONCURRENCY, config.DELETION_MAX_COMMIT_CONCURRENCY), 1
+        )
+
+        # Incremented on each decrease, so that commits started before it are not acted on again
+        self.generation = 0
+        # Commits within the target latency since the settings were last changed
+        self.commits_within_target = 0
+        self.decrease_count = 0
+        self.retry_count = 0
+
+        # Commits complete on the commit executor's threads
+        self.lock = threading.Lock()
+
+
+    def record_commit(self, generation: int, commit_seconds: float) -> None:
+        """
+        Function that will adjust the settings to the latency of a commit that succeeded.
+
+        Parameters:
+        generation (int): The generation of the settings when the commit was started
+        commit_seconds (float): The time the commit took
+        """
+        with self.lock:
+            if commit_seconds > config.DELETION_TARGET_COMMIT_LATENCY:
+                self._decrease(generation, f"commit took {commit_seconds:.2f}s", halve_both=False)
+                return
+
+            self.commits_within_target += 1
+
+            # Increase once per round of commits, rather than once per commit
+            if self.commits_within_target < self.commit_concurrency:
+                return
+
+            self.commits_within_target = 0
+
+            if self.batch_size < MAX_BATCH_WRITES:
+                self.batch_size = min(self.batch_size + BATCH_SIZE_INCREMENT, MAX_BATCH_WRITES)
+            elif self.commit_concurrency < config.DELETION_MAX_COMMIT_CONCURRENCY:
+                self.commit_concurrency += 1
+            else:
+                return
+
+            logger.debug(
+                f"Deletion increased to batch size {self.batch_size} with {self.commit_concurrency} commits in flight."
+            )
+
+
+    def record_commit_error(self, generation: int, error: Exception) -> None:
+        """
+        Function that will back off the settings after a commit failed with a retryable error.
+
+        Parameters:
+        generation (int): The generation of the settings when the commit was started
+        error (Exception): The error the commit failed with
+        """
+        with self.lock:
+            self.retry_count += 1
+            self._decrease(generation, f"commit failed with {type(error).__name__}", halve_both=True)
+
+
+    def _decrease(self, generation: int, reason: str, halve_both: bool) -> None:
+        """
+        Function that will halve the commits in flight, and the batch size if both are
+        halved or only 1 commit is in flight, unless a later commit has already done so.
+        """
+        self.commits_within_target = 0
+
+        if generation < self.generation:
+            return
+
+        settings = (self.batch_size, self.commit_concurrency)
+
+        if halve_both or self.commit_concurrency == 1:
+            self.batch_size = max(self.batch_size // 2, config.DELETION_MIN_BATCH_SIZE)
+        self.commit_concurrency = max(self.commit_concurrency // 2, 1)
+
+        # Already at the lowest settings
+        if (self.batch_size, self.commit_concurrency) == settings:
+            return
+
+        self.generation += 1
+        self.decrease_count += 1
+
+        logger.info(
+            f"Deletion backed off to batch size {self.batch_size} with {self.commit_concurrency} "
+            f"commits in flight, as {reason}."
+        )
+
+
+    def get_settings(self) -> dict:
+        """
+        Function that will return the current settings, with the number of decreases and retries.
+        """
+        with self.lock:
+            return {
+                "batch_size": self.batch_size,
+                "commit_concurrency": self.commit_concurrency,
+                "decreases": self.decrease_count,
+                "commit_retries": self.retry_count,
+            }
@@ -1,7 +1,10 @@
+import time
+
 import functions_framework
 from logging_config import logging
 from dataset_deleter import DatasetDeleter
 from responder import Responder
+from status import Status
 
 logger = logging.getLogger(__name__)
 
@@ -9,19 +12,78 @@ logger = logging.getLogger(__name__)
 def delete_dataset(requests):
     dataset_deleter = DatasetDeleter()
 
-    logger.info("Fetching dataset to delete...")
+    deletion_counts = {Status.DELETED: 0, Status.ERROR: 0}
+
+    # Keep claiming datasets until none are left or the time budget is nearly used up
+    while True:
+        logger.info("Fetching dataset to delete...")
+
+        dataset_deleter.fetch_dataset_deletion_from_collection()
+
+        if dataset_deleter.guid is None:
+            logger.info("No datasets to delete.")
+            break
+
+        deletion_status = delete_marked_dataset(dataset_deleter)
+
+        if deletion_status == Status.PROCESSING and dataset_deleter.is_dataset_deletion_timeout():
+            logger.info(
+                f"Dataset deletion has reached the timeout. Process is suspended."
+            )
+            summary = get_deletion_summary(dataset_deleter, deletion_counts)
+            logger.info(f"Deletion summary: {summary}")
 
-    dataset_deleter.fetch_dataset_deletion_from_collection()
+            return Responder.send_response(
+                "Dataset deletion has reached the timeout. Process is suspended.",
+                "success",
+                200,
+                summary,
+            )
 
-    if dataset_deleter.guid is None:
-        logger.info("No datasets to delete.")
+        # Otherwise a processing dataset had its lease taken over by another instance, which carries on deleting it
+        if deletion_status != Status.PROCESSING:
+            deletion_counts[deletion_status] += 1
 
+        if not dataset_deleter.has_time_for_another_dataset():
+            logger.info("Time budget is nearly used up, no more datasets will be claimed.")
+            break
+
+    summary = get_deletion_summary(dataset_deleter, deletion_counts)
+    logger.info(f"Deletion summary: {summary}")
+
+    if deletion_counts[Status.ERROR] and not deletion_counts[Status.DELETED]:
+        return Responder.send_response(
+            "Dataset is not found.",
+            "error",
+            404,
+            summary,
+        )
+
+    if not deletion_counts[Status.DELETED]:
         return Responder.send_response(
             "No datasets to delete.",
             "success",
             200,
+            summary,
         )
 
+    return Responder.send_response(
+        "Dataset deleted successfully.",
+        "success",
+        200,
+        summary,
+    )
+
+
+def delete_marked_dataset(dataset_deleter: DatasetDeleter) -> Status:
+    """
+    Deletes the dataset of the deletion record that has been fetched.
+
+    Returns:
+    Status: Deleted if the dataset was deleted, Error if it was not found, or Processing
+    if the deletion reached the timeout and is left to be picked up again, or its lease
+    was taken over by another instance.
+    """
     logger.info(
         f"Dataset deletion request is found. Beginning process..."
     )
@@ -34,25 +96,19 @@ def delete_dataset(requests):
         logger.error(f"Error: Dataset is not found.")
         dataset_deleter.mark_dataset_as_error()
 
-        return Responder.send_response(
-            "Dataset is not found.",
-            "error",
-            404,
-        )
-    
+        return Status.ERROR
+
     # If the dataset exists, delete the dataset and mark the deletion record as deleted
     logger.info("Deleting dataset...")
-    dataset_deleter.mark_dataset_as_processing()
+    if not dataset_deleter.mark_dataset_as_processing():
+        # The lease was taken over by another instance, which carries on deleting the dataset
+        return Status.PROCESSING
 
     if not dataset_deleter.delete_dataset_with_dataset_id(doc_ref):
-        logger.info(
-            f"Dataset deletion has reached the timeout. Process is suspended."
-        )
-        return Responder.send_response(
-            "Dataset deletion has reached the timeout. Process is suspended.",
-            "success",
-            200,
-        )
+        # Release the lease, so that the deletion can be picked up straight away by the next run
+        dataset_deleter.release_lease()
+
+        return Status.PROCESSING
 
     # If the deletion process is successful (not timeout), mark the deletion record as deleted
     logger.info(f"Dataset deleted successfully.")
@@ -60,10 +116,20 @@ def delete_dataset(requests):
     # Mark the dataset as deleted with timestamp
     dataset_deleter.mark_dataset_as_deleted()
 
-    return Responder.send_response(
-        "Dataset deleted successfully.",
-        "success",
-        200,
-    )
-    
-                
\ No newline at end of file
+    return Status.DELETED
+
+
+def get_deletion_summary(dataset_deleter: DatasetDeleter, deletion_counts: dict[Status, int]) -> dict:
+    """
+    Summarises the datasets and documents deleted by this invocation, with the
+    documents deleted per second and the deletion settings it reached.
+    """
+    elapsed_seconds = time.time() - dataset_deleter.start_time
+
+    return {
+        "datasets_deleted": deletion_counts[Status.DELETED],
+        "datasets_not_found": deletion_counts[Status.ERROR],
+        "documents_deleted": dataset_deleter.deleted_document_count,
+        "documents_per_second": round(dataset_deleter.deleted_document_count / max(elapsed_seconds, 1e-6)),
+        "deletion_settings": dataset_deleter.deletion_controller.get_settings(),
+    }
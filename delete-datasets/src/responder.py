@@ -3,12 +3,16 @@ import json
 class ResponseModel():
     status: str
     message: str
+    summary: dict
 
 class Responder:
     @staticmethod
-    def send_response(message: str, status: str, status_code: int):
+    def send_response(message: str, status: str, status_code: int, summary: dict | None = None):
         response = ResponseModel()
         response.status = status
         response.message = message
 
+        if summary is not None:
+            response.summary = summary
+
         return json.dumps(response.__dict__), status_code, {"ContentType": "application/json"}
\ No newline at end of file
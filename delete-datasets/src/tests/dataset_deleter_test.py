@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase, mock
+
+from config import config
+from dataset_deleter import DatasetDeleter
+from deadline_scheduler import DeadlineScheduler
+from local_gcp import LocalFirestoreClient
+from status import Status
+
+DATASET_GUID = "test_dataset_guid"
+MARKED_ID = "test_marked_id"
+UNIT_COUNT = 20
+
+
+class DatasetDeleterTest(TestCase):
+    def setUp(self):
+        self.firestore_client = LocalFirestoreClient()
+
+        patcher = mock.patch.object(DatasetDeleter, "_client", self.firestore_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        dataset = self.firestore_client.collection("datasets").document(DATASET_GUID)
+        dataset.set({"survey_id": "test_survey_id"})
+        for unit in range(UNIT_COUNT):
+            dataset.collection("units").document(f"{unit:011d}").set({"runame": f"Unit {unit}"})
+
+        self.firestore_client.collection("marked_for_deletion").document(MARKED_ID).set(
+            {"dataset_guid": DATASET_GUID, "status": Status.PENDING}
+        )
+
+    def _get_deletion_record(self) -> dict:
+        return self.firestore_client.collection("marked_for_deletion").document(MARKED_ID).get().to_dict()
+
+    def _lease_to_other_instance(self, expires_in: timedelta) -> None:
+        self.firestore_client.collection("marked_for_deletion").document(MARKED_ID).update(
+            {"lease_owner": "other_instance", "lease_expires_at": datetime.now(timezone.utc) + expires_in}
+        )
+
+    def _claim(self) -> DatasetDeleter:
+        dataset_deleter = DatasetDeleter()
+        dataset_deleter.fetch_dataset_deletion_from_collection()
+
+        return dataset_deleter
+
+    def test_deletion_record_is_claimed_by_one_instance(self):
+        dataset_deleter = self._claim()
+
+        assert dataset_deleter.guid == DATASET_GUID
+        assert dataset_deleter.marked_id == MARKED_ID
+        assert self._get_deletion_record()["lease_owner"] == dataset_deleter.owner_id
+
+        assert self._claim().guid is None
+
+    def test_expired_lease_is_taken_over(self):
+        self._lease_to_other_instance(timedelta(minutes=5))
+        assert self._claim().guid is None
+
+        self._lease_to_other_instance(-timedelta(minutes=5))
+        dataset_deleter = self._claim()
+
+        assert dataset_deleter.guid == DATASET_GUID
+        assert self._get_deletion_record()["lease_owner"] == dataset_deleter.owner_id
+
+    def test_lease_is_renewed_once_due_until_taken_over(self):
+        dataset_deleter = self._claim()
+        lease_expires_at = self._get_deletion_record()["lease_expires_at"]
+
+        dataset_deleter.lease_renew_at = 0.0
+        assert dataset_deleter.renew_lease_if_due()
+        assert self._get_deletion_record()["lease_expires_at"] > lease_expires_at
+
+        self._lease_to_other_instance(timedelta(minutes=5))
+        dataset_deleter.lease_renew_at = 0.0
+
+        assert not dataset_deleter.renew_lease_if_due()
+        assert self._get_deletion_record()["lease_owner"] == "other_instance"
+
+    def test_lease_is_only_released_by_its_owner(self):
+        dataset_deleter = self._claim()
+
+        dataset_deleter.release_lease()
+        assert self._get_deletion_record()["lease_owner"] is None
+
+        dataset_deleter = self._claim()
+        self._lease_to_other_instance(timedelta(minutes=5))
+
+        dataset_deleter.release_lease()
+        assert self._get_deletion_record()["lease_owner"] == "other_instance"
+
+    def test_status_is_not_marked_once_lease_is_taken_over(self):
+        dataset_deleter = self._claim()
+        assert dataset_deleter.mark_dataset_as_processing()
+
+        self._lease_to_other_instance(timedelta(minutes=5))
+
+        assert not dataset_deleter.mark_dataset_as_deleted()
+        deletion_record = self._get_deletion_record()
+        assert deletion_record["status"] == Status.PROCESSING
+        assert deletion_record["lease_owner"] == "other_instance"
+        assert "deleted_at" not in deletion_record
+
+    def test_deleted_status_clears_lease(self):
+        dataset_deleter = self._claim()
+
+        assert dataset_deleter.delete_dataset_with_dataset_id(dataset_deleter.fetch_dataset_with_guid())
+        assert dataset_deleter.mark_dataset_as_deleted()
+
+        deletion_record = self._get_deletion_record()
+        assert deletion_record["status"] == Status.DELETED
+        assert deletion_record["lease_owner"] is None
+        assert deletion_record["remaining_document_count"] == 0
+        assert self.firestore_client.get_document_count(f"datasets/{DATASET_GUID}/units") == 0
+
+    def test_deletion_stops_before_counting_once_lease_is_taken_over(self):
+        dataset_deleter = self._claim()
+        self._lease_to_other_instance(timedelta(minutes=5))
+        dataset_deleter.lease_renew_at = 0.0
+
+        assert not dataset_deleter.delete_dataset_with_dataset_id(dataset_deleter.fetch_dataset_with_guid())
+        assert self.firestore_client.get_document_count(f"datasets/{DATASET_GUID}/units") == UNIT_COUNT
+
+    def test_sub_collection_is_deleted_from_keys_only_pages_in_batches(self):
+        dataset_deleter = self._claim()
+        self.firestore_client.reset_stats()
+
+        with (
+            mock.patch.object(config, "DELETION_PAGE_SIZE", 7),
+            mock.patch.object(dataset_deleter.deletion_controller, "batch_size", 3),
+            # More commits in flight than there are batches, so the batch size is never increased
+            mock.patch.object(dataset_deleter.deletion_controller, "commit_concurrency", 10),
+        ):
+            is_complete = dataset_deleter.delete_sub_collection_in_batches(
+                dataset_deleter.fetch_dataset_with_guid().collection("units")
+            )
+
+        assert is_complete
+        assert dataset_deleter.deleted_document_count == UNIT_COUNT
+        assert self.firestore_client.get_document_count(f"datasets/{DATASET_GUID}/units") == 0
+        # Pages of 7, 7 and 6 units, each deleted in batches of at most 3
+        assert self.firestore_client.get_stats()["query"]["calls"] == 3
+        assert self.firestore_client.get_stats()["commit"]["calls"] == 8
+
+    def test_no_batches_are_started_once_the_deadline_scheduler_expects_them_to_overrun(self):
+        dataset_deleter = self._claim()
+
+        with (
+            mock.patch.object(dataset_deleter.deletion_controller, "batch_size", 5),
+            mock.patch.object(DeadlineScheduler, "has_time_for_batch", side_effect=[True, True, False]),
+        ):
+            is_complete = dataset_deleter.delete_sub_collection_in_batches(
+                dataset_deleter.fetch_dataset_with_guid().collection("units")
+            )
+
+        assert not is_complete
+        assert dataset_deleter.deleted_document_count == 10
+        assert self.firestore_client.get_document_count(f"datasets/{DATASET_GUID}/units") == UNIT_COUNT - 10
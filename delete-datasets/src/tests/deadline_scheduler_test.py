@@ -0,0 +1,66 @@
+from unittest import TestCase, mock
+
+from config import config
+from deadline_scheduler import DeadlineScheduler
+
+START_TIME = 1000.0
+
+
+class DeadlineSchedulerTest(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(config, "PROCESS_TIMEOUT", 100),
+            mock.patch.object(config, "DELETION_THROUGHPUT_WINDOW", 3),
+            mock.patch.object(config, "DELETION_STATUS_UPDATE_SECONDS", 2.0),
+            mock.patch.object(config, "DELETION_DEADLINE_SAFETY_FACTOR", 2.0),
+            mock.patch.object(config, "DELETION_TARGET_COMMIT_LATENCY", 1.0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.now = START_TIME
+        self.deadline_scheduler = DeadlineScheduler(START_TIME, clock=lambda: self.now)
+
+    def test_batch_is_estimated_from_target_latency_before_any_commits(self):
+        # 2.0 * (1.0s target commit latency + 2.0s status update) = 6s
+        self.now = START_TIME + 93.9
+        assert self.deadline_scheduler.has_time_for_batch(500)
+
+        self.now = START_TIME + 94.0
+        assert not self.deadline_scheduler.has_time_for_batch(500)
+        assert self.deadline_scheduler.is_deadline_reached
+
+    def test_batch_is_estimated_from_recent_commit_time_per_document(self):
+        self.deadline_scheduler.record_commit(START_TIME, START_TIME + 1.0, 100)
+        self.deadline_scheduler.record_status_update(3.0)
+
+        # 2.0 * (500 documents at 0.01s each + 3.0s slowest status update) = 16s
+        self.now = START_TIME + 83.9
+        assert self.deadline_scheduler.has_time_for_batch(500)
+        assert not self.deadline_scheduler.has_time_for_batch(600)
+
+    def test_no_batch_is_started_once_the_deadline_is_reached(self):
+        self.now = START_TIME + 99.0
+        assert not self.deadline_scheduler.has_time_for_batch(1)
+
+        self.now = START_TIME
+        assert not self.deadline_scheduler.has_time_for_batch(1)
+
+    def test_eta_is_estimated_from_the_recent_throughput(self):
+        assert self.deadline_scheduler.get_eta(100) is None
+
+        self.deadline_scheduler.record_commit(START_TIME, START_TIME + 2.0, 100)
+        self.deadline_scheduler.record_commit(START_TIME + 1.0, START_TIME + 4.0, 100)
+        self.now = START_TIME + 4.0
+
+        # 200 documents in the 4s the commits spanned is 50 documents per second
+        assert self.deadline_scheduler.get_documents_per_second() == 50.0
+        assert self.deadline_scheduler.get_eta(500) == START_TIME + 14.0
+
+    def test_throughput_only_counts_the_commits_in_the_window(self):
+        self.deadline_scheduler.record_commit(START_TIME, START_TIME + 100.0, 10)
+
+        for commit in range(3):
+            self.deadline_scheduler.record_commit(START_TIME + commit, START_TIME + commit + 1.0, 100)
+
+        assert self.deadline_scheduler.get_documents_per_second() == 100.0
@@ -0,0 +1,92 @@
+from unittest import TestCase, mock
+
+from config import config
+from deletion_controller import BATCH_SIZE_INCREMENT, MAX_BATCH_WRITES, DeletionController
+from google.api_core import exceptions
+
+TARGET_COMMIT_LATENCY = 1.0
+
+
+class DeletionControllerTest(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(config, "DELETION_BATCH_SIZE", 100),
+            mock.patch.object(config, "DELETION_COMMIT_CONCURRENCY", 4),
+            mock.patch.object(config, "DELETION_MIN_BATCH_SIZE", 20),
+            mock.patch.object(config, "DELETION_MAX_COMMIT_CONCURRENCY", 6),
+            mock.patch.object(config, "DELETION_TARGET_COMMIT_LATENCY", TARGET_COMMIT_LATENCY),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.deletion_controller = DeletionController()
+
+    def _complete_round(self, commit_seconds: float = TARGET_COMMIT_LATENCY / 2) -> None:
+        for _ in range(self.deletion_controller.commit_concurrency):
+            self.deletion_controller.record_commit(self.deletion_controller.generation, commit_seconds)
+
+    def test_settings_are_clamped_to_limits(self):
+        with (
+            mock.patch.object(config, "DELETION_BATCH_SIZE", 1000),
+            mock.patch.object(config, "DELETION_COMMIT_CONCURRENCY", 100),
+        ):
+            assert DeletionController().get_settings()["batch_size"] == MAX_BATCH_WRITES
+            assert DeletionController().get_settings()["commit_concurrency"] == 6
+
+        with (
+            mock.patch.object(config, "DELETION_BATCH_SIZE", 1),
+            mock.patch.object(config, "DELETION_COMMIT_CONCURRENCY", 0),
+        ):
+            assert DeletionController().get_settings()["batch_size"] == 20
+            assert DeletionController().get_settings()["commit_concurrency"] == 1
+
+    def test_batch_size_increases_once_per_round_within_target(self):
+        for _ in range(self.deletion_controller.commit_concurrency - 1):
+            self.deletion_controller.record_commit(0, TARGET_COMMIT_LATENCY / 2)
+        assert self.deletion_controller.batch_size == 100
+
+        self.deletion_controller.record_commit(0, TARGET_COMMIT_LATENCY / 2)
+        assert self.deletion_controller.batch_size == 100 + BATCH_SIZE_INCREMENT
+        assert self.deletion_controller.commit_concurrency == 4
+
+    def test_commit_concurrency_increases_once_batch_size_is_at_the_limit(self):
+        for _ in range(20):
+            self._complete_round()
+
+        assert self.deletion_controller.get_settings() == {
+            "batch_size": MAX_BATCH_WRITES,
+            "commit_concurrency": 6,
+            "decreases": 0,
+            "commit_retries": 0,
+        }
+
+    def test_slow_commit_halves_commit_concurrency_then_batch_size(self):
+        self.deletion_controller.record_commit(0, TARGET_COMMIT_LATENCY * 2)
+        assert (self.deletion_controller.batch_size, self.deletion_controller.commit_concurrency) == (100, 2)
+
+        self.deletion_controller.record_commit(1, TARGET_COMMIT_LATENCY * 2)
+        assert (self.deletion_controller.batch_size, self.deletion_controller.commit_concurrency) == (100, 1)
+
+        self.deletion_controller.record_commit(2, TARGET_COMMIT_LATENCY * 2)
+        assert (self.deletion_controller.batch_size, self.deletion_controller.commit_concurrency) == (50, 1)
+        assert self.deletion_controller.decrease_count == 3
+
+    def test_failed_commit_halves_both_down_to_the_minimum(self):
+        for generation in range(5):
+            self.deletion_controller.record_commit_error(generation, exceptions.Aborted("contention"))
+
+        assert self.deletion_controller.get_settings() == {
+            "batch_size": 20,
+            "commit_concurrency": 1,
+            "decreases": 3,
+            "commit_retries": 5,
+        }
+
+    def test_commits_started_before_a_decrease_do_not_decrease_again(self):
+        generation = self.deletion_controller.generation
+
+        for _ in range(3):
+            self.deletion_controller.record_commit(generation, TARGET_COMMIT_LATENCY * 2)
+
+        assert (self.deletion_controller.batch_size, self.deletion_controller.commit_concurrency) == (100, 2)
+        assert self.deletion_controller.decrease_count == 1
@@ -0,0 +1,36 @@
+import json
+from unittest import TestCase, mock
+
+import main
+from dataset_deleter import DatasetDeleter
+from local_gcp import LocalFirestoreClient
+from status import Status
+
+
+class DeleteDatasetTest(TestCase):
+    def setUp(self):
+        self.firestore_client = LocalFirestoreClient()
+
+        patcher = mock.patch.object(DatasetDeleter, "_client", self.firestore_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for marked_id in ("test_marked_id_1", "test_marked_id_2"):
+            self.firestore_client.collection("marked_for_deletion").document(marked_id).set(
+                {"dataset_guid": f"{marked_id}_guid", "status": Status.PENDING}
+            )
+
+    def test_no_dataset_is_claimed_after_a_lease_takeover_once_the_time_budget_is_used(self):
+        with (
+            # The lease of the first dataset claimed is taken over by another instance
+            mock.patch.object(
+                main, "delete_marked_dataset", side_effect=[Status.PROCESSING, Status.DELETED]
+            ) as delete_marked_dataset,
+            mock.patch.object(DatasetDeleter, "is_dataset_deletion_timeout", return_value=False),
+            mock.patch.object(DatasetDeleter, "has_time_for_another_dataset", return_value=False),
+        ):
+            response, status_code, _ = main.delete_dataset(None)
+
+        assert status_code == 200
+        assert json.loads(response)["message"] == "No datasets to delete."
+        delete_marked_dataset.assert_called_once()
@@ -1,12 +1,16 @@
-import pandas as pd
+from __future__ import annotations
+
 import io
+from typing import TYPE_CHECKING
 from locust_result_evaluator import LocustResultEvaluator
 from logging_config import logging
 from anomaly_logs import anomaly_logs
-from google.cloud import storage
 
 from config import config
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 class LocustLogger:
     """
     Class to evaluate the results and log anomalies found from a performance test result file.
@@ -44,6 +48,9 @@ class LocustLogger:
         Raises:
         RuntimeError: If the file does not exist in the bucket
         """
+        # Imported here as only 1 of the 4 files uploaded per test run is loaded
+        from google.cloud import storage
+
         bucket_name = config.LOCUST_RESULT_BUCKET
 
         storage_client = storage.Client()
@@ -76,6 +83,8 @@ class LocustLogger:
         Parameters:
         file: The contents of the CSV file as a string.
         """
+        import pandas as pd
+
         return pd.read_csv(io.StringIO(file.decode("utf-8")))
     
     # Helper functions to check for anomalies
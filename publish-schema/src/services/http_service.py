@@ -9,15 +9,28 @@ logging = logging.getLogger(__name__)
 
 
 class HTTPService:
-    def __init__(self, session: requests.Session, sds_headers: dict[str, str]):
+    def __init__(self, session: requests.Session, sds_headers: dict[str, str] | None = None):
         self.session = session
-        self.sds_headers = sds_headers
+        self._sds_headers = sds_headers
 
     @classmethod
     def create(cls):
         session = cls._setup_session()
-        sds_headers = cls._generate_headers()
-        return cls(session, sds_headers)
+        return cls(session)
+
+    @property
+    def sds_headers(self) -> dict[str, str]:
+        """
+        The headers for authentication through SDS load balancer, generated on first use
+        rather than at import so that cold starts do not wait on Secret Manager and the ID token.
+
+        Returns:
+            dict[str, str]: the headers required for remote authentication.
+        """
+        if self._sds_headers is None:
+            self._sds_headers = self._generate_headers()
+
+        return self._sds_headers
 
     @staticmethod
     def _setup_session() -> requests.Session:
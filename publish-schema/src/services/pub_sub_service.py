@@ -1,11 +1,31 @@
+from typing import TYPE_CHECKING
+
 from config.schema_config import CONFIG
-from google.cloud.pubsub_v1 import PublisherClient
 from models.schema_publish_errors import SchemaPublishError
 
+if TYPE_CHECKING:
+    from google.cloud.pubsub_v1 import PublisherClient
+
 
 class PubSubService:
     def __init__(self):
-        self.publisher = PublisherClient()
+        self._publisher = None
+
+    @property
+    def publisher(self) -> "PublisherClient":
+        """
+        The Pub/Sub publisher client, created on first use rather than at import, as messages
+        are only sent when a schema fails to publish.
+
+        Returns:
+            PublisherClient: the Pub/Sub publisher client.
+        """
+        if self._publisher is None:
+            from google.cloud.pubsub_v1 import PublisherClient
+
+            self._publisher = PublisherClient()
+
+        return self._publisher
 
     def send_message(self, error: SchemaPublishError, topic_id: str) -> None:
         """
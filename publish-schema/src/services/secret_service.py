@@ -1,17 +1,35 @@
 import json
+from typing import TYPE_CHECKING
 
 from config.schema_config import CONFIG
 from google.api_core.exceptions import GoogleAPICallError, RetryError
-from google.cloud import secretmanager
 from models.schema_publish_errors import SecretAccessError, SecretKeyError
 
+if TYPE_CHECKING:
+    from google.cloud import secretmanager
+
 
 class SecretService:
     def __init__(self):
-        self.client = secretmanager.SecretManagerServiceClient()
+        self._client = None
         self.project_id = CONFIG.PROJECT_ID
         self.secret_id = CONFIG.SECRET_ID
 
+    @property
+    def client(self) -> "secretmanager.SecretManagerServiceClient":
+        """
+        The Secret Manager client, created on first use rather than at import.
+
+        Returns:
+            SecretManagerServiceClient: the Secret Manager client.
+        """
+        if self._client is None:
+            from google.cloud import secretmanager
+
+            self._client = secretmanager.SecretManagerServiceClient()
+
+        return self._client
+
     def get_oauth_client_id(self) -> str | None:
         """
         Get the OAuth client ID for authenticating with SDS.